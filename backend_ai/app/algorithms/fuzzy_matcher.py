@@ -5,9 +5,160 @@ Sử dụng synonyms và similarity để so sánh tiếng Việt
 
 import unicodedata
 import re
+from collections import deque
 from difflib import SequenceMatcher
 
 
+class SynonymAutomaton:
+    """
+    Aho–Corasick automaton trên word tokens: phrase -> concept ID.
+    
+    Mỗi key trong synonyms dict cùng các synonyms của nó tạo thành một concept.
+    Các nhóm có chung phrase (ví dụ "elderly" thuộc cả "người già" và "cao tuổi")
+    được gộp thành một concept duy nhất.
+    
+    Automaton được compile một lần; mỗi lần scan là một lượt tuyến tính qua
+    tokens, chọn các match leftmost-longest không chồng lấn.
+    """
+    
+    def __init__(self, synonyms, normalize):
+        """
+        Args:
+            synonyms: Dict key -> list of synonyms
+            normalize: Hàm normalize text (dùng cho cả phrases và input)
+        """
+        self._normalize = normalize
+        self.concept_names = []
+        phrase_concepts = self._build_concepts(synonyms)
+        
+        # Trie: goto[node] = {token: child}, output[node] = (length, concept) của phrase kết thúc tại node
+        self._goto = [{}]
+        self._output = [None]
+        for phrase, concept_id in phrase_concepts.items():
+            node = 0
+            tokens = phrase.split()
+            for token in tokens:
+                child = self._goto[node].get(token)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][token] = child
+                    self._goto.append({})
+                    self._output.append(None)
+                node = child
+            self._output[node] = (len(tokens), concept_id)
+        
+        self._build_links()
+    
+    def _build_concepts(self, synonyms):
+        """Gộp các nhóm synonyms có chung phrase (union-find) và gán concept ID."""
+        parent = {}
+        
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        
+        group_order = []
+        for key, values in synonyms.items():
+            phrases = [self._normalize(p) for p in [key] + list(values)]
+            phrases = [p for p in phrases if p]
+            if not phrases:
+                continue
+            for phrase in phrases:
+                if phrase not in parent:
+                    parent[phrase] = phrase
+                    group_order.append(phrase)
+            root = find(phrases[0])
+            for phrase in phrases[1:]:
+                other = find(phrase)
+                if other != root:
+                    parent[other] = root
+        
+        # Concept ID theo thứ tự xuất hiện, tên concept = phrase đầu tiên của nhóm
+        root_ids = {}
+        phrase_concepts = {}
+        for phrase in group_order:
+            root = find(phrase)
+            if root not in root_ids:
+                root_ids[root] = len(self.concept_names)
+                self.concept_names.append(root)
+            phrase_concepts[phrase] = root_ids[root]
+        return phrase_concepts
+    
+    def _build_links(self):
+        """BFS để tính failure links và dictionary-suffix links."""
+        self._fail = [0] * len(self._goto)
+        self._dict_link = [None] * len(self._goto)
+        
+        queue = deque()
+        for child in self._goto[0].values():
+            queue.append(child)
+        
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_target = self._goto[fail].get(token, 0)
+                self._fail[child] = fail_target if fail_target != child else 0
+                # Dictionary link: node gần nhất trên chuỗi fail có output
+                target = self._fail[child]
+                self._dict_link[child] = target if self._output[target] else self._dict_link[target]
+                queue.append(child)
+    
+    def scan(self, tokens):
+        """
+        Tìm các phrase trong tokens (một lượt tuyến tính).
+        
+        Returns:
+            List of (start, end, concept_id), leftmost-longest, không chồng lấn
+        """
+        matches = []
+        node = 0
+        for i, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            
+            out = node if self._output[node] else self._dict_link[node]
+            while out:
+                length, concept_id = self._output[out]
+                matches.append((i + 1 - length, i + 1, concept_id))
+                out = self._dict_link[out]
+        
+        if not matches:
+            return matches
+        
+        # Leftmost-longest, bỏ các match chồng lấn
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        covered_until = 0
+        for start, end, concept_id in matches:
+            if start >= covered_until:
+                selected.append((start, end, concept_id))
+                covered_until = end
+        return selected
+    
+    def concepts(self, text):
+        """
+        Signature của text: concept IDs (int) cho các phrase đã match
+        cộng với các token còn lại (str).
+        
+        Hai text tương đương về synonyms khi signature của chúng bằng nhau.
+        """
+        tokens = self._normalize(text).split()
+        signature = set()
+        position = 0
+        for start, end, concept_id in self.scan(tokens):
+            signature.update(tokens[position:start])
+            signature.add(concept_id)
+            position = end
+        signature.update(tokens[position:])
+        return frozenset(signature)
+
+
 class VietnameseFuzzyMatcher:
     """
     Fuzzy matching cho tiếng Việt sử dụng synonyms và similarity
@@ -41,6 +192,9 @@ class VietnameseFuzzyMatcher:
             "đột quỵ": ["stroke", "cerebrovascular"],
             "phục hồi": ["recovery", "rehabilitation", "rehab"]
         }
+        
+        # Compile synonyms một lần thành automaton (phrase -> concept ID)
+        self.synonym_automaton = SynonymAutomaton(self.synonyms, self.normalize_text)
     
     def normalize_text(self, text):
         """
@@ -66,21 +220,12 @@ class VietnameseFuzzyMatcher:
     
     def expand_synonyms(self, text):
         """
-        Mở rộng text với synonyms
-        """
-        normalized = self.normalize_text(text)
-        words = normalized.split()
-        
-        expanded_variations = [normalized]  # Original text
+        Chuyển text thành synonym signature (frozenset concept IDs + tokens còn lại).
         
-        # Add variations with synonyms
-        for word in words:
-            if word in self.synonyms:
-                for synonym in self.synonyms[word]:
-                    variation = normalized.replace(word, synonym)
-                    expanded_variations.append(variation)
-        
-        return expanded_variations
+        Multi-word phrases như "đường huyết" được nhận diện trong một lượt scan
+        của SynonymAutomaton, nên so sánh synonyms chỉ là so sánh hai set.
+        """
+        return self.synonym_automaton.concepts(text)
     
     def calculate_similarity(self, text1, text2):
         """
@@ -106,18 +251,8 @@ class VietnameseFuzzyMatcher:
             
         word_overlap = len(words1.intersection(words2)) / len(words1.union(words2))
         
-        # Method 4: Synonym matching
-        expanded1 = self.expand_synonyms(text1)
-        expanded2 = self.expand_synonyms(text2)
-        
-        synonym_sim = 0.0
-        for exp1 in expanded1:
-            for exp2 in expanded2:
-                if exp1 == exp2:
-                    synonym_sim = 1.0
-                    break
-            if synonym_sim == 1.0:
-                break
+        # Method 4: Synonym matching (so sánh concept signatures)
+        synonym_sim = 1.0 if self.expand_synonyms(text1) == self.expand_synonyms(text2) else 0.0
         
         # Combine all methods
         final_score = max(sequence_sim, word_overlap, synonym_sim)
@@ -4,8 +4,10 @@ Sử dụng PhoBERT để tính semantic similarity cho tiếng Việt
 """
 
 import numpy as np
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional, Tuple
 import logging
+import threading
+from functools import lru_cache
 
 # Try to import PhoBERT dependencies
 try:
@@ -18,6 +20,11 @@ except ImportError:
     logging.warning("PhoBERT dependencies not available. Install: pip install transformers torch")
 
 
+# Similarity tối thiểu để hai skills được coi là khớp (required skills filter + priority skills score)
+# Threshold for PhoBERT v2 semantic matching (0.8 = 80% similarity for strict matching)
+SKILL_MATCH_THRESHOLD = 0.8
+
+
 class PhoBERTSemanticMatcher:
     """
     Semantic matching sử dụng PhoBERT cho tiếng Việt
@@ -242,7 +249,78 @@ class SemanticMatcherWithCache:
         self.cache_misses += 1
         
         return similarity
-    
+
+    def warm_embeddings(self, texts: List[str]) -> int:
+        """
+        Tính trước embeddings cho các texts chưa có trong cache
+
+        Cache được key theo text nên không cần invalidate khi caregiver bị xóa.
+
+        Returns:
+            Số embeddings mới được tính
+        """
+        missing = [text for text in dict.fromkeys(texts) if text and text not in self.embedding_cache]
+        if not missing or not self.is_available():
+            return 0
+
+        embeddings = self.matcher._get_embeddings(missing)
+        for text, embedding in zip(missing, embeddings):
+            self.embedding_cache[text] = embedding
+        return len(missing)
+
+    def similarities(self, query: str, texts: List[str]) -> np.ndarray:
+        """
+        Cosine similarity (clamp về [0, 1]) giữa query và từng text theo embeddings
+        trong cache, tính bằng một phép nhân ma trận
+
+        Texts chưa có embedding được tính một lần và thêm vào cache. Texts giống
+        query có similarity 1.0 (như calculate_similarity). Cần PhoBERT
+        (is_available()); query / texts là skills đã normalize.
+
+        Returns:
+            Array float [len(texts)]
+        """
+        if not texts:
+            return np.zeros(0)
+        self.warm_embeddings([query, *texts])
+        matrix = np.stack([self.embedding_cache[text] for text in texts])
+        query_embedding = self.embedding_cache[query]
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_embedding)
+        dots = matrix @ query_embedding
+        similarities = np.divide(dots, norms, out=np.zeros(len(texts), dtype=dots.dtype), where=norms > 0)
+        similarities = np.clip(similarities, 0.0, 1.0)
+        similarities[[text == query for text in texts]] = 1.0
+        return similarities
+
+    def export_embeddings(self, texts: List[str]) -> Optional[tuple]:
+        """
+        Embeddings của texts dạng ma trận (để ghi vào snapshot dùng chung giữa workers)
+
+        Returns:
+            (texts, matrix float32 [len(texts), dim]), None nếu PhoBERT không có
+        """
+        texts = [text for text in dict.fromkeys(texts) if text]
+        if not texts or not self.is_available():
+            return None
+        self.warm_embeddings(texts)
+        return texts, np.stack([self.embedding_cache[text] for text in texts]).astype(np.float32)
+
+    def attach_embeddings(self, texts: List[str], matrix: np.ndarray) -> int:
+        """
+        Nạp embeddings có sẵn (ví dụ rows của ma trận map từ shared snapshot) vào cache
+
+        Rows được giữ dạng view, không copy.
+
+        Returns:
+            Số embeddings mới được nạp
+        """
+        added = 0
+        for text, embedding in zip(texts, matrix):
+            if text not in self.embedding_cache:
+                self.embedding_cache[text] = embedding
+                added += 1
+        return added
+
     def get_cache_stats(self) -> Dict:
         """Get cache statistics"""
         total_requests = self.cache_hits + self.cache_misses
@@ -267,9 +345,161 @@ class SemanticMatcherWithCache:
         return self.matcher.is_available()
 
 
+class SkillSimilarityMatrix:
+    """
+    Sparse similarity matrix trên vocabulary skills toàn cục, chỉ giữ các cặp >= threshold.
+
+    Rows là skills của requests, columns là vocabulary skills của caregivers.
+    Row của một request skill được tính một lần với cả vocabulary; skill mới vào
+    vocabulary (lúc ingest qua SkillSimilarityIndex, hoặc lần đầu gặp trong một
+    caregiver lúc match) được tính với các rows đã có. Lúc match, so khớp một
+    request skill với skills của caregiver chỉ còn là lookup trong row.
+
+    Có PhoBERT: similarity là cosine giữa embeddings trong cache của
+    semantic_matcher (cùng embeddings với calculate_similarity), mỗi row / mỗi
+    lần thêm skills là một phép nhân ma trận. Không có PhoBERT: similarity lấy
+    từ semantic_matcher.calculate_similarity(request skill, skill) nên kết quả
+    giống hệt khi gọi trực tiếp cho từng cặp.
+
+    Similarity được tính ngoài lock; lock chỉ giữ lúc ghi kết quả vào matrix
+    (kèm phần vocabulary / rows được thêm trong lúc tính, tính lại ngoài lock).
+    """
+
+    def __init__(self, semantic_matcher, threshold: float = SKILL_MATCH_THRESHOLD):
+        self.semantic_matcher = semantic_matcher
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.clear()
+
+    def clear(self):
+        """Xóa vocabulary và rows (ví dụ cùng lúc với semantic_matcher.clear_cache())"""
+        with self._lock:
+            # Kết quả đang tính trên matrix cũ không được ghi vào matrix mới
+            self._generation += 1
+            self._vocabulary: Dict[str, None] = {}  # ordered set
+            self._columns: List[str] = []  # vocabulary theo thứ tự thêm
+            self._rows: Dict[str, Dict[str, float]] = {}
+
+    def _similar(self, query: str, skills: List[str]) -> Dict[str, float]:
+        """{skill: similarity} của các skills khớp với query (>= threshold)"""
+        if not skills:
+            return {}
+        if self.semantic_matcher.is_available():
+            similarities = self.semantic_matcher.similarities(query, skills)
+            return {
+                skills[i]: float(similarities[i])
+                for i in np.flatnonzero(similarities >= self.threshold).tolist()
+            }
+        row = {}
+        for skill in skills:
+            similarity = self.semantic_matcher.calculate_similarity(query, skill)
+            if similarity >= self.threshold:
+                row[skill] = similarity
+        return row
+
+    def add_skills(self, skills: Iterable[str]) -> int:
+        """
+        Thêm skills (đã normalize) vào vocabulary, tính similarity với các rows đã có
+
+        Returns:
+            Số skills mới
+        """
+        new = [skill for skill in dict.fromkeys(skills) if type(skill) is str and skill not in self._vocabulary]
+        if not new:
+            return 0
+        with self._lock:
+            generation = self._generation
+            pending = list(self._rows)
+        updates: Dict[str, Dict[str, float]] = {}
+        while True:
+            for query in pending:
+                updates[query] = self._similar(query, new)
+            with self._lock:
+                if self._generation != generation:
+                    return 0
+                # Rows được thêm trong lúc tính (với vocabulary chưa có skills mới)
+                pending = [query for query in self._rows if query not in updates]
+                if pending:
+                    continue
+                new = [skill for skill in new if skill not in self._vocabulary]
+                for query, row in self._rows.items():
+                    row.update({skill: updates[query][skill] for skill in new if skill in updates[query]})
+                # Thêm vào vocabulary sau cùng: skill có trong vocabulary thì mọi row đã có column của nó
+                self._vocabulary.update(dict.fromkeys(new))
+                self._columns.extend(new)
+                return len(new)
+
+    def row(self, query: str) -> Dict[str, float]:
+        """{skill trong vocabulary: similarity} khớp với query, tính lần đầu được hỏi"""
+        row = self._rows.get(query)
+        if row is not None:
+            return row
+        with self._lock:
+            generation = self._generation
+            pending = list(self._columns)
+        row, computed = {}, 0
+        while True:
+            row.update(self._similar(query, pending))
+            computed += len(pending)
+            with self._lock:
+                if query in self._rows:
+                    return self._rows[query]
+                if self._generation != generation:
+                    return row
+                # Skills được thêm vào vocabulary trong lúc tính
+                pending = self._columns[computed:]
+                if not pending:
+                    self._rows[query] = row
+                    return row
+
+    def best_match(self, query: str, skills: Iterable[str]) -> Tuple[Optional[str], float]:
+        """
+        (skill giống query nhất, similarity) nếu similarity >= threshold, ngược lại (None, 0.0)
+
+        Skill đứng trước được chọn khi similarity bằng nhau (như duyệt skills và
+        chỉ thay khi similarity lớn hơn hẳn).
+        """
+        if type(query) is not str:
+            return self._scan(query, skills)
+        row = self._rows.get(query)
+        if row is None:
+            row = self.row(query)
+
+        best_skill, best_score = None, 0.0
+        for skill in skills:
+            if skill not in self._vocabulary:
+                if type(skill) is not str:
+                    return self._scan(query, skills)
+                self.add_skills((skill,))
+            score = row.get(skill, 0.0)
+            if score > best_score:
+                best_skill, best_score = skill, score
+        return best_skill, best_score
+
+    def _scan(self, query, skills: Iterable) -> Tuple[Optional[str], float]:
+        """best_match bằng cách tính similarity từng cặp (skills không phải string)"""
+        best_skill, best_score = None, 0.0
+        for skill in skills:
+            similarity = self.semantic_matcher.calculate_similarity(query, skill)
+            if similarity > best_score:
+                best_skill, best_score = skill, similarity
+        return (best_skill, best_score) if best_score >= self.threshold else (None, 0.0)
+
+    def stats(self) -> Dict:
+        return {
+            'vocabulary_size': len(self._vocabulary),
+            'rows': len(self._rows),
+            'entries': sum(len(row) for row in list(self._rows.values())),
+        }
+
+
 # Global semantic matcher instance
 semantic_matcher = SemanticMatcherWithCache()
 
+# Skill-pair matches dùng chung cho mọi requests (xem SkillSimilarityMatrix)
+skill_similarity = SkillSimilarityMatrix(semantic_matcher)
+
 # Compatibility functions for existing code
 def normalize_vietnamese_text(text: str) -> str:
     """
@@ -296,6 +526,58 @@ def normalize_vietnamese_text(text: str) -> str:
     
     return without_diacritics
 
+@lru_cache(maxsize=65536)
+def normalize_skill_name(name: str) -> str:
+    """normalize_vietnamese_text có cache (skill names lặp lại rất nhiều giữa caregivers)"""
+    return normalize_vietnamese_text(name)
+
+def normalized_request(request: Dict) -> Dict:
+    """
+    Care request đã compile cho matcher: skills (required / priority) đã normalize
+
+    Trả về dict mới (shallow copy, skills copy nếu cần normalize), không sửa
+    request của caller như normalize_request_skills.
+    """
+    compiled = dict(request)
+    if 'skills' not in request:
+        return compiled
+    
+    skills = request['skills']
+    if 'required_skills' in skills or 'priority_skills' in skills:
+        skills = dict(skills)
+        for key in ('required_skills', 'priority_skills'):
+            if key in skills:
+                skills[key] = [normalize_vietnamese_text(skill) for skill in skills[key]]
+        compiled['skills'] = skills
+    return compiled
+
+def caregiver_skills_normalized(caregiver: Dict) -> bool:
+    """True nếu normalize_caregiver_skills không làm thay đổi skills của caregiver"""
+    if 'skills' not in caregiver:
+        return True
+    try:
+        for skill in caregiver['skills']:
+            if isinstance(skill, dict):
+                if 'name' not in skill or normalize_skill_name(skill['name']) != skill['name']:
+                    return False
+            elif normalize_skill_name(skill) != skill:
+                return False
+    except Exception:
+        # Dữ liệu sai kiểu: để normalize_caregiver_skills xử lý (kể cả lỗi) như cũ
+        return False
+    return True
+
+def normalized_caregiver(caregiver: Dict) -> Dict:
+    """
+    Caregiver với skills đã normalize, không sửa dict của caller
+
+    Trả về chính caregiver nếu skills đã normalize (ví dụ document của
+    CaregiverTable, normalize lúc ingest), ngược lại shallow copy với skills mới.
+    """
+    if caregiver_skills_normalized(caregiver):
+        return caregiver
+    return normalize_caregiver_skills(caregiver.copy())
+
 def normalize_request_skills(request: Dict) -> Dict:
     """
     Normalize Vietnamese skills in a request
@@ -0,0 +1,135 @@
+"""
+Admin endpoints quản lý caregivers trong memory
+
+Upsert/delete từng caregiver (hoặc bulk NDJSON) cập nhật store và các indexes
+incremental, không cần ghi lại caregivers.json rồi reload toàn bộ.
+Tất cả endpoints yêu cầu header X-Admin-Token.
+
+Upsert/delete giữ lock của store (cùng lock với candidates_for của các match
+requests) và compile caregivers nên chạy trong threadpool, không chặn event loop.
+"""
+
+import json
+from typing import Any, Dict, List
+from fastapi import APIRouter, Body, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from app.api.auth import require_admin
+from app.api.match import caregiver_store
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# Số dòng NDJSON upsert mỗi batch (mỗi batch tăng store version một lần)
+BULK_BATCH_SIZE = 1000
+
+
+@router.get("/caregivers/store")
+async def get_store_stats():
+    """Thống kê caregiver store: số profiles, version, trạng thái indexes"""
+    return caregiver_store.stats()
+
+
+@router.put("/caregivers/{caregiver_id}")
+def upsert_caregiver(caregiver_id: str, caregiver: Dict[str, Any] = Body(...)):
+    """
+    Thêm mới hoặc thay thế một caregiver
+    
+    Field `id` trong body (nếu có) phải trùng với caregiver_id trên path.
+    """
+    if caregiver.get('id', caregiver_id) != caregiver_id:
+        raise HTTPException(
+            status_code=400,
+            detail=f"id trong body ({caregiver.get('id')}) khác với path ({caregiver_id})"
+        )
+    caregiver['id'] = caregiver_id
+    
+    try:
+        created = caregiver_store.upsert(caregiver)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "id": caregiver_id,
+        "created": created,
+        "total": len(caregiver_store),
+        "version": caregiver_store.version
+    }
+
+
+@router.delete("/caregivers/{caregiver_id}")
+def delete_caregiver(caregiver_id: str):
+    """Xóa một caregiver"""
+    if not caregiver_store.delete(caregiver_id):
+        raise HTTPException(status_code=404, detail=f"Caregiver {caregiver_id} not found")
+    return {
+        "id": caregiver_id,
+        "deleted": True,
+        "total": len(caregiver_store),
+        "version": caregiver_store.version
+    }
+
+
+@router.post("/caregivers/bulk")
+async def bulk_upsert_caregivers(request: Request):
+    """
+    Bulk upsert caregivers từ body NDJSON (mỗi dòng một caregiver JSON object)
+    
+    Body được đọc theo stream và upsert theo batch (trong threadpool), dòng lỗi
+    (JSON sai hoặc caregiver sai format) được bỏ qua và trả về trong `errors`
+    (kèm số dòng).
+    """
+    counts = {'created': 0, 'updated': 0}
+    errors: List[Dict] = []
+    batch: List[Dict] = []
+    batch_lines: List[int] = []
+    line_number = 0
+    
+    def flush():
+        if batch:
+            result = caregiver_store.upsert_many(batch)
+            counts['created'] += result['created']
+            counts['updated'] += result['updated']
+            for position, error in result['failed']:
+                errors.append({"line": batch_lines[position], "error": error})
+            batch.clear()
+            batch_lines.clear()
+    
+    def handle_line(raw):
+        nonlocal line_number
+        line_number += 1
+        if not raw.strip():
+            return
+        try:
+            caregiver = json.loads(raw)
+        except ValueError as e:
+            errors.append({"line": line_number, "error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(caregiver, dict) or not isinstance(caregiver.get('id'), str) or not caregiver['id']:
+            errors.append({"line": line_number, "error": "Caregiver phải là object có field 'id' (string)"})
+            return
+        batch.append(caregiver)
+        batch_lines.append(line_number)
+    
+    # Phần dòng chưa kết thúc của các chunks trước (dòng dài có thể qua nhiều chunks)
+    buffer = bytearray()
+    async for chunk in request.stream():
+        start = 0
+        while (end := chunk.find(b'\n', start)) >= 0:
+            if buffer:
+                buffer += chunk[start:end]
+                handle_line(buffer)
+                buffer.clear()
+            else:
+                handle_line(chunk[start:end])
+            start = end + 1
+            if len(batch) >= BULK_BATCH_SIZE:
+                await run_in_threadpool(flush)
+        buffer += chunk[start:]
+    handle_line(buffer)
+    await run_in_threadpool(flush)
+    errors.sort(key=lambda error: error['line'])
+    
+    return {
+        **counts,
+        "errors": errors,
+        "total": len(caregiver_store),
+        "version": caregiver_store.version
+    }
@@ -0,0 +1,36 @@
+"""
+Admin authentication cho các endpoint nội bộ (profiling, quản lý dữ liệu)
+
+Token được cấu hình qua biến môi trường ADMIN_TOKEN và gửi trong header
+X-Admin-Token. Nếu ADMIN_TOKEN không được set, mọi chức năng admin bị tắt.
+"""
+
+import hmac
+import os
+from typing import Optional
+from fastapi import Header, HTTPException
+
+ADMIN_TOKEN_ENV = "ADMIN_TOKEN"
+ADMIN_HEADER = "X-Admin-Token"
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Kiểm tra token với ADMIN_TOKEN (constant-time compare)"""
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+def check_admin_token(token: Optional[str]):
+    """Raise 403 nếu token không hợp lệ"""
+    if not is_admin_token(token):
+        raise HTTPException(
+            status_code=403,
+            detail=f"Admin token không hợp lệ (header {ADMIN_HEADER})"
+        )
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI dependency cho các endpoint chỉ dành cho admin"""
+    check_admin_token(x_admin_token)
@@ -2,35 +2,149 @@
 Matching API endpoints
 """
 
-import json
+import functools
 import os
 import time
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from fastapi import APIRouter, Header, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
 from app.models.schemas import (
     MatchRequest, MatchResponse, MatchPayload, SimpleMatchResponse,
     CaregiverRecommendation, ScoreBreakdown, MobileMatchRequest
 )
 from app.core.matcher import RuleBasedMatcher
+from app.core.vectorized_matcher import VectorizedMatcher
+from app.core.instrumentation import MatchStats
+from app.core.profiling import profile_call, ProfilerBusyError
+from app.core.store import CaregiverStore, JsonFileStore
+from app.core.candidates import CandidateRows
+from app.core.indexes import default_indexes
+from app.core.result_cache import ResultCache, content_hash
+from app.core.single_flight import SingleFlight
+from app.core.weight_profiles import get_profiles, load_profiles
+from app.algorithms.semantic_matcher import normalized_request
+from app.api.auth import check_admin_token
+from app.api.negotiation import NegotiatedRoute
+from app.api.responses import FastJSONResponse, schema_dict
 
 router = APIRouter()
-matcher = RuleBasedMatcher()
+# MATCHER_ENGINE: vectorized (mặc định, soft scoring theo batch) hoặc rule (từng candidate),
+# hai engine cho cùng kết quả
+MATCHER_ENGINES = {'vectorized': VectorizedMatcher, 'rule': RuleBasedMatcher}
+matcher = MATCHER_ENGINES[os.environ.get('MATCHER_ENGINE', 'vectorized')]()
+# WEIGHT_PROFILES_FILE: JSON {tên: weights} thêm vào các weight profiles có sẵn (A/B tests, ...)
+if os.environ.get('WEIGHT_PROFILES_FILE'):
+    load_profiles(Path(os.environ['WEIGHT_PROFILES_FILE']))
 
 # Get base directory (backend/)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
+# In-memory stores, tự reload khi file JSON thay đổi
+# (caregiver_store còn nhận upsert/delete qua /api/admin/caregivers)
+# CAREGIVERS_FILE: JSON array hoặc NDJSON (.ndjson/.jsonl), mặc định caregivers.json
+# CAREGIVERS_SNAPSHOT: binary snapshot của file trên, mặc định <file>.snap
+# (build bằng `python -m app.core.snapshot build caregivers.json`)
+caregiver_store = CaregiverStore(
+    Path(os.environ.get('CAREGIVERS_FILE', BASE_DIR / 'caregivers.json')),
+    indexes=default_indexes(),
+    snapshot_path=os.environ.get('CAREGIVERS_SNAPSHOT') or None,
+    verify_snapshot=os.environ.get('CAREGIVERS_SNAPSHOT_VERIFY', '1') != '0',
+    # CAREGIVERS_SHARED_DIR: dùng chung table giữa các uvicorn workers (ví dụ /dev/shm/eldercare)
+    shared_dir=os.environ.get('CAREGIVERS_SHARED_DIR') or None
+)
+request_store = JsonFileStore(BASE_DIR / 'requests.json')
+
+# Result cache cho /match, key gồm version của stores + weights
+match_cache = ResultCache('match', max_entries=int(os.environ.get('MATCH_CACHE_SIZE', '1024')))
+caregiver_store.add_listener(match_cache.clear)
+request_store.add_listener(match_cache.clear)
+
+# Gộp các lời gọi match giống nhau đang chạy đồng thời (không cache sau khi xong)
+match_flight = SingleFlight('match')
+
 # Load data from JSON files
 def load_caregivers():
-    """Load caregivers from JSON file"""
-    file_path = BASE_DIR / 'caregivers.json'
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load caregivers (cached in memory, reload khi file thay đổi)"""
+    return caregiver_store.get()
 
 def load_requests():
-    """Load requests from JSON file"""
-    file_path = BASE_DIR / 'requests.json'
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load requests (cached in memory, reload khi file thay đổi)"""
+    return request_store.get()
+
+
+def data_version() -> tuple:
+    """Version của dữ liệu ảnh hưởng đến kết quả match"""
+    return (caregiver_store.version, matcher.weights_version)
+
+
+def flight_key(care_request: Dict, top_n: int, candidates_key: Hashable) -> tuple:
+    """
+    Key single-flight: care request đã normalize (bỏ id, luôn khác nhau với
+    mobile requests và không ảnh hưởng kết quả), top_n và nguồn candidates
+    """
+    request = normalized_request({k: v for k, v in care_request.items() if k != 'id'})
+    return (content_hash(request), top_n, candidates_key)
+
+
+async def run_matcher(
+    care_request: Dict,
+    caregivers: List[Dict],
+    top_n: int,
+    profile: bool = False,
+    candidates_key: Hashable = None,
+    static_scores: Optional[List] = None,
+    weight_profiles: Optional[Dict[str, Dict[str, float]]] = None,
+    candidate_rows: Optional[CandidateRows] = None
+) -> Tuple[Any, Optional[Dict]]:
+    """
+    Chạy matcher, optionally dưới cProfile.
+
+    Không profile: chạy trong threadpool qua single-flight, các lời gọi đồng
+    thời cùng request + candidates dùng chung một lần tính (results chỉ được đọc).
+    Profile: chạy riêng trong threadpool, mỗi lúc chỉ một request (429 nếu
+    profiler đang bận).
+
+    Args:
+        candidates_key: Định danh tập caregivers (ví dụ version của store)
+        static_scores: Scores tính sẵn cùng thứ tự caregivers (xem CaregiverStore.candidates)
+        weight_profiles: Xếp hạng thêm theo các profiles này trong cùng lần match
+            (matcher.match_profiles, cần VectorizedMatcher)
+        candidate_rows: Candidates từ indexes của store (xem CaregiverStore.candidates_for),
+            xác định bởi care request + candidates_key
+
+    Returns:
+        (results - hoặc (results, {profile: results}) nếu có weight_profiles -,
+        profile report hoặc None)
+    """
+    if weight_profiles:
+        match_fn = functools.partial(matcher.match_profiles, weight_profiles=weight_profiles)
+    else:
+        match_fn = matcher.match
+
+    if not profile:
+        key = (flight_key(care_request, top_n, candidates_key), tuple(weight_profiles or ()))
+        # Chụp danh sách trên event loop: admin upsert/delete không chen vào lúc matcher chạy trong thread
+        return await match_flight.run(
+            key, match_fn, care_request, list(caregivers), top_n=top_n, static_scores=static_scores,
+            candidate_rows=candidate_rows
+        ), None
+    
+    stats = MatchStats()
+    try:
+        # Profile cũng chạy trong threadpool (cProfile chỉ đo thread gọi enable(),
+        # tức thread chạy matcher) để không chặn event loop
+        results, report = await run_in_threadpool(
+            profile_call, match_fn, care_request, list(caregivers), top_n=top_n, stats=stats,
+            static_scores=static_scores, candidate_rows=candidate_rows
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    report['match_stats'] = stats.to_dict()
+    return results, report
+
+
+PROFILE_QUERY = Query(False, description="Profile matcher (cần header X-Admin-Token)")
 
 
 @router.get("/requests")
@@ -49,12 +163,16 @@ async def get_caregivers():
     caregivers = load_caregivers()
     return {
         "total": len(caregivers),
-        "caregivers": caregivers
+        "caregivers": list(caregivers)
     }
 
 
 @router.post("/match", response_model=MatchResponse)
-async def match_caregivers(request: MatchRequest):
+async def match_caregivers(
+    request: MatchRequest,
+    profile: bool = PROFILE_QUERY,
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     Match caregivers cho một care request.
     
@@ -81,11 +199,23 @@ async def match_caregivers(request: MatchRequest):
         - Match score (0-1)
         - Score breakdown (chi tiết từng feature)
         - Khoảng cách (km)
+    - `profile` (chỉ khi `?profile=true` + admin token): hot functions và per-stage timings
     """
+    if profile:
+        check_admin_token(x_admin_token)
     
     try:
         # Tìm care request
         requests = load_requests()
+        load_caregivers()  # reload nếu file thay đổi, trước khi tính cache key
+        
+        # Cache hit: cùng request, cùng dữ liệu, cùng weights, cùng top_n
+        cache_key = ('request', request.request_id, request_store.version, data_version(), request.top_n)
+        if not profile:
+            cached = match_cache.get(cache_key)
+            if cached is not None:
+                return FastJSONResponse(cached)
+        
         care_request = next(
             (r for r in requests if r['id'] == request.request_id),
             None
@@ -98,8 +228,12 @@ async def match_caregivers(request: MatchRequest):
             )
         
         # Run matching algorithm
-        caregivers = load_caregivers()
-        results = matcher.match(care_request, caregivers, top_n=request.top_n)
+        caregivers, static_scores, candidate_rows = caregiver_store.candidates_for(care_request)
+        results, profile_report = await run_matcher(
+            care_request, caregivers, request.top_n, profile,
+            candidates_key=('store', data_version()), static_scores=static_scores,
+            candidate_rows=candidate_rows
+        )
         
         # Format response
         recommendations = []
@@ -149,8 +283,10 @@ async def match_caregivers(request: MatchRequest):
             initials = ''.join([word[0].upper() for word in name.split()[:2]])
             avatar_url = f"https://ui-avatars.com/api/?name={initials}&background=4ECDC4&color=fff&size=120"
             
+            # Dữ liệu nội bộ đã kiểm soát -> build dict theo schema, không qua validation
             recommendations.append(
-                CaregiverRecommendation(
+                schema_dict(
+                    CaregiverRecommendation,
                     rank=i,
                     caregiver_id=cg['id'],
                     name=name,
@@ -167,19 +303,26 @@ async def match_caregivers(request: MatchRequest):
                     isVerified=is_verified,
                     match_score=result['total_score'],
                     match_percentage=f"{int(result['total_score'] * 100)}%",
-                    score_breakdown=ScoreBreakdown(**breakdown)
+                    score_breakdown=schema_dict(ScoreBreakdown, **breakdown)
                 )
             )
     
-        return MatchResponse(
+        response = schema_dict(
+            MatchResponse,
             request_id=request.request_id,
             care_level=care_request['care_level'],
             seeker_name=care_request['seeker_name'],
             location=care_request['location'],
             total_matches=len(recommendations),
-            recommendations=recommendations
+            recommendations=recommendations,
+            profile=profile_report
         )
+        if not profile:
+            match_cache.put(cache_key, response)
+        return FastJSONResponse(response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR in match_caregivers: {e}")
         import traceback
@@ -190,8 +333,11 @@ async def match_caregivers(request: MatchRequest):
         )
 
 
-@router.post("/match-from-spring", response_model=SimpleMatchResponse)
-async def match_from_spring_boot(payload: MatchPayload):
+async def match_from_spring_boot(
+    payload: MatchPayload,
+    profile: bool = PROFILE_QUERY,
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     Endpoint cho Spring Boot gọi - nhận care_request + candidates
     
@@ -215,25 +361,90 @@ async def match_from_spring_boot(payload: MatchPayload):
         "top_n": 10
     }
     ```
+
+    Thay vì full documents, có thể gửi `candidate_ids` (string hoặc
+    `{"id": ..., "updated_at": ...}`) để resolve từ caregiver store của AI
+    service. IDs không có trong store hoặc có `updated_at` khác được trả về
+    trong `unresolved_ids` (không được xếp hạng); gửi full document cho các
+    caregivers đó trong `candidates` (document trong `candidates` được ưu tiên
+    hơn ID trùng).
+
+    `weight_profiles` (ví dụ `["price_first", "nearest_first"]`, xem
+    app/core/weight_profiles.py): xếp hạng thêm theo từng profile trong cùng lần
+    match, kết quả nằm trong `profile_rankings` (dùng cho A/B tests / ưu tiên
+    của seeker).
     
     **Response:** List caregivers với scores, KHÔNG cần format lại (Spring Boot tự format)
     """
+    if profile:
+        check_admin_token(x_admin_token)
     
     care_request = payload.care_request
     candidates = payload.candidates
     top_n = payload.top_n
+    unresolved_ids: List[str] = []
+
+    weight_profiles = None
+    if payload.weight_profiles:
+        if not hasattr(matcher, 'match_profiles'):
+            raise HTTPException(status_code=400, detail="weight_profiles cần MATCHER_ENGINE=vectorized")
+        try:
+            weight_profiles = get_profiles(payload.weight_profiles)
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=e.args[0])
+
+    # Resolve candidate IDs từ store (bỏ qua IDs đã có full document)
+    if payload.candidate_ids:
+        inline_ids = {cg.get('id') for cg in candidates}
+        refs = [
+            (ref, None) if isinstance(ref, str) else (ref.id, ref.updated_at)
+            for ref in payload.candidate_ids
+        ]
+        resolved, unresolved_ids, resolved_scores = caregiver_store.resolve(
+            ref for ref in refs if ref[0] not in inline_ids
+        )
+        static_scores = resolved_scores + [None] * len(candidates)
+        candidates = resolved + candidates
+    else:
+        static_scores = None
     
     # Validate
     if not candidates:
-        return SimpleMatchResponse(
+        return FastJSONResponse(schema_dict(
+            SimpleMatchResponse,
             total_matches=0,
-            recommendations=[]
-        )
+            recommendations=[],
+            unresolved_ids=unresolved_ids
+        ))
     
-    # Run matching
-    results = matcher.match(care_request, candidates, top_n=top_n)
+    # Run matching (candidates xác định bởi IDs đã resolve theo store version + documents gửi kèm)
+    candidates_key = (
+        'spring',
+        data_version(),
+        tuple(ref if isinstance(ref, str) else (ref.id, ref.updated_at) for ref in payload.candidate_ids),
+        content_hash(payload.candidates) if payload.candidates else None,
+    )
+    results, profile_report = await run_matcher(
+        care_request, candidates, top_n, profile, candidates_key,
+        static_scores=static_scores, weight_profiles=weight_profiles
+    )
+    rankings = {}
+    if weight_profiles:
+        results, rankings = results
     
-    # Format response đơn giản (Spring Boot sẽ tự enrich data)
+    recommendations = spring_recommendations(results)
+    return FastJSONResponse(schema_dict(
+        SimpleMatchResponse,
+        total_matches=len(recommendations),
+        recommendations=recommendations,
+        profile_rankings={name: spring_recommendations(ranking) for name, ranking in rankings.items()},
+        unresolved_ids=unresolved_ids,
+        profile=profile_report
+    ))
+
+
+def spring_recommendations(results: List[Dict]) -> List[Dict]:
+    """Format response đơn giản (Spring Boot sẽ tự enrich data)"""
     recommendations = []
     for i, result in enumerate(results, 1):
         cg = result['caregiver']
@@ -245,15 +456,25 @@ async def match_from_spring_boot(payload: MatchPayload):
             'distance_km': result['distance_km'],
             'score_breakdown': result['breakdown']
         })
-    
-    return SimpleMatchResponse(
-        total_matches=len(recommendations),
-        recommendations=recommendations
-    )
+    return recommendations
+
+
+# Body nén (gzip/zstd) và MessagePack cho request/response, xem app/api/negotiation.py
+router.add_api_route(
+    "/match-from-spring",
+    match_from_spring_boot,
+    methods=["POST"],
+    response_model=SimpleMatchResponse,
+    route_class_override=NegotiatedRoute
+)
 
 
 @router.post("/match-mobile", response_model=MatchResponse)
-async def match_caregivers_mobile(request: MobileMatchRequest):
+async def match_caregivers_mobile(
+    request: MobileMatchRequest,
+    profile: bool = PROFILE_QUERY,
+    x_admin_token: Optional[str] = Header(None)
+):
     """
     Match caregivers cho Mobile App - nhận trực tiếp request body từ UI
     
@@ -292,6 +513,8 @@ async def match_caregivers_mobile(request: MobileMatchRequest):
     
     **Response:** List caregivers với scores và thông tin chi tiết
     """
+    if profile:
+        check_admin_token(x_admin_token)
     
     try:
         # Convert mobile request to care_request format
@@ -315,8 +538,12 @@ async def match_caregivers_mobile(request: MobileMatchRequest):
         }
         
         # Run matching algorithm
-        caregivers = load_caregivers()
-        results = matcher.match(care_request, caregivers, top_n=request.top_n)
+        caregivers, static_scores, candidate_rows = caregiver_store.candidates_for(care_request)
+        results, profile_report = await run_matcher(
+            care_request, caregivers, request.top_n, profile,
+            candidates_key=('store', data_version()), static_scores=static_scores,
+            candidate_rows=candidate_rows
+        )
         
         # Format response
         recommendations = []
@@ -379,8 +606,10 @@ async def match_caregivers_mobile(request: MobileMatchRequest):
             initials = ''.join([word[0].upper() for word in name.split()[:2]])
             avatar_url = f"https://ui-avatars.com/api/?name={initials}&background=4ECDC4&color=fff&size=120"
             
+            # Dữ liệu nội bộ đã kiểm soát -> build dict theo schema, không qua validation
             recommendations.append(
-                CaregiverRecommendation(
+                schema_dict(
+                    CaregiverRecommendation,
                     rank=i,
                     caregiver_id=cg.get('id', ''),
                     name=name,
@@ -397,19 +626,24 @@ async def match_caregivers_mobile(request: MobileMatchRequest):
                     isVerified=is_verified,
                     match_score=result['total_score'],
                     match_percentage=f"{int(result['total_score'] * 100)}%",
-                    score_breakdown=ScoreBreakdown(**result['breakdown'])
+                    score_breakdown=schema_dict(ScoreBreakdown, **result['breakdown'])
                 )
             )
         
-        return MatchResponse(
+        response = schema_dict(
+            MatchResponse,
             request_id=care_request['id'],
             care_level=care_request['care_level'],
             seeker_name=care_request['seeker_name'],
             location=care_request['location'],
             total_matches=len(recommendations),
-            recommendations=recommendations
+            recommendations=recommendations,
+            profile=profile_report
         )
+        return FastJSONResponse(response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR in match_caregivers_mobile: {e}")
         import traceback
@@ -0,0 +1,213 @@
+"""
+Content negotiation cho Spring Boot integration (/api/match-from-spring)
+
+Request:
+- Content-Encoding: gzip | zstd -> giải nén body trước khi parse
+- Content-Type: application/msgpack (hoặc application/x-msgpack) -> body là
+  MessagePack thay cho JSON
+
+Response (chỉ áp dụng cho FastJSONResponse trả về từ endpoint):
+- Accept: application/msgpack -> body MessagePack
+- Accept-Encoding: zstd | gzip -> nén body (ưu tiên zstd) nếu body đủ lớn
+
+msgpack và zstandard là optional dependencies: không cài thì request dùng
+chúng nhận 415, còn response fallback về JSON / gzip.
+
+Dùng qua route_class_override=NegotiatedRoute khi đăng ký route.
+"""
+
+import gzip
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.api.responses import FastJSONResponse
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+MSGPACK_TYPES = ('application/msgpack', 'application/x-msgpack')
+# Giới hạn kích thước body sau giải nén (chống zip bomb)
+MAX_DECOMPRESSED_BYTES = 64 * 1024 * 1024
+# Body nhỏ hơn ngưỡng này không nén (overhead > lợi ích)
+MIN_COMPRESS_BYTES = 1024
+# Mạng nội bộ: ưu tiên tốc độ nén hơn tỉ lệ nén
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+
+def _media_type(value: Optional[str]) -> str:
+    return (value or '').split(';', 1)[0].strip().lower()
+
+
+def parse_accept(value: Optional[str]) -> Dict[str, float]:
+    """Header Accept / Accept-Encoding -> {token: q}"""
+    result = {}
+    for item in (value or '').split(','):
+        parts = item.strip().split(';')
+        token = parts[0].strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, number = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        result[token] = q
+    return result
+
+
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    """
+    Giải nén body theo Content-Encoding
+
+    Raises:
+        HTTPException: 415 nếu encoding không hỗ trợ, 400 nếu body hỏng,
+            413 nếu vượt MAX_DECOMPRESSED_BYTES
+    """
+    encoding = (encoding or 'identity').strip().lower()
+    if encoding == 'identity':
+        return body
+
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            decoder = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+            result = decoder.decompress(body, MAX_DECOMPRESSED_BYTES)
+            truncated = bool(decoder.unconsumed_tail)
+        elif encoding == 'zstd':
+            if not ZSTD_AVAILABLE:
+                raise HTTPException(status_code=415, detail="zstd không được hỗ trợ (cần cài zstandard)")
+            chunks = []
+            size = 0
+            with zstandard.ZstdDecompressor().stream_reader(body) as reader:
+                while size <= MAX_DECOMPRESSED_BYTES:
+                    chunk = reader.read(1 << 20)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    size += len(chunk)
+            result = b''.join(chunks)
+            truncated = size > MAX_DECOMPRESSED_BYTES
+        else:
+            raise HTTPException(status_code=415, detail=f"Content-Encoding không hỗ trợ: {encoding}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Body nén không hợp lệ ({encoding}): {e}") from e
+
+    if truncated:
+        raise HTTPException(status_code=413, detail="Body sau giải nén quá lớn")
+    return result
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Encoding cho response theo Accept-Encoding (zstd > gzip), None = không nén"""
+    accepted = parse_accept(accept_encoding)
+    candidates: List[str] = (['zstd'] if ZSTD_AVAILABLE else []) + ['gzip']
+    best = None
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    accepted = parse_accept(accept)
+    msgpack_q = max(accepted.get(media_type, 0.0) for media_type in MSGPACK_TYPES)
+    return MSGPACK_AVAILABLE and msgpack_q > 0 and msgpack_q >= accepted.get('application/json', 0.0)
+
+
+class NegotiatedRequest(Request):
+    """
+    Request giải nén body và decode MessagePack
+
+    FastAPI chỉ gọi request.json() khi Content-Type là JSON, nên với body
+    MessagePack header Content-Type được đổi thành application/json và
+    json() decode MessagePack.
+    """
+
+    def __init__(self, scope, receive):
+        headers = [(k, v) for k, v in scope.get('headers', [])]
+        content_type = next((v for k, v in headers if k == b'content-type'), b'').decode('latin-1')
+        self.body_format = 'msgpack' if _media_type(content_type) in MSGPACK_TYPES else 'json'
+        if self.body_format == 'msgpack':
+            scope = dict(scope)
+            scope['headers'] = [(k, v) for k, v in headers if k != b'content-type'] + [
+                (b'content-type', b'application/json')
+            ]
+        super().__init__(scope, receive)
+
+    async def body(self) -> bytes:
+        if not hasattr(self, '_decoded_body'):
+            self._decoded_body = decompress(await super().body(), self.headers.get('content-encoding'))
+        return self._decoded_body
+
+    async def json(self) -> Any:
+        if not hasattr(self, '_json'):
+            body = await self.body()
+            if self.body_format == 'msgpack':
+                if not MSGPACK_AVAILABLE:
+                    raise HTTPException(status_code=415, detail="MessagePack không được hỗ trợ (cần cài msgpack)")
+                self._json = msgpack.unpackb(body, raw=False)
+            else:
+                self._json = await super().json()
+        return self._json
+
+
+def negotiate_response(request: Request, response: Response) -> Response:
+    """Encode lại response (MessagePack / nén) theo Accept và Accept-Encoding của request"""
+    if not isinstance(response, FastJSONResponse):
+        return response
+
+    body = response.body
+    media_type = response.media_type
+    if wants_msgpack(request.headers.get('accept')):
+        body = msgpack.packb(response.content)
+        media_type = MSGPACK_TYPES[0]
+
+    headers = {'vary': 'Accept, Accept-Encoding'}
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers['content-encoding'] = encoding
+
+    for name, value in response.headers.items():
+        if name not in ('content-length', 'content-type'):
+            headers.setdefault(name, value)
+    return Response(content=body, status_code=response.status_code, headers=headers, media_type=media_type)
+
+
+class NegotiatedRoute(APIRoute):
+    """APIRoute hỗ trợ body nén / MessagePack cho cả request lẫn response"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            request = NegotiatedRequest(request.scope, request.receive)
+            return negotiate_response(request, await handler(request))
+
+        return negotiated_handler
@@ -0,0 +1,87 @@
+"""
+Fast JSON serialization cho match responses
+
+Khi endpoint trả về Pydantic model với response_model, FastAPI validate lại
+toàn bộ model rồi mới encode qua jsonable_encoder + json.dumps. Match responses
+được build từ dữ liệu nội bộ đã kiểm soát, nên:
+- schema_dict build plain dict theo fields của schema (ép kiểu scalar
+  int/float/str, điền default, bỏ keys thừa như validation sẽ làm) mà không
+  tạo model instance. model_construct không nhanh hơn validation trên
+  pydantic v2 (validation chạy trong Rust), plain dict nhanh hơn ~5x.
+- FastJSONResponse serialize thẳng ra bytes (orjson nếu có cài, ngược lại
+  pydantic-core serializer), FastAPI không serialize lại. response_model
+  trên route vẫn giữ để OpenAPI docs không đổi.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+_SCALAR_CASTS = {int: int, float: float, str: str}
+
+
+@lru_cache(maxsize=None)
+def _field_plan(model_cls: Type[BaseModel]) -> Tuple:
+    """(name, cast, field) cho từng field của schema"""
+    return tuple(
+        (name, _SCALAR_CASTS.get(field.annotation), field)
+        for name, field in model_cls.model_fields.items()
+    )
+
+
+def schema_dict(model_cls: Type[BaseModel], **values: Any) -> Dict[str, Any]:
+    """
+    Build dict có cùng JSON output với model_cls(**values), không qua validation
+
+    Args:
+        model_cls: Response schema (chỉ dùng danh sách fields + kiểu scalar)
+        values: Giá trị các fields (nested schemas truyền vào dạng dict)
+
+    Raises:
+        ValueError: Nếu thiếu field bắt buộc
+    """
+    result = {}
+    for name, cast, field in _field_plan(model_cls):
+        if name in values:
+            value = values[name]
+            if cast is not None and value is not None and type(value) is not cast:
+                value = cast(value)
+        elif field.is_required():
+            raise ValueError(f"{model_cls.__name__}.{name} is required")
+        else:
+            value = field.get_default(call_default_factory=True)
+        result[name] = value
+    return result
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize dict/model ra JSON bytes (UTF-8, không escape non-ASCII)"""
+    if ORJSON_AVAILABLE:
+        if isinstance(content, BaseModel):
+            content = content.model_dump()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse dùng dumps() thay cho json.dumps
+
+    Trả về instance của class này từ endpoint (kể cả khi có response_model)
+    để FastAPI bỏ qua bước validate + jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        # Giữ content để có thể encode lại (ví dụ MessagePack, xem app/api/negotiation.py)
+        self.content = content
+        return dumps(content)
@@ -0,0 +1,151 @@
+"""
+Candidate generation từ indexes của caregiver store.
+
+Trước khi matcher làm việc trên từng caregiver, các indexes (bitmaps theo row
+của CaregiverTable, xem app/core/indexes.py) loại sẵn các caregivers chắc chắn
+không pass một số hard filters. store.candidates() trả về caregivers theo thứ
+tự row nên bitmap theo row cũng là bitmap theo vị trí trong list truyền vào
+matcher.
+
+Bitmaps là superset: matcher vẫn chạy đủ hard filters trên các candidates còn
+lại nên kết quả giống hệt khi không dùng index.
+
+Query planner: access path tốt nhất khác nhau theo request (time slot hẹp,
+khu vực đông caregivers, care level hiếm...). generate_candidates() ước lượng
+số rows của từng predicate từ thống kê của index (popcounts, binary search,
+đếm theo cells - không tạo bitmap), lấy predicate chọn lọc nhất làm driver,
+rồi chỉ AND thêm các predicates còn lại khi số candidates bớt được đáng hơn
+chi phí tra index (cost model bên dưới). Predicates không AND được matcher
+kiểm tra trên tập candidates nhỏ. Plan đã chọn nằm trong CandidateRows.plan
+(match_stats.plan của profile output).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.indexes import bitmap_rows
+
+
+class CandidateRows:
+    """
+    Caregivers còn lại sau candidate generation (theo vị trí trong list caregivers).
+
+    rows giới hạn cả hai vòng (filters chạy ở cả primary lẫn fallback: time,
+    gender, health status, các khoảng tuổi / kinh nghiệm / rating);
+    primary_rows giới hạn thêm vòng primary (care level, degree, service area:
+    fallback bỏ qua các filters này). Caregivers ngoài bitmap không được score
+    ở vòng tương ứng, nhưng vẫn giữ chỗ trong thứ tự distance của fallback
+    (batches 10 người không đổi).
+
+    Attributes:
+        rows: Bitmap (int, bit i = caregiver thứ i), None = không giới hạn
+        primary_rows: Bitmap chỉ cho vòng primary, None = không giới hạn thêm
+        filters: Tên các hard filters đã áp dụng qua indexes
+        plan: Plan của query planner (xem generate_candidates), None nếu
+            CandidateRows không do planner tạo
+    """
+
+    __slots__ = ('rows', 'primary_rows', 'filters', 'plan')
+
+    def __init__(self, rows: Optional[int] = None, primary_rows: Optional[int] = None,
+                 filters: Tuple[str, ...] = (), plan: Optional[Dict] = None):
+        self.rows = rows
+        self.primary_rows = primary_rows
+        self.filters = tuple(filters)
+        self.plan = plan
+
+    def positions(self, n: int, primary: bool = False) -> np.ndarray:
+        """Vị trí các candidates (< n, tăng dần) của vòng fallback, hoặc primary"""
+        bits = self.rows
+        if primary and self.primary_rows is not None:
+            bits = self.primary_rows if bits is None else bits & self.primary_rows
+        if bits is None:
+            return np.arange(n)
+        return bitmap_rows(bits, n)
+
+
+# Filter -> (index, method tạo bitmap, method ước lượng số rows, field của care
+# request, chỉ giới hạn vòng primary)
+INDEXED_FILTERS = (
+    ('time', 'availability', 'rows_available', 'estimate_available', 'time_slots', False),
+    ('gender', 'categorical', 'rows_gender', 'estimate_gender', 'gender_preference', False),
+    ('health_status', 'categorical', 'rows_health_status', 'estimate_health_status', 'health_status', False),
+    ('caregiver_age', 'range', 'rows_caregiver_age', 'estimate_caregiver_age', 'caregiver_age_range', False),
+    ('elderly_age', 'range', 'rows_elderly_age', 'estimate_elderly_age', 'elderly_age', False),
+    ('experience', 'range', 'rows_experience', 'estimate_experience', 'required_years_experience', False),
+    ('rating', 'range', 'rows_rating', 'estimate_rating', 'overall_rating_range', False),
+    ('care_level', 'categorical', 'rows_care_level', 'estimate_care_level', 'care_level', True),
+    ('degree', 'categorical', 'rows_degree', 'estimate_degree', 'care_level', True),
+    ('distance', 'spatial', 'rows_service_area', 'estimate_service_area', 'location', True),
+)
+
+# Cost model (đơn vị: matcher kiểm tra hard filters cho một candidate, ~10 µs).
+# Tra index + AND bitmap tốn cỡ 1-2 ns mỗi row của fleet cộng vài chục µs cố
+# định; spatial index còn tốn ~100 ns mỗi row trả về (sets theo cell). Một
+# predicate chỉ được AND khi số candidates bớt được (ước lượng, coi các
+# predicates độc lập) lớn hơn chi phí tra index của nó.
+INDEX_FIXED_COST = 2.0
+INDEX_ROW_COST = 0.0002
+INDEX_OUTPUT_COST = {'spatial': 0.01}
+
+
+def _plan_step(name: str, index_name: str, estimate: int) -> Dict:
+    return {'filter': name, 'index': index_name, 'estimate': estimate, 'access': 'verify', 'rows': None}
+
+
+def generate_candidates(index: Callable[[str], Any], care_request: Dict, n: int) -> Optional[CandidateRows]:
+    """
+    CandidateRows cho care request theo plan rẻ nhất của các indexes
+
+    Plan: các predicates áp dụng được xếp theo số rows ước lượng (tăng dần);
+    predicate đầu tiên đáng tra index là driver, các predicates sau chỉ được AND
+    nếu cost model có lợi với số candidates hiện tại (đếm chính xác sau mỗi
+    bước). Predicates chỉ-primary được xét sau, trên candidates của cả hai vòng.
+
+    Args:
+        index: Tên -> index đã build (ví dụ CaregiverStore.index)
+        n: Số caregivers (rows của table)
+
+    Returns:
+        None nếu không index nào áp dụng được cho request (matcher xét tất cả).
+        CandidateRows.plan: {'rows': n, 'candidates', 'primary_candidates',
+        'steps': [{'filter', 'index', 'estimate', 'access' (driver /
+        intersect / verify), 'rows' (số candidates sau bước này)}]}
+    """
+    predicates = []
+    for name, index_name, rows_method, estimate_method, field, primary_only in INDEXED_FILTERS:
+        source = index(index_name)
+        value = care_request.get(field)
+        estimate = getattr(source, estimate_method)(value)
+        if estimate is not None:
+            predicates.append((primary_only, min(estimate, n), name, index_name, getattr(source, rows_method), value))
+    if not predicates:
+        return None
+    predicates.sort(key=lambda p: (p[0], p[1]))
+
+    candidates = CandidateRows()
+    steps: List[Dict] = []
+    count = primary_count = n
+    for primary_only, estimate, name, index_name, rows_fn, value in predicates:
+        step = _plan_step(name, index_name, estimate)
+        steps.append(step)
+        current = primary_count if primary_only else count
+        saved = current - current * estimate / n if n else 0
+        cost = INDEX_FIXED_COST + INDEX_ROW_COST * n + INDEX_OUTPUT_COST.get(index_name, 0.0) * estimate
+        if saved <= cost:
+            continue
+
+        bits = rows_fn(value)
+        step['access'] = 'intersect' if candidates.filters else 'driver'
+        candidates.filters += (name,)
+        if primary_only:
+            base = candidates.primary_rows if candidates.primary_rows is not None else candidates.rows
+            candidates.primary_rows = bits if base is None else base & bits
+            primary_count = step['rows'] = candidates.primary_rows.bit_count()
+        else:
+            candidates.rows = bits if candidates.rows is None else candidates.rows & bits
+            count = primary_count = step['rows'] = candidates.rows.bit_count()
+
+    candidates.plan = {'rows': n, 'candidates': count, 'primary_candidates': primary_count, 'steps': steps}
+    return candidates
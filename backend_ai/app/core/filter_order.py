@@ -0,0 +1,131 @@
+"""
+Adaptive ordering cho hard filters.
+
+Các hard filters là AND của các predicate độc lập, nên thứ tự chạy không đổi
+kết quả nhưng đổi chi phí. Với cost c_i (thời gian mỗi lần chạy) và rejection
+rate p_i, expected cost mỗi candidate nhỏ nhất khi sắp xếp theo c_i / p_i tăng
+dần (rẻ và loại nhiều chạy trước).
+
+FilterOrderOptimizer học c_i, p_i từ MatchStats của các lần match trước
+(exponential decay để theo kịp thay đổi của traffic).
+"""
+
+import threading
+from typing import Dict, Iterable, Sequence, Tuple
+
+from app.core.metrics import registry
+
+FILTER_POSITION = registry.gauge(
+    'matcher_filter_order_position',
+    'Current evaluation position of each hard filter (0 = first)',
+    ['filter'],
+)
+FILTER_COST = registry.gauge(
+    'matcher_filter_estimated_cost_seconds',
+    'Estimated cost per evaluation of each hard filter',
+    ['filter'],
+)
+FILTER_REJECT_RATE = registry.gauge(
+    'matcher_filter_estimated_reject_rate',
+    'Estimated rejection rate of each hard filter (given it is evaluated)',
+    ['filter'],
+)
+
+
+class FilterOrderOptimizer:
+    """
+    Theo dõi cost/rejection rate của từng filter và tính thứ tự chạy tối ưu.
+
+    Args:
+        filter_names: Thứ tự mặc định (dùng khi chưa đủ số liệu)
+        pinned_last: Filters luôn chạy cuối (ví dụ semantic skills - gọi PhoBERT)
+        decay: Hệ số decay cho số liệu cũ sau mỗi lần update
+        min_evaluations: Số lần evaluate tối thiểu của một filter trước khi dùng số liệu của nó
+    """
+
+    def __init__(
+        self,
+        filter_names: Sequence[str],
+        pinned_last: Iterable[str] = (),
+        decay: float = 0.95,
+        min_evaluations: int = 50
+    ):
+        self.default_order = tuple(filter_names)
+        self.pinned_last = tuple(name for name in self.default_order if name in set(pinned_last))
+        self.decay = decay
+        self.min_evaluations = min_evaluations
+
+        self._evaluations: Dict[str, float] = {name: 0.0 for name in self.default_order}
+        self._rejections: Dict[str, float] = {name: 0.0 for name in self.default_order}
+        self._seconds: Dict[str, float] = {name: 0.0 for name in self.default_order}
+        self._lock = threading.Lock()
+        self.order: Tuple[str, ...] = self.default_order
+        self._publish()
+
+    def estimates(self) -> Dict[str, Dict[str, float]]:
+        """Cost (seconds/evaluation) và rejection rate ước lượng của từng filter"""
+        result = {}
+        for name in self.default_order:
+            evaluations = self._evaluations[name]
+            result[name] = {
+                'evaluations': evaluations,
+                'cost_seconds': self._seconds[name] / evaluations if evaluations else 0.0,
+                # Laplace smoothing để filter chưa từng reject không có rate = 0
+                'reject_rate': (self._rejections[name] + 1.0) / (evaluations + 2.0),
+            }
+        return result
+
+    def update(self, passed: Dict[str, int], rejected: Dict[str, int], seconds: Dict[str, float]):
+        """Cập nhật số liệu từ một lần match (MatchStats) và tính lại thứ tự"""
+        if not passed and not rejected:
+            return
+
+        with self._lock:
+            for name in self.default_order:
+                self._evaluations[name] *= self.decay
+                self._rejections[name] *= self.decay
+                self._seconds[name] *= self.decay
+            for name in self.default_order:
+                reject_count = rejected.get(name, 0)
+                self._evaluations[name] += passed.get(name, 0) + reject_count
+                self._rejections[name] += reject_count
+                self._seconds[name] += seconds.get(name, 0.0)
+            self.order = self._compute_order()
+        self._publish()
+
+    def _compute_order(self) -> Tuple[str, ...]:
+        estimates = self.estimates()
+        default_position = {name: i for i, name in enumerate(self.default_order)}
+
+        def rank(name):
+            estimate = estimates[name]
+            if estimate['evaluations'] < self.min_evaluations:
+                # Chưa đủ số liệu: giữ nguyên vị trí mặc định tương đối
+                return (1, default_position[name])
+            return (0, estimate['cost_seconds'] / estimate['reject_rate'])
+
+        movable = [name for name in self.default_order if name not in self.pinned_last]
+        movable.sort(key=rank)
+        return tuple(movable) + self.pinned_last
+
+    def ordered(self, filter_names: Sequence[str]) -> Tuple[str, ...]:
+        """Sắp xếp một tập filters (ví dụ tập filters của fallback round) theo thứ tự hiện tại"""
+        wanted = set(filter_names)
+        return tuple(name for name in self.order if name in wanted)
+
+    def reset(self):
+        """Xóa số liệu, quay về thứ tự mặc định"""
+        with self._lock:
+            for name in self.default_order:
+                self._evaluations[name] = 0.0
+                self._rejections[name] = 0.0
+                self._seconds[name] = 0.0
+            self.order = self.default_order
+        self._publish()
+
+    def _publish(self):
+        estimates = self.estimates()
+        for position, name in enumerate(self.order):
+            FILTER_POSITION.set(position, filter=name)
+            FILTER_COST.set(estimates[name]['cost_seconds'], filter=name)
+            FILTER_REJECT_RATE.set(estimates[name]['reject_rate'], filter=name)
@@ -0,0 +1,1031 @@
+"""
+Secondary indexes trên caregiver store.
+
+Index đọc giá trị đã compile trong CaregiverTable (không parse lại dicts).
+Mỗi index được build một lần (lazy, lần đầu được dùng) rồi cập nhật incremental
+qua add(table, row) / remove(table, row) khi store upsert/delete một caregiver,
+nên thay đổi một profile chỉ tốn O(1) thay vì rebuild toàn bộ.
+
+remove() được gọi trước khi row trong table bị sửa, add() sau khi đã ghi.
+"""
+
+import heapq
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.algorithms.semantic_matcher import normalize_vietnamese_text, semantic_matcher, skill_similarity
+from app.core.table import MISSING, NON_NUMERIC_FIELDS, CaregiverTable
+from app.utils import time_to_minutes
+
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+BUCKET_MINUTES = 30
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+EARTH_RADIUS_KM = 6371.0  # như haversine_km
+
+
+class CaregiverIndex:
+    """Interface cho các index được store maintain"""
+
+    name = 'index'
+
+    def build(self, table: CaregiverTable):
+        """Build lại toàn bộ index từ table"""
+        self.clear()
+        for row in range(table.n):
+            self.add(table, row)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def add(self, table: CaregiverTable, row: int):
+        raise NotImplementedError
+
+    def remove(self, table: CaregiverTable, row: int):
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        return {}
+
+
+class SpatialGridIndex(CaregiverIndex):
+    """
+    Uniform grid theo lat/lon: cell -> set of rows.
+
+    query_radius trả về superset các caregivers trong bán kính (theo bounding box
+    của các cells), caller cần check lại bằng haversine.
+
+    rows_service_area() là bitmap cho candidate generation (distance của vòng
+    primary): bounding box tính chặt trên mặt cầu với max service radius, nên
+    không bỏ sót caregiver nào có request nằm trong service radius. Rows không
+    có toạ độ hợp lệ (thiếu, ngoài [-90, 90] / [-180, 180]) luôn là candidates.
+    """
+
+    name = 'spatial'
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self.clear()
+
+    def clear(self):
+        self._table: Optional[CaregiverTable] = None
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._unlocated: Set[int] = set()
+        self.max_radius_km = 0.0
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    @staticmethod
+    def _located(lat, lon):
+        """Toạ độ hợp lệ (scalar hoặc arrays; NaN = không có)"""
+        return (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+
+    def build(self, table: CaregiverTable):
+        self.clear()
+        self._table = table
+        lat = table.column('lat')
+        lon = table.column('lon')
+        located = self._located(lat, lon)
+        self._unlocated = set(np.flatnonzero(~located).tolist())
+
+        rows = np.flatnonzero(located)
+        cells_i = np.floor(lat[rows] / self.cell_deg).astype(np.int64)
+        cells_j = np.floor(lon[rows] / self.cell_deg).astype(np.int64)
+        for row, i, j in zip(rows.tolist(), cells_i.tolist(), cells_j.tolist()):
+            self._cells.setdefault((i, j), set()).add(row)
+
+        radius = table.column('service_radius_km')[rows]
+        radius = radius[~np.isnan(radius)]
+        self.max_radius_km = float(radius.max()) if len(radius) else 0.0
+
+    def add(self, table: CaregiverTable, row: int):
+        self._table = table
+        lat = table.columns['lat'][row]
+        lon = table.columns['lon'][row]
+        if not self._located(lat, lon):
+            self._unlocated.add(row)
+            return
+        self._cells.setdefault(self._cell(lat, lon), set()).add(row)
+        radius = table.columns['service_radius_km'][row]
+        # Không giảm khi remove: giữ upper bound an toàn cho query_service_area
+        if not math.isnan(radius):
+            self.max_radius_km = max(self.max_radius_km, float(radius))
+
+    def remove(self, table: CaregiverTable, row: int):
+        lat = table.columns['lat'][row]
+        lon = table.columns['lon'][row]
+        if not self._located(lat, lon):
+            self._unlocated.discard(row)
+            return
+        cell = self._cell(lat, lon)
+        rows = self._cells.get(cell)
+        if rows is not None:
+            rows.discard(row)
+            if not rows:
+                del self._cells[cell]
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> Set[int]:
+        """Rows nằm trong các cells giao với hình vuông bán kính radius_km quanh (lat, lon)"""
+        dlat = radius_km / 111.0
+        dlon = radius_km / max(1e-6, 111.0 * math.cos(math.radians(lat)))
+        min_cell = self._cell(lat - dlat, lon - dlon)
+        max_cell = self._cell(lat + dlat, lon + dlon)
+
+        result: Set[int] = set()
+        for i in range(min_cell[0], max_cell[0] + 1):
+            for j in range(min_cell[1], max_cell[1] + 1):
+                rows = self._cells.get((i, j))
+                if rows:
+                    result.update(rows)
+        return result
+
+    def query_service_area(self, lat: float, lon: float) -> Set[int]:
+        """Superset các caregivers có thể phục vụ (lat, lon) với service radius của họ"""
+        return self.query_radius(lat, lon, self.max_radius_km)
+
+    def _service_area_cells(self, location) -> Optional[List[Set[int]]]:
+        """
+        Rows theo cell của các cells có thể chứa caregiver phục vụ được location
+
+        Điểm cách request một góc c (ở tâm Trái Đất) có |dlat| <= c và
+        cos(lat1) cos(lat2) sin^2(dlon / 2) <= sin^2(c / 2) (haversine), nên
+        box dưới đây chứa mọi caregiver trong max service radius.
+
+        Returns:
+            None nếu không giới hạn được (location sai format, box chạm cực hoặc
+            vắt qua kinh tuyến 180)
+        """
+        if not isinstance(location, dict):
+            return None
+        lat, lon = location.get('lat'), location.get('lon')
+        if not (_comparable_number(lat) and _comparable_number(lon)) or abs(lat) > 90 or abs(lon) > 180:
+            return None
+        # Nới một chút cho sai số float của haversine
+        angle = self.max_radius_km * (1 + 1e-6) / EARTH_RADIUS_KM + 1e-9
+        if not angle < math.pi / 2:
+            return None
+        dlat = math.degrees(angle)
+        min_cos = math.cos(math.radians(min(90.0, abs(lat) + dlat)))
+        if not math.sin(angle / 2) < min_cos:
+            return None
+        dlon = 2 * math.degrees(math.asin(math.sin(angle / 2) / min_cos))
+        if lon - dlon < -180 or lon + dlon > 180:
+            return None
+
+        (min_i, min_j), (max_i, max_j) = self._cell(lat - dlat, lon - dlon), self._cell(lat + dlat, lon + dlon)
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._cells):
+            return [rows for (i, j), rows in self._cells.items() if min_i <= i <= max_i and min_j <= j <= max_j]
+        cells = []
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                rows = self._cells.get((i, j))
+                if rows:
+                    cells.append(rows)
+        return cells
+
+    def rows_service_area(self, location) -> Optional[int]:
+        """Bitmap rows có thể có location của request trong service radius, None nếu không giới hạn được"""
+        cells = self._service_area_cells(location)
+        if cells is None:
+            return None
+        rows = [row for cell in cells for row in cell]
+        rows.extend(self._unlocated)
+        return rows_to_bitmap(np.array(rows, dtype=np.int64), self._table.n)
+
+    def estimate_service_area(self, location) -> Optional[int]:
+        """Số rows của rows_service_area() (đếm theo cells, không tạo bitmap)"""
+        cells = self._service_area_cells(location)
+        if cells is None:
+            return None
+        return sum(len(cell) for cell in cells) + len(self._unlocated)
+
+    def stats(self) -> Dict:
+        return {
+            'cells': len(self._cells),
+            'unlocated': len(self._unlocated),
+            'max_radius_km': self.max_radius_km,
+        }
+
+
+class SkillIndex(CaregiverIndex):
+    """
+    Skill vocabulary + bitset skills của từng caregiver.
+
+    Vocabulary là append-only (skill ID không đổi khi caregiver bị xóa),
+    posting lists skill_id -> set of rows dùng cho candidate generation.
+    """
+
+    name = 'skills'
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.skill_names: List[str] = []
+        self.clear()
+
+    def clear(self):
+        self._bitsets: List[int] = []
+        self._postings: Dict[int, Set[int]] = {}
+
+    def skill_id(self, name: str, create: bool = False) -> Optional[int]:
+        """ID của skill name (đã normalize); tạo mới nếu create=True"""
+        normalized = normalize_vietnamese_text(name)
+        skill_id = self.vocabulary.get(normalized)
+        if skill_id is None and create:
+            skill_id = len(self.skill_names)
+            self.vocabulary[normalized] = skill_id
+            self.skill_names.append(normalized)
+        return skill_id
+
+    def add(self, table: CaregiverTable, row: int):
+        bits = 0
+        for name in table.skill_names(row):
+            skill_id = self.skill_id(name, create=True)
+            bits |= 1 << skill_id
+            self._postings.setdefault(skill_id, set()).add(row)
+        while len(self._bitsets) <= row:
+            self._bitsets.append(0)
+        self._bitsets[row] = bits
+
+    def remove(self, table: CaregiverTable, row: int):
+        for skill_id in iter_bits(self._bitsets[row]):
+            self._postings[skill_id].discard(row)
+        self._bitsets[row] = 0
+
+    def bitset(self, row: int) -> int:
+        return self._bitsets[row] if row < len(self._bitsets) else 0
+
+    def rows_with_skill(self, name: str) -> Set[int]:
+        skill_id = self.skill_id(name)
+        return self._postings.get(skill_id, set()) if skill_id is not None else set()
+
+    def stats(self) -> Dict:
+        return {'vocabulary_size': len(self.skill_names)}
+
+
+class AvailabilityIndex(CaregiverIndex):
+    """
+    Availability theo tuần của caregivers.
+
+    - Bitset theo row: mỗi ngày chia thành buckets BUCKET_MINUTES phút; bit
+      (day, bucket) được set khi bucket nằm trọn trong một available slot.
+    - Inverted index cho candidate generation (Filter 4): day -> {(start, end)
+      của slot: bitmap các rows có slot đó}. rows_available() trả về đúng các
+      caregivers có mỗi time slot của request nằm trọn trong một slot của họ
+      (cùng điều kiện với has_time_overlap), trước mọi xử lý per-caregiver.
+
+    Dùng interval của từng slot thay vì AND các buckets cố định: slot của request
+    không thẳng hàng với buckets, và hai slots liền nhau của caregiver không
+    chứa được request nằm vắt qua cả hai.
+    """
+
+    name = 'availability'
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._bitsets: List[int] = []
+        self._slots: Dict[str, Dict[Tuple[int, int], int]] = {}
+        # Rows có slot không parse được giờ: không loại được, luôn là candidate
+        self._unindexed = 0
+
+    @staticmethod
+    def bit_position(day: str, bucket: int) -> int:
+        return DAYS.index(day) * BUCKETS_PER_DAY + bucket
+
+    @classmethod
+    def row_bits(cls, table: CaregiverTable, row: int) -> int:
+        schedule = table.ragged['schedule']
+        bits = 0
+        for day_id, start, end in zip(
+            schedule.row(row, 'day').tolist(),
+            schedule.row(row, 'start').tolist(),
+            schedule.row(row, 'end').tolist(),
+        ):
+            day = table.string(day_id)
+            if day not in DAYS or start < 0 or end < 0:
+                continue
+            first = -(-start // BUCKET_MINUTES)  # ceil: bucket phải nằm trọn trong slot
+            last = end // BUCKET_MINUTES
+            for bucket in range(first, min(last, BUCKETS_PER_DAY)):
+                bits |= 1 << cls.bit_position(day, bucket)
+        return bits
+
+    @staticmethod
+    def _row_slots(table: CaregiverTable, row: int) -> Tuple[List[Tuple[str, int, int]], bool]:
+        """((day, start, end) các slots của row, row có slot không parse được giờ)"""
+        schedule = table.ragged['schedule']
+        slots = []
+        unparsed = False
+        for day_id, start, end in zip(
+            schedule.row(row, 'day').tolist(),
+            schedule.row(row, 'start').tolist(),
+            schedule.row(row, 'end').tolist(),
+        ):
+            if start == MISSING or end == MISSING:
+                unparsed = True
+            elif day_id != MISSING:
+                slots.append((table.string(day_id), start, end))
+        return slots, unparsed
+
+    def build(self, table: CaregiverTable):
+        self.clear()
+        self._bitsets = [self.row_bits(table, row) for row in range(table.n)]
+
+        n = table.n
+        schedule = table.ragged['schedule']
+        offsets, index = schedule.gather_index(n)
+        rows = np.repeat(np.arange(n), np.diff(offsets))
+        days = schedule.values['day'][index]
+        starts = schedule.values['start'][index]
+        ends = schedule.values['end'][index]
+
+        unparsed = (starts == MISSING) | (ends == MISSING)
+        self._unindexed = rows_to_bitmap(rows[unparsed], n)
+
+        keep = ~unparsed & (days != MISSING)
+        keys = np.column_stack([days[keep], starts[keep], ends[keep]])
+        keys, group = np.unique(keys, axis=0, return_inverse=True)
+        group = group.ravel()
+        rows = rows[keep]
+        order = np.argsort(group, kind='stable')
+        bounds = np.searchsorted(group[order], np.arange(len(keys) + 1))
+        for k, (day_id, start, end) in enumerate(keys.tolist()):
+            day_slots = self._slots.setdefault(table.string(day_id), {})
+            day_slots[(start, end)] = rows_to_bitmap(rows[order[bounds[k]:bounds[k + 1]]], n)
+
+    def add(self, table: CaregiverTable, row: int):
+        while len(self._bitsets) <= row:
+            self._bitsets.append(0)
+        self._bitsets[row] = self.row_bits(table, row)
+
+        bit = 1 << row
+        slots, unparsed = self._row_slots(table, row)
+        if unparsed:
+            self._unindexed |= bit
+        for day, start, end in slots:
+            day_slots = self._slots.setdefault(day, {})
+            day_slots[(start, end)] = day_slots.get((start, end), 0) | bit
+
+    def remove(self, table: CaregiverTable, row: int):
+        self._bitsets[row] = 0
+
+        mask = ~(1 << row)
+        slots, unparsed = self._row_slots(table, row)
+        if unparsed:
+            self._unindexed &= mask
+        for day, start, end in slots:
+            day_slots = self._slots.get(day)
+            if day_slots is None or (start, end) not in day_slots:
+                continue
+            bits = day_slots[(start, end)] & mask
+            if bits:
+                day_slots[(start, end)] = bits
+            else:
+                del day_slots[(start, end)]
+                if not day_slots:
+                    del self._slots[day]
+
+    def bitset(self, row: int) -> int:
+        return self._bitsets[row] if row < len(self._bitsets) else 0
+
+    @staticmethod
+    def _requested_slots(time_slots) -> Optional[List[Tuple[str, int, int]]]:
+        """(day, start, end) các time slots của request, None nếu không có hoặc sai format"""
+        if not isinstance(time_slots, list) or not time_slots:
+            return None
+        requested = []
+        for slot in time_slots:
+            if not isinstance(slot, dict) or not isinstance(slot.get('day'), str):
+                return None
+            try:
+                requested.append((slot['day'], time_to_minutes(slot['start']), time_to_minutes(slot['end'])))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                return None
+        return requested
+
+    def _containing(self, day: str, start: int, end: int) -> Iterable[int]:
+        """Bitmaps của các slots (của caregivers) chứa trọn [start, end] trong ngày"""
+        for (slot_start, slot_end), bits in self._slots.get(day, {}).items():
+            if slot_start <= start and slot_end >= end:
+                yield bits
+
+    def rows_available(self, time_slots) -> Optional[int]:
+        """
+        Bitmap các rows có thể pass Filter 4 (has_time_overlap) với time slots của request
+
+        Gồm cả các rows có slot không parse được giờ (Filter 4 tự quyết định /
+        raise như cũ).
+
+        Returns:
+            Bitmap (int) theo row, None nếu không dùng index được (không có time
+            slots, hoặc slot sai format: để Filter 4 xử lý y như không có index)
+        """
+        requested = self._requested_slots(time_slots)
+        if requested is None:
+            return None
+
+        result = -1
+        for day, start, end in requested:
+            available = 0
+            for bits in self._containing(day, start, end):
+                available |= bits
+            result &= available
+            if not result:
+                break
+        return result | self._unindexed
+
+    def estimate_available(self, time_slots) -> Optional[int]:
+        """
+        Upper bound số rows của rows_available() mà không OR các bitmaps
+
+        Mỗi time slot: tổng số rows của các slots chứa nó (một caregiver có thể
+        có nhiều slots như vậy); lấy slot ít nhất.
+        """
+        requested = self._requested_slots(time_slots)
+        if requested is None:
+            return None
+        return min(
+            sum(bits.bit_count() for bits in self._containing(day, start, end))
+            for day, start, end in requested
+        ) + self._unindexed.bit_count()
+
+    def stats(self) -> Dict:
+        return {
+            'buckets_per_day': BUCKETS_PER_DAY,
+            'slot_keys': sum(len(day_slots) for day_slots in self._slots.values()),
+            'unindexed': self._unindexed.bit_count(),
+        }
+
+
+class CategoricalIndex(CaregiverIndex):
+    """
+    Bitmaps theo giá trị cho các hard filters trên thuộc tính ít giá trị.
+
+    - gender (Filter 5): giá trị -> bitmap
+    - preferred_health_status (Filter 7): giá trị -> bitmap, cộng các rows
+      không đặt preference và các rows có preference dạng string
+    - care level (Filter 1): max level hiện tại của credentials
+      (calculate_max_care_level_dynamic) -> bitmap
+    - degree hợp lệ (Filter 2) và identity_verified: một bitmap mỗi thuộc tính
+
+    Mỗi filter thành một phép OR / AND trên bitmaps của cả fleet. Bitmaps là
+    Python int dày (n/8 bytes mỗi giá trị): với các thuộc tính ít giá trị như
+    trên, fleet 1M caregivers tốn cỡ 2MB bất kể dữ liệu.
+
+    Care level phụ thuộc thời gian (certificate hết hạn): mỗi row có expiry gần
+    nhất của các certificates đang tính vào level, và level được tính lại khi
+    thời điểm đó qua (trong lần query kế tiếp). Expiry so với now -
+    EXPIRY_MARGIN_SECONDS để index không bao giờ loại người filter vẫn cho pass
+    (timezone của expiry_date không có tz, đồng hồ lệch giữa index và filter).
+
+    Rows có credentials mà filter xử lý khác table (applicable_levels không phải
+    int 0..30 hay bị trùng, expiry_date sai format làm filter raise) luôn là
+    candidates của Filter 1 và 2.
+    """
+
+    name = 'categorical'
+
+    EXPIRY_MARGIN_SECONDS = 24 * 3600
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._table: Optional[CaregiverTable] = None
+        self._gender: Dict[Optional[str], int] = {}
+        self._health: Dict[Optional[str], int] = {}
+        self._health_open = 0       # không có preferred_health_status: pass mọi request
+        self._health_text = 0
+        self._levels: Dict[int, int] = {}
+        self._degree = 0
+        self._unsure = 0            # credentials index không đánh giá được
+        self._verified = 0
+        # Expiry tiếp theo của từng row: arrays sorted lúc build + heap cho upserts
+        self._event_times = np.empty(0, np.float64)
+        self._event_rows = np.empty(0, np.int64)
+        self._event_next = 0
+        self._pending: List[Tuple[float, int]] = []
+
+    @classmethod
+    def _now(cls) -> float:
+        return time.time() - cls.EXPIRY_MARGIN_SECONDS
+
+    @staticmethod
+    def _credential_state(table: CaregiverTable, rows: np.ndarray, index: np.ndarray,
+                          n: int, now: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (level, unsure, degree, next_expiry) của n rows từ các credentials
+        index (vị trí trong pool) thuộc rows (0..n-1)
+        """
+        credentials = table.ragged['credentials']
+        status = credentials.values['status'][index]
+        kind = credentials.values['type'][index]
+        expiry = credentials.values['expiry'][index]
+        mask = credentials.values['levels_mask'][index].astype(np.int64)
+        count = credentials.values['levels_count'][index]
+
+        verified = string_equals(table, status, 'verified')
+        certificate = string_equals(table, kind, 'certificate')
+        popcount = np.zeros(len(mask), np.int64)
+        for bit in range(31):
+            popcount += (mask >> bit) & 1
+        unsure = verified & ((popcount != count) | (certificate & (expiry == -math.inf)))
+        expiring = verified & certificate & np.isfinite(expiry)
+        counted = verified & ~(expiring & (expiry < now))
+
+        level = np.zeros(len(mask), np.int64)
+        has_levels = counted & (mask > 0)
+        level[has_levels] = np.floor(np.log2(mask[has_levels])).astype(np.int64)
+
+        row_level = np.zeros(n, np.int64)
+        np.maximum.at(row_level, rows, level)
+        row_unsure = np.bincount(rows[unsure], minlength=n) > 0
+        row_degree = np.bincount(rows[verified & string_equals(table, kind, 'degree')], minlength=n) > 0
+        # Level có thể giảm khi một certificate đang được tính hết hạn
+        next_expiry = np.full(n, math.inf)
+        upcoming = expiring & counted & (mask > 0)
+        np.minimum.at(next_expiry, rows[upcoming], expiry[upcoming])
+        return row_level, row_unsure, row_degree, next_expiry
+
+    def build(self, table: CaregiverTable):
+        self.clear()
+        self._table = table
+        n = table.n
+        strings = table.strings
+
+        gender = table.column('gender')
+        for value in np.unique(gender).tolist():
+            self._gender[strings.get(value)] = rows_to_bitmap(np.flatnonzero(gender == value), n)
+
+        health = table.ragged['health_status']
+        offsets, index = health.gather_index(n)
+        rows = np.repeat(np.arange(n), np.diff(offsets))
+        values = health.values['value'][index]
+        for value in np.unique(values).tolist():
+            self._health[strings.get(value)] = rows_to_bitmap(rows[values == value], n)
+        self._health_open = rows_to_bitmap(np.flatnonzero(np.diff(offsets) == 0), n)
+        self._health_text = rows_to_bitmap(np.flatnonzero(table.column('health_status_text')), n)
+        self._verified = rows_to_bitmap(np.flatnonzero(table.column('identity_verified')), n)
+
+        offsets, index = table.ragged['credentials'].gather_index(n)
+        rows = np.repeat(np.arange(n), np.diff(offsets))
+        level, unsure, degree, next_expiry = self._credential_state(table, rows, index, n, self._now())
+        for value in np.unique(level).tolist():
+            self._levels[value] = rows_to_bitmap(np.flatnonzero(level == value), n)
+        self._degree = rows_to_bitmap(np.flatnonzero(degree), n)
+        self._unsure = rows_to_bitmap(np.flatnonzero(unsure), n)
+
+        upcoming = np.flatnonzero(np.isfinite(next_expiry))
+        order = np.argsort(next_expiry[upcoming], kind='stable')
+        self._event_times = next_expiry[upcoming][order]
+        self._event_rows = upcoming[order]
+
+    def _add_credentials(self, table: CaregiverTable, row: int, now: float):
+        credentials = table.ragged['credentials']
+        start = int(credentials.starts[row])
+        index = np.arange(start, start + int(credentials.lengths[row]))
+        level, unsure, degree, next_expiry = self._credential_state(
+            table, np.zeros(len(index), np.int64), index, 1, now
+        )
+        bit = 1 << row
+        self._levels[int(level[0])] = self._levels.get(int(level[0]), 0) | bit
+        if degree[0]:
+            self._degree |= bit
+        if unsure[0]:
+            self._unsure |= bit
+        if math.isfinite(next_expiry[0]):
+            heapq.heappush(self._pending, (float(next_expiry[0]), row))
+
+    def _remove_credentials(self, row: int):
+        mask = ~(1 << row)
+        for value, bits in list(self._levels.items()):
+            if (bits >> row) & 1:
+                self._levels[value] = bits & mask
+        self._degree &= mask
+        self._unsure &= mask
+
+    def add(self, table: CaregiverTable, row: int):
+        self._table = table
+        bit = 1 << row
+        gender = table.string(int(table.columns['gender'][row]))
+        self._gender[gender] = self._gender.get(gender, 0) | bit
+
+        values = table.ragged['health_status'].row(row, 'value').tolist()
+        if not values:
+            self._health_open |= bit
+        for value in set(values):
+            value = table.string(value)
+            self._health[value] = self._health.get(value, 0) | bit
+        if table.columns['health_status_text'][row]:
+            self._health_text |= bit
+        if table.columns['identity_verified'][row]:
+            self._verified |= bit
+
+        self._add_credentials(table, row, self._now())
+
+    def remove(self, table: CaregiverTable, row: int):
+        mask = ~(1 << row)
+        for bitmaps in (self._gender, self._health):
+            for value, bits in list(bitmaps.items()):
+                if (bits >> row) & 1:
+                    bitmaps[value] = bits & mask
+        self._health_open &= mask
+        self._health_text &= mask
+        self._verified &= mask
+        self._remove_credentials(row)
+
+    def _expire(self):
+        """Tính lại care level của các rows có certificate vừa hết hạn"""
+        now = self._now()
+        expired = set()
+        while self._event_next < len(self._event_times) and self._event_times[self._event_next] < now:
+            expired.add(int(self._event_rows[self._event_next]))
+            self._event_next += 1
+        while self._pending and self._pending[0][0] < now:
+            expired.add(heapq.heappop(self._pending)[1])
+        # Row có thể đã bị xóa / thay bằng caregiver khác: tính lại từ table vẫn đúng
+        for row in sorted(expired):
+            if row < self._table.n:
+                self._remove_credentials(row)
+                self._add_credentials(self._table, row, now)
+
+    def _gender_bitmaps(self, gender_preference) -> Optional[List[int]]:
+        if not gender_preference or not isinstance(gender_preference, str):
+            return None
+        return [self._gender.get(gender_preference, 0)]
+
+    def _health_bitmaps(self, health_status) -> Optional[List[int]]:
+        if not health_status or not isinstance(health_status, str):
+            return None
+        return [self._health.get(health_status, 0), self._health_open, self._health_text]
+
+    def _care_level_bitmaps(self, care_level) -> Optional[List[int]]:
+        if isinstance(care_level, bool) or not isinstance(care_level, (int, float)) or math.isnan(care_level):
+            return None
+        required = math.ceil(care_level) if math.isfinite(care_level) else care_level
+        if required <= 0:
+            return None
+        self._expire()
+        return [self._unsure] + [rows for value, rows in self._levels.items() if value >= required]
+
+    def _degree_bitmaps(self, care_level) -> Optional[List[int]]:
+        if isinstance(care_level, bool) or not isinstance(care_level, (int, float)) or not care_level >= 3:
+            return None
+        return [self._degree, self._unsure]
+
+    @staticmethod
+    def _union(bitmaps: Optional[List[int]]) -> Optional[int]:
+        if bitmaps is None:
+            return None
+        bits = 0
+        for rows in bitmaps:
+            bits |= rows
+        return bits
+
+    @staticmethod
+    def _count(bitmaps: Optional[List[int]]) -> Optional[int]:
+        """Upper bound số rows của union (tổng popcounts, không OR)"""
+        return None if bitmaps is None else sum(rows.bit_count() for rows in bitmaps)
+
+    def rows_gender(self, gender_preference) -> Optional[int]:
+        """Bitmap rows pass Filter 5, None nếu filter không loại ai (hoặc giá trị lạ)"""
+        return self._union(self._gender_bitmaps(gender_preference))
+
+    def rows_health_status(self, health_status) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 7, None nếu filter không loại ai (hoặc giá trị lạ)"""
+        return self._union(self._health_bitmaps(health_status))
+
+    def rows_care_level(self, care_level) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 1 (max care level >= care_level), None nếu không loại ai"""
+        return self._union(self._care_level_bitmaps(care_level))
+
+    def rows_degree(self, care_level) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 2 (degree bắt buộc từ care level 3), None nếu không loại ai"""
+        return self._union(self._degree_bitmaps(care_level))
+
+    def estimate_gender(self, gender_preference) -> Optional[int]:
+        return self._count(self._gender_bitmaps(gender_preference))
+
+    def estimate_health_status(self, health_status) -> Optional[int]:
+        return self._count(self._health_bitmaps(health_status))
+
+    def estimate_care_level(self, care_level) -> Optional[int]:
+        return self._count(self._care_level_bitmaps(care_level))
+
+    def estimate_degree(self, care_level) -> Optional[int]:
+        return self._count(self._degree_bitmaps(care_level))
+
+    def rows_identity_verified(self) -> int:
+        return self._verified
+
+    def stats(self) -> Dict:
+        return {
+            'genders': len(self._gender),
+            'health_statuses': len(self._health),
+            'care_levels': sorted(value for value, bits in self._levels.items() if bits),
+            'unsure_credentials': self._unsure.bit_count(),
+            'pending_expiries': len(self._event_times) - self._event_next + len(self._pending),
+        }
+
+
+class RangeIndex(CaregiverIndex):
+    """
+    Sorted-array indexes cho các hard filters dạng khoảng số.
+
+    Mỗi column số (age, years_experience, overall_rating, hourly_rate và hai
+    đầu elderly_age_preference) có một array (value, row) sắp theo value; một
+    khoảng [lo, hi] là hai lần binary search + slice, O(log n + k).
+
+    - Filter 6 (caregiver_age_range), 9 (required_years_experience), 10
+      (overall_rating_range): khoảng trên column của caregiver
+    - Filter 8 (elderly_age_preference là khoảng phía caregiver): stabbing query
+      {min <= elderly_age} AND {max >= elderly_age}
+    - budget_per_hour: rows_within_budget() cho nhánh hourly_rate <= budget của
+      price score (không phải hard filter, không dùng cho candidate generation)
+
+    Upsert / delete không sửa arrays: row cũ bị đánh dấu stale, giá trị mới
+    nằm trong delta nhỏ được quét tuyến tính; arrays được build lại khi delta
+    vượt max(MIN_MERGE_ROWS, n / 32).
+
+    Rows mà filter quyết định khác column (không có giá trị / NaN, age = 0 là
+    falsy, giá trị gốc không phải số - xem NON_NUMERIC_FIELDS) luôn là
+    candidates của filter tương ứng.
+    """
+
+    name = 'range'
+
+    COLUMNS = ('age', 'years_experience', 'overall_rating', 'hourly_rate', 'elderly_age_min', 'elderly_age_max')
+    MIN_MERGE_ROWS = 1024
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._table: Optional[CaregiverTable] = None
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._base_n = 0
+        self._stale = 0
+        self._delta: Dict[int, Dict[str, float]] = {}
+        # filter -> rows luôn là candidate
+        self._unindexed: Dict[str, int] = {}
+
+    @staticmethod
+    def _unindexed_masks(values: Dict[str, np.ndarray], non_numeric: np.ndarray) -> Dict[str, np.ndarray]:
+        """filter -> mask các rows index không quyết định được (arrays theo row)"""
+        def flagged(field):
+            return (non_numeric & (1 << NON_NUMERIC_FIELDS.index(field))) != 0
+
+        return {
+            'caregiver_age': np.isnan(values['age']) | (values['age'] == 0) | flagged('age'),
+            'experience': np.isnan(values['years_experience']) | flagged('years_experience'),
+            'rating': np.isnan(values['overall_rating']) | flagged('overall_rating'),
+            'elderly_age': (np.isnan(values['elderly_age_min']) | np.isnan(values['elderly_age_max'])
+                            | flagged('elderly_age_preference')),
+            'budget': np.isnan(values['hourly_rate']) | flagged('hourly_rate'),
+        }
+
+    def build(self, table: CaregiverTable):
+        self.clear()
+        self._table = table
+        self._base_n = n = table.n
+        values = {name: table.column(name) for name in self.COLUMNS}
+        for name, column in values.items():
+            rows = np.flatnonzero(~np.isnan(column))
+            order = np.argsort(column[rows], kind='stable')
+            self._sorted[name] = (column[rows][order], rows[order])
+        for name, mask in self._unindexed_masks(values, table.column('non_numeric')).items():
+            self._unindexed[name] = rows_to_bitmap(np.flatnonzero(mask), n)
+
+    def add(self, table: CaregiverTable, row: int):
+        self._table = table
+        values = {name: float(table.columns[name][row]) for name in self.COLUMNS}
+        self._delta[row] = values
+        masks = self._unindexed_masks(
+            {name: np.array([value]) for name, value in values.items()},
+            np.array([table.columns['non_numeric'][row]])
+        )
+        for name, mask in masks.items():
+            if mask[0]:
+                self._unindexed[name] = self._unindexed.get(name, 0) | (1 << row)
+        if len(self._delta) > max(self.MIN_MERGE_ROWS, table.n // 32):
+            self.build(table)
+
+    def remove(self, table: CaregiverTable, row: int):
+        mask = ~(1 << row)
+        if row < self._base_n:
+            self._stale |= 1 << row
+        self._delta.pop(row, None)
+        for name, bits in self._unindexed.items():
+            self._unindexed[name] = bits & mask
+
+    def rows_in_range(self, column: str, low: float = -math.inf, high: float = math.inf) -> int:
+        """Bitmap rows có low <= column <= high (bỏ qua NaN)"""
+        values, rows = self._sorted[column]
+        start = np.searchsorted(values, low, side='left')
+        end = np.searchsorted(values, high, side='right')
+        bits = rows_to_bitmap(rows[start:end], max(self._base_n, self._table.n)) & ~self._stale
+        delta = [row for row, row_values in self._delta.items() if low <= row_values[column] <= high]
+        if delta:
+            bits |= rows_to_bitmap(np.array(delta, dtype=np.int64), self._table.n)
+        return bits
+
+    def count_in_range(self, column: str, low: float = -math.inf, high: float = math.inf) -> int:
+        """Upper bound số rows của rows_in_range() (hai lần binary search, không tạo bitmap)"""
+        values, _ = self._sorted[column]
+        count = np.searchsorted(values, high, side='right') - np.searchsorted(values, low, side='left')
+        return max(0, int(count)) + len(self._delta)
+
+    @staticmethod
+    def _ranges(filter_name: str, value) -> Optional[List[Tuple[str, float, float]]]:
+        """Các khoảng (column, low, high), AND với nhau, của filter; None nếu filter không loại ai"""
+        if filter_name == 'caregiver_age':
+            bounds = _number_range(value) if value else None
+            return None if bounds is None else [('age', *bounds)]
+        if filter_name == 'elderly_age':
+            if not value or not _comparable_number(value):
+                return None
+            return [('elderly_age_min', -math.inf, value), ('elderly_age_max', value, math.inf)]
+        if filter_name == 'experience':
+            return [('years_experience', value, math.inf)] if _comparable_number(value) else None
+        if filter_name == 'rating':
+            bounds = _number_range(value)
+            return None if bounds is None else [('overall_rating', *bounds)]
+        if filter_name == 'budget':
+            return [('hourly_rate', -math.inf, value)] if _comparable_number(value) else None
+        raise KeyError(filter_name)
+
+    def _rows(self, filter_name: str, value) -> Optional[int]:
+        ranges = self._ranges(filter_name, value)
+        if ranges is None:
+            return None
+        bits = -1
+        for column, low, high in ranges:
+            bits &= self.rows_in_range(column, low, high)
+        return bits | self._unindexed[filter_name]
+
+    def _estimate(self, filter_name: str, value) -> Optional[int]:
+        ranges = self._ranges(filter_name, value)
+        if ranges is None:
+            return None
+        return min(self.count_in_range(*r) for r in ranges) + self._unindexed[filter_name].bit_count()
+
+    def rows_caregiver_age(self, caregiver_age_range) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 6, None nếu filter không loại ai (hoặc giá trị lạ)"""
+        return self._rows('caregiver_age', caregiver_age_range)
+
+    def rows_elderly_age(self, elderly_age) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 8 (elderly_age nằm trong elderly_age_preference)"""
+        return self._rows('elderly_age', elderly_age)
+
+    def rows_experience(self, required_years_experience) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 9 (years_experience >= required)"""
+        return self._rows('experience', required_years_experience)
+
+    def rows_rating(self, overall_rating_range) -> Optional[int]:
+        """Bitmap rows có thể pass Filter 10 (overall_rating trong khoảng)"""
+        return self._rows('rating', overall_rating_range)
+
+    def rows_within_budget(self, budget) -> Optional[int]:
+        """Bitmap rows có hourly_rate <= budget (gồm cả rows không xác định được giá)"""
+        return self._rows('budget', budget)
+
+    def estimate_caregiver_age(self, caregiver_age_range) -> Optional[int]:
+        return self._estimate('caregiver_age', caregiver_age_range)
+
+    def estimate_elderly_age(self, elderly_age) -> Optional[int]:
+        return self._estimate('elderly_age', elderly_age)
+
+    def estimate_experience(self, required_years_experience) -> Optional[int]:
+        return self._estimate('experience', required_years_experience)
+
+    def estimate_rating(self, overall_rating_range) -> Optional[int]:
+        return self._estimate('rating', overall_rating_range)
+
+    def stats(self) -> Dict:
+        return {
+            'rows': self._base_n,
+            'delta_rows': len(self._delta),
+            'stale_rows': self._stale.bit_count(),
+        }
+
+
+def _comparable_number(value) -> bool:
+    """Số so sánh được như float (không phải bool, không phải NaN)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value)
+
+
+def _number_range(value) -> Optional[Tuple[float, float]]:
+    """(min, max) từ [min, max] của request, None nếu không đúng dạng"""
+    if isinstance(value, (list, tuple)) and len(value) == 2 and all(_comparable_number(v) for v in value):
+        return value[0], value[1]
+    return None
+
+
+class SkillEmbeddingIndex(CaregiverIndex):
+    """
+    Warm embedding cache của semantic matcher cho skills của caregivers.
+
+    Embedding cache key theo text (dùng chung giữa caregivers) nên remove là no-op.
+    """
+
+    name = 'embeddings'
+
+    def __init__(self, semantic_matcher):
+        self.semantic_matcher = semantic_matcher
+
+    def build(self, table: CaregiverTable):
+        if table.embeddings is not None:
+            # Embeddings đã tính sẵn trong snapshot (dùng chung giữa workers)
+            self.semantic_matcher.attach_embeddings(*table.embeddings)
+        self.semantic_matcher.warm_embeddings(skill_texts(table))
+
+    def export(self, table: CaregiverTable) -> Optional[Tuple[List[str], np.ndarray]]:
+        """(texts, matrix) embeddings của skills trong table để ghi vào snapshot"""
+        return self.semantic_matcher.export_embeddings(skill_texts(table))
+
+    def clear(self):
+        pass
+
+    def add(self, table: CaregiverTable, row: int):
+        self.semantic_matcher.warm_embeddings(table.skill_names(row))
+
+    def remove(self, table: CaregiverTable, row: int):
+        pass
+
+    def stats(self) -> Dict:
+        return {'cached_embeddings': len(self.semantic_matcher.embedding_cache)}
+
+
+class SkillSimilarityIndex(CaregiverIndex):
+    """
+    Đưa skills của caregivers vào vocabulary của SkillSimilarityMatrix lúc ingest / upsert.
+
+    Vocabulary append-only (như SkillIndex) nên remove là no-op; skills chưa có
+    trong vocabulary vẫn được thêm lúc match.
+    """
+
+    name = 'skill_similarity'
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def build(self, table: CaregiverTable):
+        self.matrix.add_skills(skill_texts(table))
+
+    def clear(self):
+        pass
+
+    def add(self, table: CaregiverTable, row: int):
+        self.matrix.add_skills(table.skill_names(row))
+
+    def remove(self, table: CaregiverTable, row: int):
+        pass
+
+    def stats(self) -> Dict:
+        return self.matrix.stats()
+
+
+def skill_texts(table: CaregiverTable) -> List[str]:
+    """Các skill names (đã normalize) xuất hiện trong table"""
+    skills = table.ragged['skills']
+    names = np.unique(skills.values['name'][:skills.size])
+    return [table.string(i) for i in names.tolist()]
+
+
+def default_indexes() -> List[CaregiverIndex]:
+    return [
+        SpatialGridIndex(), SkillIndex(), AvailabilityIndex(), CategoricalIndex(), RangeIndex(),
+        SkillEmbeddingIndex(semantic_matcher), SkillSimilarityIndex(skill_similarity),
+    ]
+
+
+def string_equals(table: CaregiverTable, ids: np.ndarray, value: str) -> np.ndarray:
+    """ids (string table) == value; value chưa có trong table thì không khớp id nào (kể cả MISSING)"""
+    string_id = table.strings.lookup(value)
+    return ids == string_id if string_id != MISSING else np.zeros(len(ids), dtype=bool)
+
+
+def rows_to_bitmap(rows: np.ndarray, n: int) -> int:
+    """Bitmap (int, bit i = row i) của các rows (< n)"""
+    mask = np.zeros(n, dtype=bool)
+    mask[rows] = True
+    return int.from_bytes(np.packbits(mask, bitorder='little').tobytes(), 'little')
+
+
+def bitmap_rows(bits: int, n: int) -> np.ndarray:
+    """Các rows (< n, tăng dần) có bit được set; nhanh hơn iter_bits với bitmap lớn"""
+    size = max((n + 7) // 8, (bits.bit_length() + 7) // 8)
+    mask = np.unpackbits(np.frombuffer(bits.to_bytes(size, 'little'), np.uint8), bitorder='little')
+    return np.flatnonzero(mask[:n])
+
+
+def iter_bits(bits: int) -> Iterable[int]:
+    """Vị trí các bit được set trong một int bitset"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
@@ -0,0 +1,254 @@
+"""
+Streaming ingestion cho caregiver datasets lớn.
+
+json.load đọc toàn bộ file thành một string rồi mới build object graph, nên
+peak memory = raw text + toàn bộ dicts. Loader ở đây đọc file theo chunks,
+parse từng record (JSON array hoặc NDJSON), compact record ngay khi đọc xong
+và bỏ phần text đã parse, nên memory tạm thời chỉ tỉ lệ với một record.
+load_caregiver_table compile luôn từng record vào CaregiverTable (columnar).
+
+Compact: các strings lặp lại giữa records (keys, tên ngày, giờ, skill names,
+status, ...) được dedupe qua một bảng dùng chung, vì json decoder chỉ memo
+keys trong phạm vi một lần decode.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, TextIO, Tuple
+
+from app.core.metrics import registry
+from app.core.table import CaregiverTable
+
+CHUNK_SIZE = 1 << 16
+# Strings dài hơn ngưỡng này (ví dụ mô tả, review) hiếm khi lặp lại nên không dedupe
+MAX_SHARED_STRING_LENGTH = 64
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+INGEST_RECORDS = registry.counter(
+    'caregiver_ingest_records_total',
+    'Caregiver records ingested from files',
+)
+INGEST_SKIPPED = registry.counter(
+    'caregiver_ingest_skipped_total',
+    'Malformed caregiver records skipped while ingesting files',
+)
+INGEST_RATE = registry.gauge(
+    'caregiver_ingest_records_per_second',
+    'Ingest rate of the last caregiver file load',
+)
+INGEST_SECONDS = registry.gauge(
+    'caregiver_ingest_last_duration_seconds',
+    'Duration of the last caregiver file load',
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(fp: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield từng phần tử của một JSON array top-level, đọc file theo chunks
+
+    Raises:
+        ValueError: Nếu nội dung không phải JSON array hợp lệ
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace() -> bool:
+        """Bỏ whitespace, trả về False nếu hết dữ liệu"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not fill():
+                return False
+
+    if not skip_whitespace() or buffer[pos] != '[':
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unexpected end of JSON array")
+        char = buffer[pos]
+        if char == ']' and (first or not expect_value):
+            return
+        if not expect_value:
+            if char != ',':
+                raise ValueError(f"Expected ',' or ']' at offset {pos}")
+            pos += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            # Giá trị kết thúc đúng cuối buffer có thể bị cắt (ví dụ số): đọc thêm rồi parse lại
+            if end == len(buffer) and fill():
+                continue
+            break
+
+        pos = end
+        first = False
+        expect_value = False
+        yield value
+
+
+def iter_ndjson(fp: TextIO) -> Iterator[Any]:
+    """Yield từng record của file NDJSON (bỏ qua dòng trống)"""
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON at line {line_number}: {e}") from e
+
+
+def compact_record(value: Any, strings: Dict[str, str]) -> Any:
+    """Dedupe các strings ngắn trong record qua bảng strings dùng chung"""
+    if isinstance(value, dict):
+        return {
+            strings.setdefault(key, key): compact_record(item, strings)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [compact_record(item, strings) for item in value]
+    if isinstance(value, str) and len(value) <= MAX_SHARED_STRING_LENGTH:
+        return strings.setdefault(value, value)
+    return value
+
+
+def is_ndjson(path: Path, fp: TextIO) -> bool:
+    """NDJSON nếu có đuôi .ndjson/.jsonl hoặc ký tự đầu tiên không phải '['"""
+    if path.suffix.lower() in NDJSON_SUFFIXES:
+        return True
+    while True:
+        char = fp.read(1)
+        if not char or char not in _WHITESPACE:
+            break
+    fp.seek(0)
+    return char != '['
+
+
+class IngestReport:
+    """Số liệu của một lần load file: số records, records bị bỏ qua, bytes, thời gian"""
+
+    __slots__ = ('path', 'format', 'records', 'skipped', 'bytes', 'seconds')
+
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self.format = fmt
+        self.records = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'path': str(self.path),
+            'format': self.format,
+            'records': self.records,
+            'skipped': self.skipped,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6),
+            'records_per_second': round(self.records_per_second, 1),
+            'mb_per_second': round(self.bytes / self.seconds / 1e6, 2) if self.seconds > 0 else 0.0,
+        }
+
+
+def _ingest(path: Path, add: Callable[[Dict], Any], chunk_size: int) -> IngestReport:
+    """
+    Đọc từng record của file, compact rồi gọi add(record)
+
+    Record mà add() raise ValueError (caregiver sai format, xem
+    CaregiverTable.append) được bỏ qua: log vị trí + id, đếm vào
+    report.skipped, các records còn lại vẫn được load. JSON sai cú pháp
+    vẫn làm hỏng cả file.
+    """
+    start = time.perf_counter()
+    strings: Dict[str, str] = {}
+    records = skipped = 0
+
+    with open(path, 'r', encoding='utf-8') as fp:
+        ndjson = is_ndjson(path, fp)
+        report = IngestReport(path, 'ndjson' if ndjson else 'json')
+        for position, record in enumerate(iter_ndjson(fp) if ndjson else iter_json_array(fp, chunk_size), 1):
+            try:
+                add(compact_record(record, strings))
+            except ValueError as e:
+                skipped += 1
+                caregiver_id = record.get('id') if isinstance(record, dict) else None
+                logger.warning("Bỏ qua caregiver #%d (id=%r) trong %s: %s", position, caregiver_id, path.name, e)
+                continue
+            records += 1
+
+    report.bytes = os.path.getsize(path)
+    report.records = records
+    report.skipped = skipped
+    report.seconds = time.perf_counter() - start
+
+    INGEST_RECORDS.inc(report.records)
+    INGEST_SKIPPED.inc(report.skipped)
+    INGEST_RATE.set(report.records_per_second)
+    INGEST_SECONDS.set(report.seconds)
+    logger.info(
+        "Ingested %d caregivers from %s in %.3fs (%.0f records/s, %d skipped)",
+        report.records, path.name, report.seconds, report.records_per_second, report.skipped
+    )
+    return report
+
+
+def load_caregiver_file(path: Path, chunk_size: int = CHUNK_SIZE) -> Tuple[List[Dict], IngestReport]:
+    """
+    Load caregivers từ JSON array hoặc NDJSON theo stream
+
+    Returns:
+        (list caregivers đã compact, IngestReport)
+    """
+    caregivers: List[Dict] = []
+    report = _ingest(Path(path), caregivers.append, chunk_size)
+    return caregivers, report
+
+
+def load_caregiver_table(path: Path, chunk_size: int = CHUNK_SIZE) -> Tuple[CaregiverTable, IngestReport]:
+    """
+    Load caregivers theo stream và compile từng record vào CaregiverTable
+
+    Returns:
+        (CaregiverTable, IngestReport)
+    """
+    table = CaregiverTable()
+    report = _ingest(Path(path), table.append, chunk_size)
+    return table, report
@@ -0,0 +1,143 @@
+"""
+Per-stage instrumentation cho RuleBasedMatcher.
+
+MatchStats gom số liệu của một lần match (stage timers, filter pass/reject)
+rồi publish một lần vào metrics registry, để vòng lặp per-candidate không
+phải lock registry.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from app.core.metrics import registry
+
+# Hard filters theo thứ tự mặc định (FilterOrderOptimizer có thể sắp xếp lại)
+FILTER_NAMES = (
+    'care_level',
+    'degree',
+    'distance',
+    'time',
+    'gender',
+    'caregiver_age',
+    'health_status',
+    'elderly_age',
+    'experience',
+    'rating',
+    'skills',
+)
+
+MATCH_LATENCY = registry.histogram(
+    'matcher_match_duration_seconds',
+    'End-to-end latency of RuleBasedMatcher.match',
+)
+STAGE_LATENCY = registry.histogram(
+    'matcher_stage_duration_seconds',
+    'Time spent per stage within one match call (summed over candidates)',
+    ['stage'],
+)
+FILTER_RESULTS = registry.counter(
+    'matcher_filter_results_total',
+    'Hard filter evaluations by filter and result',
+    ['filter', 'result'],
+)
+FILTER_ERRORS = registry.counter(
+    'matcher_filter_errors_total',
+    'Hard filter evaluations that failed on malformed caregiver data (counted as rejects)',
+    ['filter'],
+)
+FILTER_SECONDS = registry.counter(
+    'matcher_filter_seconds_total',
+    'Cumulative time spent evaluating each hard filter',
+    ['filter'],
+)
+CANDIDATES = registry.counter(
+    'matcher_candidates_total',
+    'Caregivers seen by the matcher by phase',
+    ['phase'],
+)
+MATCHES = registry.counter(
+    'matcher_matches_total',
+    'Match calls by outcome (primary, fallback, empty)',
+    ['outcome'],
+)
+
+
+class MatchStats:
+    """Số liệu của một lần gọi RuleBasedMatcher.match."""
+
+    __slots__ = (
+        'stage_seconds', 'filter_passed', 'filter_rejected', 'filter_errors', 'filter_seconds',
+        'candidates', 'outcome', 'filter_order', 'plan'
+    )
+
+    def __init__(self):
+        self.stage_seconds: Dict[str, float] = {}
+        self.filter_passed: Dict[str, int] = {}
+        self.filter_rejected: Dict[str, int] = {}
+        self.filter_errors: Dict[str, int] = {}
+        self.filter_seconds: Dict[str, float] = {}
+        self.candidates: Dict[str, int] = {}
+        self.outcome = None
+        self.filter_order = ()
+        self.plan = None
+
+    def add_stage(self, stage: str, seconds: float):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(stage, time.perf_counter() - start)
+
+    def record_filter(self, name: str, passed: bool, seconds: float, error: bool = False):
+        """error: filter lỗi trên dữ liệu caregiver sai kiểu (tính là reject)"""
+        if passed:
+            self.filter_passed[name] = self.filter_passed.get(name, 0) + 1
+        else:
+            self.filter_rejected[name] = self.filter_rejected.get(name, 0) + 1
+        if error:
+            self.filter_errors[name] = self.filter_errors.get(name, 0) + 1
+        self.filter_seconds[name] = self.filter_seconds.get(name, 0.0) + seconds
+
+    def add_candidates(self, phase: str, count: int):
+        self.candidates[phase] = self.candidates.get(phase, 0) + count
+
+    def to_dict(self) -> Dict:
+        filters = {}
+        for name in set(self.filter_passed) | set(self.filter_rejected):
+            filters[name] = {
+                'passed': self.filter_passed.get(name, 0),
+                'rejected': self.filter_rejected.get(name, 0),
+                'errors': self.filter_errors.get(name, 0),
+                'seconds': round(self.filter_seconds.get(name, 0.0), 6),
+            }
+        return {
+            'outcome': self.outcome,
+            'filter_order': list(self.filter_order),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stage_seconds.items()},
+            'filters': filters,
+            'candidates': dict(self.candidates),
+            'plan': self.plan,
+        }
+
+    def publish(self, total_seconds: float):
+        """Đẩy số liệu của lần match này vào metrics registry."""
+        MATCH_LATENCY.observe(total_seconds)
+        for stage, seconds in self.stage_seconds.items():
+            STAGE_LATENCY.observe(seconds, stage=stage)
+        for name, count in self.filter_passed.items():
+            FILTER_RESULTS.inc(count, filter=name, result='pass')
+        for name, count in self.filter_rejected.items():
+            FILTER_RESULTS.inc(count, filter=name, result='reject')
+        for name, count in self.filter_errors.items():
+            FILTER_ERRORS.inc(count, filter=name)
+        for name, seconds in self.filter_seconds.items():
+            FILTER_SECONDS.inc(seconds, filter=name)
+        for phase, count in self.candidates.items():
+            CANDIDATES.inc(count, phase=phase)
+        if self.outcome:
+            MATCHES.inc(outcome=self.outcome)
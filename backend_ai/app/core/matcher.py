@@ -3,10 +3,85 @@ Phase 1: Rule-based Matching Engine
 Weighted scoring algorithm với hard filters và soft preferences
 """
 
-from typing import List, Dict, Optional
+import heapq
+import math
+import time
+from operator import itemgetter
+from datetime import datetime
+from typing import Any, Callable, List, Dict, Optional, Sequence, Tuple
 import numpy as np
 from app.utils import haversine_km, has_time_overlap
-from app.algorithms.semantic_matcher import semantic_matcher, normalize_request_skills, normalize_caregiver_skills
+from app.algorithms.semantic_matcher import (
+    SKILL_MATCH_THRESHOLD,
+    normalized_caregiver,
+    normalized_request,
+    skill_similarity,
+)
+from app.core.candidates import CandidateRows
+from app.core.instrumentation import FILTER_NAMES, MatchStats
+from app.core.filter_order import FilterOrderOptimizer
+from app.core.weight_profiles import DEFAULT_WEIGHTS, check_weights
+from app.core.static_scores import (
+    experience_score as calculate_experience_score,
+    rating_score as calculate_rating_score,
+    trust_score as calculate_trust_score,
+)
+
+# static=None: không có score tính sẵn, tính tất cả lúc query
+NO_STATIC_SCORES = (math.nan, math.nan, math.nan)
+
+# Fallback round bỏ qua Filter 1-3 (care level, degree, distance)
+FALLBACK_FILTER_NAMES = tuple(name for name in FILTER_NAMES if name not in ('care_level', 'degree', 'distance'))
+
+# Lỗi của hard filter trên dữ liệu caregiver sai kiểu (None, string thay vì số,
+# date sai format...): tính là reject, xem _apply_hard_filters
+FILTER_DATA_ERRORS = (AttributeError, IndexError, KeyError, TypeError, ValueError)
+
+# Skills score luôn trong [0, 1] (min(1.0, base + bonus)), dùng cho upper bound của total
+SKILLS_SCORE_RANGE = (0.0, 1.0)
+
+
+def top_by_score(results: List[Dict], top_n: int, key: Callable[[Dict], float] = None) -> List[Dict]:
+    """
+    sorted(results, key=total_score, reverse=True)[:top_n], dùng heap khi top_n nhỏ hơn số results
+    
+    heapq.nlargest giữ thứ tự gốc giữa các phần tử bằng điểm như sort stable.
+    """
+    if key is None:
+        key = itemgetter('total_score')
+    if 0 <= top_n < len(results):
+        return heapq.nlargest(top_n, results, key=key)
+    return sorted(results, key=key, reverse=True)[:top_n]
+
+
+class ScoreFloor:
+    """
+    Ngưỡng vào top N của một lần match (WAND-style pruning).
+    
+    Giữ N total_score (rounded) cao nhất đã có. Candidate có upper bound (total
+    với skills score tốt nhất, rounded) nhỏ hơn hẳn floor không thể vào top N:
+    có ít nhất N kết quả khác điểm cao hơn, nên bỏ qua được semantic skills
+    scoring mà top N không đổi.
+    """
+    
+    __slots__ = ('top_n', '_heap')
+    
+    def __init__(self, top_n: int):
+        self.top_n = top_n
+        self._heap: List[float] = []
+    
+    @property
+    def value(self) -> float:
+        """Điểm thấp nhất của top N hiện tại (-inf khi chưa đủ N kết quả)"""
+        return self._heap[0] if len(self._heap) >= self.top_n else -math.inf
+    
+    def push(self, score: float):
+        if math.isnan(score):
+            return
+        if len(self._heap) < self.top_n:
+            heapq.heappush(self._heap, score)
+        elif score > self._heap[0]:
+            heapq.heapreplace(self._heap, score)
 
 
 def convert_schedule_to_dict(schedule: List[Dict]) -> Dict:
@@ -51,6 +126,9 @@ class RuleBasedMatcher:
         10. Overall Rating Range: caregiver.overall_rating nằm trong request.overall_rating_range (nếu có)
         11. Required Skills: 100% required_skills phải có trong caregiver skills
     
+    Thứ tự chạy hard filters được FilterOrderOptimizer sắp xếp lại theo
+    cost / rejection rate đo được (Required Skills - semantic - luôn chạy cuối).
+    
     Soft Scoring Features (7 features, weights sum = 1.0):
         - Credential (30%): Bằng cấp, care level
         - Skills (25%): Priority skills matching
@@ -62,22 +140,49 @@ class RuleBasedMatcher:
     """
     
     def __init__(self):
-        # Weights for scoring features (sum = 1.0)
-        self.weights = {
-            'credential': 0.30,   # Bằng cấp, care level (+5%)
-            'skills': 0.25,       # Priority skills matching (+5%)
-            'distance': 0.15,     # Gần = thuận tiện (+3%)
-            'rating': 0.12,       # Chất lượng đã được verify (+2%)
-            'experience': 0.08,   # Kinh nghiệm (giữ nguyên)
-            'price': 0.08,        # Gần budget (giữ nguyên)
-            'trust': 0.02         # Độ tin cậy (-3%)
+        # Weights for scoring features (sum = 1.0), xem app/core/weight_profiles.py
+        self.weights = dict(DEFAULT_WEIGHTS)
+        # Tăng mỗi khi weights đổi (dùng trong key của result cache)
+        self.weights_version = 0
+        # Bỏ qua skills scoring cho candidates không thể vào top N (xem ScoreFloor)
+        self.prune_candidates = True
+        
+        # Hard filters theo tên (thứ tự chạy xem FILTER_NAMES)
+        self._hard_filters = {
+            'care_level': self._filter_care_level,
+            'degree': self._filter_degree,
+            'distance': self._filter_distance,
+            'time': self._filter_time,
+            'gender': self._filter_gender,
+            'caregiver_age': self._filter_caregiver_age,
+            'health_status': self._filter_health_status,
+            'elderly_age': self._filter_elderly_age,
+            'experience': self._filter_experience,
+            'rating': self._filter_rating,
+            'skills': self._filter_skills,
         }
+        
+        # Adaptive ordering: filter rẻ và loại nhiều chạy trước, semantic skills luôn cuối
+        self.filter_order = FilterOrderOptimizer(FILTER_NAMES, pinned_last=('skills',))
+    
+    def set_weights(self, weights: Dict[str, float]):
+        """
+        Thay đổi weights của scoring features.
+        
+        Args:
+            weights: Dict feature -> weight (phải đủ 7 features như self.weights)
+        """
+        self.weights = check_weights(weights)
+        self.weights_version += 1
     
     def match(
         self, 
         care_request: Dict, 
         caregivers: List[Dict],
-        top_n: int = 10
+        top_n: int = 10,
+        stats: Optional[MatchStats] = None,
+        static_scores: Optional[Sequence[Optional[Sequence[float]]]] = None,
+        candidate_rows: Optional[CandidateRows] = None
     ) -> List[Dict]:
         """
         Match caregivers to a care request với fallback strategy.
@@ -91,58 +196,169 @@ class RuleBasedMatcher:
             care_request: Dict chứa thông tin yêu cầu
             caregivers: List của caregiver profiles
             top_n: Số lượng caregivers trả về (mặc định 10)
+            stats: MatchStats nhận per-stage timings và filter counters (optional).
+                Số liệu luôn được publish vào metrics registry.
+            static_scores: (rating, experience, trust) tính sẵn của từng caregiver,
+                cùng thứ tự với caregivers (xem app/core/static_scores.py). None
+                hoặc NaN = tính lúc query.
+            candidate_rows: Caregivers có thể pass các hard filters đã tra qua
+                indexes (xem app/core/candidates.py). None = xét tất cả.
         
         Returns:
             List of matched caregivers với scores, sorted by score desc
         """
-        # Normalize Vietnamese skills by removing diacritics for matching
-        care_request = normalize_request_skills(care_request)
+        return self._match_pipeline(
+            care_request, caregivers, top_n, stats, static_scores, candidate_rows, self._rank
+        )
+    
+    def _match_pipeline(
+        self,
+        care_request: Dict,
+        caregivers: List[Dict],
+        top_n: int,
+        stats: Optional[MatchStats],
+        static_scores: Optional[Sequence[Optional[Sequence[float]]]],
+        candidate_rows: Optional[CandidateRows],
+        rank: Callable[[List[Dict], int, MatchStats], Any],
+        score_batch: Optional[Callable[..., List[Optional[Dict]]]] = None
+    ) -> Any:
+        """
+        Pipeline chung của match() và VectorizedMatcher.match_profiles.
+        
+        Hard filters + scoring với fallback (_scored_candidates, pruning theo
+        ScoreFloor nếu prune_candidates), rank các kết quả, rồi publish stats
+        và cập nhật thứ tự hard filters (kể cả khi lỗi).
+        
+        Args:
+            rank: (results chưa sort, top_n, stats) -> giá trị trả về của match
+            score_batch: Thay cho self._score_batch (xem _scored_candidates)
+        """
+        if stats is None:
+            stats = MatchStats()
+        
+        match_start = time.perf_counter()
+        try:
+            floor = ScoreFloor(top_n) if self.prune_candidates and top_n > 0 else None
+            stats.outcome, results = self._scored_candidates(
+                care_request, caregivers, top_n, stats, static_scores, score_batch,
+                floor=floor, candidate_rows=candidate_rows
+            )
+            return rank(results, top_n, stats)
+        finally:
+            stats.publish(time.perf_counter() - match_start)
+            self.filter_order.update(stats.filter_passed, stats.filter_rejected, stats.filter_seconds)
+    
+    def _rank(self, results: List[Dict], top_n: int, stats: MatchStats) -> List[Dict]:
+        """Top N theo total_score descending (kết quả của match())"""
+        if results:
+            with stats.stage('rank'):
+                results = self._materialize(top_by_score(results, top_n))
+        return results[:top_n]
+    
+    def _materialize(self, results: List[Dict]) -> List[Dict]:
+        """
+        Hoàn thiện các results được trả về (chỉ top N).
+        
+        RuleBasedMatcher tính đủ breakdown lúc scoring nên không cần làm gì;
+        engine tính lazy (VectorizedMatcher) override để tạo breakdown ở đây.
+        """
+        return results
+    
+    def _scored_candidates(
+        self,
+        care_request: Dict,
+        caregivers: List[Dict],
+        top_n: int,
+        stats: MatchStats,
+        static_scores: Optional[Sequence[Optional[Sequence[float]]]] = None,
+        score_batch: Optional[Callable[..., List[Optional[Dict]]]] = None,
+        floor: Optional[ScoreFloor] = None,
+        candidate_rows: Optional[CandidateRows] = None
+    ) -> Tuple[str, List[Dict]]:
+        """
+        Hard filters + scoring với fallback strategy (chưa sort, chưa cắt top_n).
+        
+        Tập candidates được score không phụ thuộc weights: chỉ phụ thuộc hard
+        filters và thứ tự distance của fallback.
         
-        # Normalize caregivers skills by removing diacritics
-        caregivers_normalized = []
-        for cg in caregivers:
-            cg_normalized = normalize_caregiver_skills(cg.copy())
-            caregivers_normalized.append(cg_normalized)
+        Args:
+            score_batch: Thay cho self._score_batch (cùng signature)
+            floor: Ngưỡng top N để pruning (None = score đầy đủ mọi candidate).
+                Candidates bị prune vẫn nằm trong results (đếm cho fallback) với
+                total_score = upper bound và 'pruned': True; không bao giờ vào top N.
+            candidate_rows: Chỉ score các caregivers này (xem match()). Những
+                người khác vẫn được tính distance khi cần fallback để giữ nguyên
+                thứ tự và batches của fallback.
+        
+        Returns:
+            (outcome 'primary' | 'fallback' | 'empty', results)
+        """
+        if score_batch is None:
+            score_batch = self._score_batch
+        if static_scores is None:
+            static_scores = [None] * len(caregivers)
+        elif len(static_scores) != len(caregivers):
+            raise ValueError("static_scores phải cùng độ dài với caregivers")
+        
+        # Snapshot thứ tự filters cho cả lần match này
+        primary_filters = self.filter_order.order
+        fallback_filters = self.filter_order.ordered(FALLBACK_FILTER_NAMES)
+        stats.filter_order = primary_filters
+        
+        n = len(caregivers)
+        positions = range(n) if candidate_rows is None else candidate_rows.positions(n, primary=True).tolist()
+        
+        with stats.stage('normalize'):
+            # Normalize Vietnamese skills by removing diacritics for matching
+            # (request đã compile là dict mới, request của caller giữ nguyên)
+            care_request = normalized_request(care_request)
+            
+            # Caregivers của store đã normalize lúc ingest (dùng luôn, không copy);
+            # documents khác (ví dụ gửi kèm từ Spring) được copy + normalize
+            caregivers_normalized = [normalized_caregiver(caregivers[i]) for i in positions]
+        stats.add_candidates('input', n)
+        if candidate_rows is not None:
+            stats.add_candidates('indexed', len(positions))
+            stats.plan = candidate_rows.plan
         
         # BƯỚC 1: Hard Filter với service_radius_km của từng caregiver
         pass_list = []
         fail_list = []
         
-        for cg in caregivers_normalized:
-            distance = haversine_km(
-                care_request['location']['lat'], care_request['location']['lon'],
-                cg.get('location', {}).get('lat', cg.get('lat')),
-                cg.get('location', {}).get('lon', cg.get('lon'))
-            )
-            
-            service_radius = cg.get('location', {}).get('service_radius_km', cg.get('service_radius_km', 0))
-            
-            if distance <= service_radius:
-                pass_list.append(cg)
-            else:
-                cg['distance'] = distance
-                fail_list.append(cg)
-        
-        # BƯỚC 2: Sắp xếp fail_list theo distance (gần nhất trước)
-        fail_list.sort(key=lambda x: x['distance'])
+        with stats.stage('distance'):
+            for i, cg in zip(positions, caregivers_normalized):
+                distance, in_radius = self._service_distance(care_request, cg)
+                if in_radius:
+                    pass_list.append((cg, static_scores[i]))
+                else:
+                    # Distance giữ ngoài cg: caregiver dicts có thể dùng chung giữa requests
+                    fail_list.append((distance, i, cg))
         
         # BƯỚC 3: Thử pass_list trước
+        stats.add_candidates('primary', len(pass_list))
         results = []
-        for cg in pass_list:
-            score_result = self._score_candidate(care_request, cg)
-            
+        primary_scores = score_batch(care_request, pass_list, stats, primary_filters, floor=floor)
+        for (cg, static), score_result in zip(pass_list, primary_scores):
             if score_result is not None:
-                results.append({
-                    'caregiver': cg,
-                    'total_score': score_result['total_score'],
-                    'breakdown': score_result['breakdown'],
-                    'distance_km': score_result['distance_km']
-                })
+                # Giữ cả các field thêm của score_batch (ví dụ profile_scores)
+                results.append({'caregiver': cg, **score_result})
         
         if results:
-            # Sort by total_score descending
-            results.sort(key=lambda x: x['total_score'], reverse=True)
-            return results[:top_n]
+            return 'primary', results
+        
+        with stats.stage('distance'):
+            if candidate_rows is not None:
+                # Fallback xếp theo distance trên tất cả caregivers: thêm những
+                # người ngoài candidates của vòng primary (candidates của fallback
+                # được score, những người khác chỉ giữ chỗ trong batches)
+                fail_list.extend(self._fallback_outside_radius(
+                    care_request, caregivers, positions, candidate_rows.positions(n)
+                ))
+                fail_list.sort(key=itemgetter(1))
+            
+            # BƯỚC 2: Sắp xếp fail_list theo distance (gần nhất trước)
+            fail_list.sort(key=itemgetter(0))
+            fail_list = [(cg, static_scores[i]) for _, i, cg in fail_list]
         
         # BƯỚC 4: Fallback - Lấy nhiều lần, mỗi lần 10 người từ fail_list
         fallback_results = []
@@ -152,20 +368,15 @@ class RuleBasedMatcher:
             # Lấy 10 người gần nhất từ remaining_fail_list
             batch_size = min(10, len(remaining_fail_list))
             current_batch = remaining_fail_list[:batch_size]
+            stats.add_candidates('fallback', batch_size)
             
             # Xử lý batch hiện tại
             batch_results = []
-            for cg in current_batch:
-                score_result = self._score_candidate_fallback(care_request, cg)
-                
+            current_batch = [(cg, static) for cg, static in current_batch if cg is not None]
+            batch_scores = score_batch(care_request, current_batch, stats, fallback_filters, fallback=True, floor=floor)
+            for (cg, static), score_result in zip(current_batch, batch_scores):
                 if score_result is not None:
-                    batch_results.append({
-                        'caregiver': cg,
-                        'total_score': score_result['total_score'],
-                        'breakdown': score_result['breakdown'],
-                        'distance_km': score_result['distance_km'],
-                        'radius_multiplier': 'fallback'
-                    })
+                    batch_results.append({'caregiver': cg, **score_result, 'radius_multiplier': 'fallback'})
             
             # Thêm batch results vào fallback_results
             fallback_results.extend(batch_results)
@@ -178,12 +389,45 @@ class RuleBasedMatcher:
                 break
         
         if fallback_results:
-            # Sort by total_score descending
-            fallback_results.sort(key=lambda x: x['total_score'], reverse=True)
-            return fallback_results[:top_n]
+            return 'fallback', fallback_results
         
         # Nếu không tìm thấy caregiver nào
-        return []
+        return 'empty', []
+    
+
+    def _service_distance(self, req: Dict, cg: Dict) -> Tuple[float, bool]:
+        """(distance request -> caregiver, request nằm trong service_radius_km của caregiver)"""
+        distance = haversine_km(
+            req['location']['lat'], req['location']['lon'],
+            cg.get('location', {}).get('lat', cg.get('lat')),
+            cg.get('location', {}).get('lon', cg.get('lon'))
+        )
+        
+        service_radius = cg.get('location', {}).get('service_radius_km', cg.get('service_radius_km', 0))
+        
+        return distance, distance <= service_radius
+    
+    def _fallback_outside_radius(
+        self,
+        req: Dict,
+        caregivers: List[Dict],
+        primary_positions: List[int],
+        fallback_positions: np.ndarray
+    ) -> List[Tuple[float, int, Optional[Dict]]]:
+        """
+        (distance, vị trí, caregiver đã normalize hoặc None) của các caregivers ngoài
+        primary_positions và ngoài service radius; None = không phải candidate của fallback
+        """
+        others = np.ones(len(caregivers), dtype=bool)
+        others[primary_positions] = False
+        fallback = np.zeros(len(caregivers), dtype=bool)
+        fallback[fallback_positions] = True
+        entries = []
+        for i in np.flatnonzero(others).tolist():
+            distance, in_radius = self._service_distance(req, caregivers[i])
+            if not in_radius:
+                entries.append((distance, i, normalized_caregiver(caregivers[i]) if fallback[i] else None))
+        return entries
     
     def calculate_max_care_level_dynamic(self, cg: Dict) -> int:
         """
@@ -258,50 +502,87 @@ class RuleBasedMatcher:
         # Normalize về 0-1 (giả sử max 5 credentials)
         return min(1.0, quality_score / 5.0)
     
-    def _score_candidate(
-        self, 
-        req: Dict, 
-        cg: Dict
-    ) -> Optional[Dict]:
+    def _candidate_context(self, cg: Dict) -> Dict:
         """
-        Score a single caregiver against a care request.
+        Extract các field dùng chung cho hard filters và soft scoring.
         
-        Args:
-            req: Care request dict
-            cg: Caregiver dict
-        
-        Returns:
-            Dict với total_score, breakdown, distance_km
-            None nếu không đủ điều kiện (hard filters)
+        Hỗ trợ cả nested format (professional_info, personal_info, ...) lẫn flat format.
         """
-        
-        # ========== HARD FILTERS (bắt buộc) ==========
-        
         # Extract nested data
         professional_info = cg.get('professional_info', cg)  # Fallback to root level
         personal_info = cg.get('personal_info', cg)
         location_info = cg.get('location', cg)
         availability_info = cg.get('availability', {})
         
-        # Tính max_care_level động thay vì dùng giá trị cố định
-        max_care_level = self.calculate_max_care_level_dynamic(cg)
-        years_experience = professional_info.get('years_experience', cg.get('years_experience'))
-        hourly_rate = professional_info.get('price_per_hour', professional_info.get('hourly_rate', cg.get('hourly_rate', cg.get('price_per_hour'))))
-        gender = personal_info.get('gender', cg.get('gender'))
-        cg_lat = location_info.get('lat', cg.get('lat'))
-        cg_lon = location_info.get('lon', cg.get('lon'))
         schedule = availability_info.get('schedule', cg.get('availability', {}))
         
         # Convert schedule array to dict if needed
         if isinstance(schedule, list):
             schedule = convert_schedule_to_dict(schedule)
         
-        # Filter 1: Care level match
-        if max_care_level < req['care_level']:
-            return None
+        return {
+            'personal_info': personal_info,
+            'location_info': location_info,
+            'years_experience': professional_info.get('years_experience', cg.get('years_experience')),
+            'hourly_rate': professional_info.get('price_per_hour', professional_info.get('hourly_rate', cg.get('hourly_rate', cg.get('price_per_hour')))),
+            'gender': personal_info.get('gender', cg.get('gender')),
+            'lat': location_info.get('lat', cg.get('lat')),
+            'lon': location_info.get('lon', cg.get('lon')),
+            'schedule': schedule,
+            'distance': None,
+        }
+    
+    def _apply_hard_filters(
+        self,
+        req: Dict,
+        cg: Dict,
+        ctx: Dict,
+        filter_names: Tuple[str, ...],
+        stats: Optional[MatchStats] = None
+    ) -> bool:
+        """
+        Chạy lần lượt các hard filters, dừng ở filter đầu tiên reject.
         
-        # Filter 2: Degree requirement cho level 3+
+        Filter lỗi vì dữ liệu caregiver sai kiểu (FILTER_DATA_ERRORS) được tính
+        là reject: mỗi filter là hàm toàn phần nên kết quả không phụ thuộc thứ
+        tự FilterOrderOptimizer chọn.
+        
+        Returns:
+            True nếu caregiver pass tất cả filters
+        """
+        for name in filter_names:
+            check = self._hard_filters[name]
+            if stats is None:
+                try:
+                    if not check(req, cg, ctx):
+                        return False
+                except FILTER_DATA_ERRORS:
+                    return False
+                continue
+            
+            start = time.perf_counter()
+            error = False
+            try:
+                passed = check(req, cg, ctx)
+            except FILTER_DATA_ERRORS:
+                passed = False
+                error = True
+            stats.record_filter(name, passed, time.perf_counter() - start, error)
+            if not passed:
+                return False
+        return True
+    
+    def _filter_care_level(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 1: Care level match"""
+        # Tính max_care_level động thay vì dùng giá trị cố định
+        return self.calculate_max_care_level_dynamic(cg) >= req['care_level']
+    
+    def _filter_degree(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 2: Degree requirement cho level 3+"""
         # Level 3-4 BẮT BUỘC phải có bằng cấp
+        if req['care_level'] < 3:
+            return True
+        
         credentials = cg.get('credentials', [])
         
         # Helper: Check credential còn hạn
@@ -310,49 +591,48 @@ class RuleBasedMatcher:
                 return False
             # Certificate phải check expiry_date
             if cred.get('type') == 'certificate' and cred.get('expiry_date'):
-                from datetime import datetime
-                expiry = datetime.fromisoformat(cred['expiry_date'].replace('Z', '+00:00'))
+                try:
+                    expiry = datetime.fromisoformat(cred['expiry_date'].replace('Z', '+00:00'))
+                except ValueError:
+                    return False  # Sai format (như Filter 1)
                 if expiry < datetime.now(expiry.tzinfo):
                     return False  # Hết hạn
             return True
         
         valid_credentials = [c for c in credentials if is_valid_credential(c)]
-        has_degree = any(c.get('type') == 'degree' for c in valid_credentials)
-        
-        if req['care_level'] >= 3 and not has_degree:
-            return None
-        
-        # Filter 3: Distance - Logic đúng: caregiver quyết định bán kính phục vụ
-        distance = haversine_km(
-            req['location']['lat'], req['location']['lon'],
-            cg_lat, cg_lon
-        )
-        service_radius = location_info.get('service_radius_km', cg.get('service_radius_km', 0))
+        return any(c.get('type') == 'degree' for c in valid_credentials)
+    
+    def _filter_distance(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 3: Distance - Logic đúng: caregiver quyết định bán kính phục vụ"""
+        distance = self._candidate_distance(req, ctx)
+        service_radius = ctx['location_info'].get('service_radius_km', cg.get('service_radius_km', 0))
         
         # Caregiver chỉ nhận được request nếu trong bán kính phục vụ của họ
-        if distance > service_radius:
-            return None
-        
-        # Filter 4: Time availability
+        return distance <= service_radius
+    
+    def _filter_time(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 4: Time availability"""
         # Tất cả time slots yêu cầu phải nằm trong availability của caregiver
-        if not has_time_overlap(req['time_slots'], schedule):
-            return None
-        
-        # Filter 5: Gender preference (nếu có)
-        if req.get('gender_preference') and req['gender_preference'] != gender:
-            return None
-        
-        # Filter 6: Caregiver age range preference (optional)
+        return has_time_overlap(req['time_slots'], ctx['schedule'])
+    
+    def _filter_gender(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 5: Gender preference (nếu có)"""
+        return not (req.get('gender_preference') and req['gender_preference'] != ctx['gender'])
+    
+    def _filter_caregiver_age(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 6: Caregiver age range preference (optional)"""
         # Request có thể yêu cầu độ tuổi của caregiver (ví dụ: 25-50 tuổi)
         caregiver_age_range = req.get('caregiver_age_range', None)
-        caregiver_age = personal_info.get('age', cg.get('age', None))
+        caregiver_age = ctx['personal_info'].get('age', cg.get('age', None))
         
         if caregiver_age_range and caregiver_age:
             min_age, max_age = caregiver_age_range
             if caregiver_age < min_age or caregiver_age > max_age:
-                return None
-        
-        # Filter 7: Health status preference
+                return False
+        return True
+    
+    def _filter_health_status(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 7: Health status preference"""
         # Caregiver chỉ nhận nếu health_status của người già nằm trong preferred_health_status
         preferences = cg.get('preferences', {})
         preferred_health_status = preferences.get('preferred_health_status', [])
@@ -360,27 +640,35 @@ class RuleBasedMatcher:
         
         if preferred_health_status and elderly_health_status:
             if elderly_health_status not in preferred_health_status:
-                return None
-        
-        # Filter 8: Elderly age preference
+                return False
+        return True
+    
+    def _filter_elderly_age(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 8: Elderly age preference"""
         # Caregiver chỉ nhận nếu elderly_age của người già nằm trong elderly_age_preference
+        preferences = cg.get('preferences', {})
         elderly_age_preference = preferences.get('elderly_age_preference', None)
         elderly_age = req.get('elderly_age', None)
         
         if elderly_age_preference and elderly_age:
             min_age, max_age = elderly_age_preference
             if elderly_age < min_age or elderly_age > max_age:
-                return None
-        
-        # Filter 9: Required Years Experience (Hard Filter)
+                return False
+        return True
+    
+    def _filter_experience(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 9: Required Years Experience (Hard Filter)"""
         # Caregiver PHẢI có đủ số năm kinh nghiệm yêu cầu
         required_years_experience = req.get('required_years_experience', None)
         
         if required_years_experience is not None:
-            if years_experience < required_years_experience:
-                return None  # Không đủ kinh nghiệm
-        
-        # Filter 10: Overall Rating Range (Hard Filter)
+            years_experience = ctx['years_experience']
+            if years_experience is None or years_experience < required_years_experience:
+                return False  # Không có / không đủ kinh nghiệm
+        return True
+    
+    def _filter_rating(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 10: Overall Rating Range (Hard Filter)"""
         # Caregiver PHẢI có đánh giá nằm trong khoảng yêu cầu
         required_rating_range = req.get('overall_rating_range', None)
         
@@ -391,48 +679,123 @@ class RuleBasedMatcher:
             
             min_rating, max_rating = required_rating_range
             if caregiver_rating < min_rating or caregiver_rating > max_rating:
-                return None  # Đánh giá không nằm trong khoảng yêu cầu
-        
-        # Filter 11: Required Skills (Hard Filter)
+                return False  # Đánh giá không nằm trong khoảng yêu cầu
+        return True
+    
+    def _filter_skills(self, req: Dict, cg: Dict, ctx: Dict) -> bool:
+        """Filter 11: Required Skills (Hard Filter)"""
         # Caregiver PHẢI có 100% required_skills
         req_skills = req.get('skills', {})
         required_skills = req_skills.get('required_skills', [])
         
-        if required_skills:
-            # Get caregiver's skill names (extract from skill objects)
-            cg_skills = cg.get('skills', [])
-            cg_skill_names = set()
-            for skill in cg_skills:
-                if isinstance(skill, dict):
-                    cg_skill_names.add(skill.get('name', ''))
-                else:
-                    cg_skill_names.add(skill)
-            
-            # Check if ALL required skills are present using semantic matching (PhoBERT)
-            missing_skills = []
-            for req_skill in required_skills:
-                best_match_score = 0.0
-                for cg_skill in cg_skill_names:
-                    similarity = semantic_matcher.calculate_similarity(req_skill, cg_skill)
-                    best_match_score = max(best_match_score, similarity)
-                
-                # Threshold for PhoBERT v2 semantic matching (0.8 = 80% similarity for strict matching)
-                if best_match_score < 0.8:
-                    missing_skills.append(req_skill)
-            
-            if missing_skills:
-                return None  # Không đủ required skills
+        if not required_skills:
+            return True
+        
+        # Get caregiver's skill names (extract from skill objects)
+        cg_skills = cg.get('skills', [])
+        cg_skill_names = set()
+        for skill in cg_skills:
+            if isinstance(skill, dict):
+                cg_skill_names.add(skill.get('name', ''))
+            else:
+                cg_skill_names.add(skill)
+        
+        # Check if ALL required skills are present using semantic matching (PhoBERT)
+        # Lookup trong skill-pair similarity matrix (chỉ giữ các cặp >= threshold)
+        for req_skill in required_skills:
+            _, best_match_score = skill_similarity.best_match(req_skill, cg_skill_names)
+            if best_match_score < SKILL_MATCH_THRESHOLD:
+                return False  # Không đủ required skills
+        return True
+    
+    def _candidate_distance(self, req: Dict, ctx: Dict) -> float:
+        """Khoảng cách request -> caregiver (tính một lần cho mỗi candidate)."""
+        if ctx['distance'] is None:
+            ctx['distance'] = haversine_km(
+                req['location']['lat'], req['location']['lon'],
+                ctx['lat'], ctx['lon']
+            )
+        return ctx['distance']
+    
+    def _score_batch(
+        self,
+        req: Dict,
+        batch: List[Tuple[Dict, Optional[Sequence[float]]]],
+        stats: MatchStats,
+        filter_names: Tuple[str, ...],
+        fallback: bool = False,
+        floor: Optional[ScoreFloor] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Hard filters + soft scoring cho một batch (caregiver, static scores).
+        
+        Returns:
+            Kết quả của _score_candidate (hoặc _score_candidate_fallback) cho từng
+            phần tử của batch, None nếu bị loại bởi hard filters
+        """
+        score = self._score_candidate_fallback if fallback else self._score_candidate
+        return [score(req, cg, stats, filter_names, static, floor) for cg, static in batch]
+    
+    def _score_candidate(
+        self, 
+        req: Dict, 
+        cg: Dict,
+        stats: Optional[MatchStats] = None,
+        filter_names: Optional[Tuple[str, ...]] = None,
+        static: Optional[Sequence[float]] = None,
+        floor: Optional[ScoreFloor] = None
+    ) -> Optional[Dict]:
+        """
+        Score a single caregiver against a care request.
+        
+        Args:
+            req: Care request dict
+            cg: Caregiver dict
+            stats: MatchStats để ghi filter counters và stage timings (optional)
+            filter_names: Thứ tự hard filters (mặc định: thứ tự hiện tại của filter_order)
+            static: (rating, experience, trust) tính sẵn (optional, xem match())
+            floor: Ngưỡng top N để bỏ qua skills scoring (optional, xem ScoreFloor)
+        
+        Returns:
+            Dict với total_score, breakdown, distance_km
+            None nếu không đủ điều kiện (hard filters)
+        """
+        ctx = self._candidate_context(cg)
+        if filter_names is None:
+            filter_names = self.filter_order.order
+        
+        # ========== HARD FILTERS (bắt buộc) ==========
+        if not self._apply_hard_filters(req, cg, ctx, filter_names, stats):
+            return None
+        
+        return self._soft_score(req, cg, ctx, stats, static, floor)
+    
+    def _soft_score(
+        self,
+        req: Dict,
+        cg: Dict,
+        ctx: Dict,
+        stats: Optional[MatchStats] = None,
+        static: Optional[Sequence[float]] = None,
+        floor: Optional[ScoreFloor] = None
+    ) -> Dict:
+        """
+        Soft scoring + weighted sum cho caregiver đã pass hard filters.
+        
+        Rating, experience, trust lấy từ static (tính sẵn lúc ingest) nếu có.
+        Skills score (semantic matching, đắt nhất) tính sau cùng: với floor, nếu
+        total tốt nhất có thể vẫn dưới ngưỡng top N thì bỏ qua và trả về
+        {'total_score': upper bound, 'pruned': True}.
+        """
+        scoring_start = time.perf_counter()
+        distance = self._candidate_distance(req, ctx)
         
         # ========== SOFT SCORING (normalize về 0-1) ==========
         
         # 1. Credential score (bằng cấp + level)
         credential_score = self._calculate_credential_score(req, cg)
         
-        # 2. Skills score (priority skills matching)
-        skills_score = self._calculate_skills_score(req, cg)
-        
         # 3. Distance score - Logic mượt: exponential decay
-        import math
         # Công thức: score = e^(-distance/scale)
         # Scale = 8: distance 8km → score ≈ 0.37, distance 16km → score ≈ 0.14
         distance_score = math.exp(-distance / 8.0)
@@ -440,29 +803,52 @@ class RuleBasedMatcher:
         # 4. Time score - Đã được xử lý ở hard filter
         # Không cần tính điểm vì đã pass hard filter = có sẵn 100% time slots
         
+        # 5-6, 8. Rating / experience / trust chỉ phụ thuộc caregiver: tính sẵn lúc ingest
+        rating_score, experience_score, trust_score = static if static is not None else NO_STATIC_SCORES
+        
         # 5. Rating score
-        rating_score = self._calculate_rating_score(cg)
+        if math.isnan(rating_score):
+            rating_score = self._calculate_rating_score(cg)
         
         # 6. Experience score - Improved: min 0.1 cho caregiver mới
-        experience_score = min(1.0, max(0.1, years_experience / 10.0))
+        if math.isnan(experience_score):
+            experience_score = calculate_experience_score(ctx['years_experience'])
         
         # 7. Price score (gần budget = tốt)
-        price_score = self._calculate_price_score(req, cg, hourly_rate)
+        price_score = self._calculate_price_score(req, cg, ctx['hourly_rate'])
         
         # 8. Trust score (simplified: dựa trên rating + experience + reviews)
-        trust_score = self._calculate_trust_score(cg)
+        if math.isnan(trust_score):
+            trust_score = self._calculate_trust_score(cg)
+        
+        # 2. Skills score (priority skills matching) - chỉ khi còn có thể vào top N
+        if floor is not None and self._has_priority_skills(req):
+            upper_bound = round(self._weighted_total(
+                credential_score, self._skills_bounds()[1], distance_score,
+                rating_score, experience_score, price_score, trust_score
+            ), 3)
+            if upper_bound < floor.value:
+                if stats is not None:
+                    stats.add_candidates('pruned', 1)
+                    stats.add_stage('soft_scoring', time.perf_counter() - scoring_start)
+                return {'total_score': upper_bound, 'pruned': True}
+        
+        skills_start = time.perf_counter()
+        skills_score = self._calculate_skills_score(req, cg)
+        skills_seconds = time.perf_counter() - skills_start
         
         # ========== WEIGHTED SUM ==========
         
-        total_score = (
-            self.weights['credential'] * credential_score +
-            self.weights['skills'] * skills_score +
-            self.weights['distance'] * distance_score +
-            self.weights['rating'] * rating_score +
-            self.weights['experience'] * experience_score +
-            self.weights['price'] * price_score +
-            self.weights['trust'] * trust_score
+        total_score = self._weighted_total(
+            credential_score, skills_score, distance_score,
+            rating_score, experience_score, price_score, trust_score
         )
+        if floor is not None:
+            floor.push(round(total_score, 3))
+        
+        if stats is not None:
+            stats.add_stage('skills_score', skills_seconds)
+            stats.add_stage('soft_scoring', time.perf_counter() - scoring_start - skills_seconds)
         
         return {
             'total_score': round(total_score, 3),
@@ -478,6 +864,43 @@ class RuleBasedMatcher:
             }
         }
     
+    def _weighted_total(
+        self,
+        credential_score: float,
+        skills_score: float,
+        distance_score: float,
+        rating_score: float,
+        experience_score: float,
+        price_score: float,
+        trust_score: float
+    ) -> float:
+        """Weighted sum của 7 features (thứ tự cộng cố định)"""
+        return (
+            self.weights['credential'] * credential_score +
+            self.weights['skills'] * skills_score +
+            self.weights['distance'] * distance_score +
+            self.weights['rating'] * rating_score +
+            self.weights['experience'] * experience_score +
+            self.weights['price'] * price_score +
+            self.weights['trust'] * trust_score
+        )
+    
+    def _skills_bounds(self) -> Tuple[float, float]:
+        """
+        (skills score cho total thấp nhất, skills score cho total cao nhất)
+        
+        Weighted sum đơn điệu theo từng feature nên total với skills score ở
+        biên là lower / upper bound chính xác (kể cả sau round) của total thật.
+        """
+        low, high = SKILLS_SCORE_RANGE
+        return (low, high) if self.weights['skills'] >= 0 else (high, low)
+    
+    @staticmethod
+    def _has_priority_skills(req: Dict) -> bool:
+        """Không có priority skills thì skills score = 1.0, không cần pruning"""
+        return bool(req.get('skills', {}).get('priority_skills', []))
+    
+
     def _calculate_skills_score(self, req: Dict, cg: Dict) -> float:
         """
         Tính điểm skills dựa trên priority_skills matching.
@@ -514,18 +937,10 @@ class RuleBasedMatcher:
         skills_with_credentials = 0
         
         for priority_skill in priority_skills:
-            # Use semantic matching (PhoBERT) for priority skills
-            best_match_score = 0.0
-            best_match_skill = None
-            
-            for cg_skill_name in cg_skill_map.keys():
-                similarity = semantic_matcher.calculate_similarity(priority_skill, cg_skill_name)
-                if similarity > best_match_score:
-                    best_match_score = similarity
-                    best_match_skill = cg_skill_name
+            # Use semantic matching (PhoBERT) for priority skills, qua skill-pair similarity matrix
+            best_match_skill, best_match_score = skill_similarity.best_match(priority_skill, cg_skill_map)
             
-            # Threshold for PhoBERT v2 semantic matching (0.8 = 80% similarity for strict matching)
-            if best_match_score >= 0.8:
+            if best_match_score >= SKILL_MATCH_THRESHOLD:
                     matched_count += 1
                     # Check if skill has credential mapping (higher quality)
                     skill_obj = cg_skill_map[best_match_skill]
@@ -608,47 +1023,8 @@ class RuleBasedMatcher:
         return min(1.0, score / MAX_CREDENTIAL_SCORE)
     
     def _calculate_rating_score(self, cg: Dict) -> float:
-        """
-        Tính điểm rating sử dụng Bayesian Average.
-        
-        Logic:
-            - Bayesian Average: (total_rating + C * m) / (total_reviews + C)
-            - C: Confidence constant (25)
-            - m: Mean rating của platform (3.5)
-            - Công bằng giữa rating và số lượng reviews
-        """
-        ratings_reviews = cg.get('ratings_reviews', cg)
-        total_reviews = ratings_reviews.get('total_reviews', cg.get('total_reviews', 0))
-        
-        # Nếu không có reviews, trả về điểm mặc định
-        if total_reviews == 0:
-            return 0.5
-        
-        # Tính total_rating từ rating_breakdown nếu có
-        rating_breakdown = ratings_reviews.get('rating_breakdown', {})
-        if rating_breakdown:
-            # Tính tổng điểm từ breakdown
-            total_rating = (
-                rating_breakdown.get('5_star', 0) * 5 +
-                rating_breakdown.get('4_star', 0) * 4 +
-                rating_breakdown.get('3_star', 0) * 3 +
-                rating_breakdown.get('2_star', 0) * 2 +
-                rating_breakdown.get('1_star', 0) * 1
-            )
-        else:
-            # Fallback: dùng overall_rating * total_reviews
-            overall_rating = ratings_reviews.get('overall_rating', cg.get('rating', 4.0))
-            total_rating = overall_rating * total_reviews
-        
-        # Bayesian constants
-        C = 25  # Confidence constant
-        m = 3.5  # Mean rating của platform
-        
-        # Bayesian average calculation
-        bayesian_rating = (total_rating + C * m) / (total_reviews + C)
-        
-        # Normalize về 0-1
-        return min(1.0, bayesian_rating / 5.0)
+        """Điểm rating (Bayesian average), xem app/core/static_scores.py"""
+        return calculate_rating_score(cg)
     
     def _calculate_price_score(self, req: Dict, cg: Dict, hourly_rate: float = None) -> float:
         """
@@ -687,58 +1063,17 @@ class RuleBasedMatcher:
             return max(0.0, 1.0 - excess_ratio)
     
     def _calculate_trust_score(self, cg: Dict) -> float:
-        """
-        Tính trust score dựa trên booking history và verification
-        
-        Factors:
-            - Completion rate (40%): Tỷ lệ hoàn thành booking
-            - Seeker cancel rate (30%): Tỷ lệ hủy bởi seeker (càng thấp càng tốt)
-            - Total bookings (20%): Số lượng booking (kinh nghiệm thực tế)
-            - Verification (10%): Xác minh danh tính
-        """
-        booking_history = cg.get('booking_history', {})
-        verification = cg.get('verification', {})
-        
-        # 1. Completion rate component (40%)
-        completion_rate = booking_history.get('completion_rate', 0.0)
-        completion_component = completion_rate
-        
-        # 2. Seeker cancel rate component (30%) - càng thấp càng tốt
-        seeker_cancel_rate = booking_history.get('seeker_cancel_rate', 0.0)
-        # Invert: 0% cancel = 1.0, 15% cancel = 0.0
-        cancel_component = max(0.0, 1.0 - (seeker_cancel_rate * 6.67))
-        
-        # 3. Total bookings component (20%)
-        total_bookings = booking_history.get('total_bookings', 0)
-        if total_bookings >= 100:
-            bookings_component = 1.0
-        elif total_bookings >= 50:
-            bookings_component = 0.8
-        elif total_bookings >= 20:
-            bookings_component = 0.6
-        elif total_bookings >= 10:
-            bookings_component = 0.4
-        else:
-            bookings_component = 0.2
-        
-        # 4. Verification component (10%)
-        identity_verified = verification.get('identity_verified', False)
-        verification_component = 1.0 if identity_verified else 0.5
-        
-        # Weighted combination
-        trust = (
-            0.4 * completion_component +
-            0.3 * cancel_component +
-            0.2 * bookings_component +
-            0.1 * verification_component
-        )
-        
-        return min(1.0, trust)
+        """Trust score (booking history + verification), xem app/core/static_scores.py"""
+        return calculate_trust_score(cg)
     
     def _score_candidate_fallback(
         self, 
         req: Dict, 
-        cg: Dict
+        cg: Dict,
+        stats: Optional[MatchStats] = None,
+        filter_names: Optional[Tuple[str, ...]] = None,
+        static: Optional[Sequence[float]] = None,
+        floor: Optional[ScoreFloor] = None
     ) -> Optional[Dict]:
         """
         Score a fallback caregiver (bỏ qua Filter 3 - Distance).
@@ -746,185 +1081,27 @@ class RuleBasedMatcher:
         Args:
             req: Care request dict
             cg: Caregiver dict
+            stats: MatchStats để ghi filter counters và stage timings (optional)
+            filter_names: Thứ tự hard filters (mặc định: thứ tự hiện tại, bỏ Filter 1-3)
+            static: (rating, experience, trust) tính sẵn (optional, xem match())
+            floor: Ngưỡng top N để bỏ qua skills scoring (optional, xem ScoreFloor)
         
         Returns:
             Dict với total_score, breakdown, distance_km
             None nếu không đủ điều kiện (hard filters 1,2,4-11)
         """
+        ctx = self._candidate_context(cg)
+        if filter_names is None:
+            filter_names = self.filter_order.ordered(FALLBACK_FILTER_NAMES)
         
         # ========== HARD FILTERS (bỏ qua Filter 3 - Distance) ==========
-        
-        # Extract nested data
-        professional_info = cg.get('professional_info', cg)  # Fallback to root level
-        personal_info = cg.get('personal_info', cg)
-        location_info = cg.get('location', cg)
-        availability_info = cg.get('availability', {})
-        
-        # Tính max_care_level động thay vì dùng giá trị cố định
-        max_care_level = self.calculate_max_care_level_dynamic(cg)
-        years_experience = professional_info.get('years_experience', cg.get('years_experience'))
-        hourly_rate = professional_info.get('price_per_hour', professional_info.get('hourly_rate', cg.get('hourly_rate', cg.get('price_per_hour'))))
-        gender = personal_info.get('gender', cg.get('gender'))
-        cg_lat = location_info.get('lat', cg.get('lat'))
-        cg_lon = location_info.get('lon', cg.get('lon'))
-        schedule = availability_info.get('schedule', cg.get('availability', {}))
-        
-        # Convert schedule array to dict if needed
-        if isinstance(schedule, list):
-            schedule = convert_schedule_to_dict(schedule)
-        
         # Filter 1: Care level match - BỎ QUA (đã pass ở round 1)
         # Filter 2: Degree requirement - BỎ QUA (đã pass ở round 1)
         # Filter 3: Distance - BỎ QUA (đã fail ở round 1)
-        distance = haversine_km(
-            req['location']['lat'], req['location']['lon'],
-            cg_lat, cg_lon
-        )
-        
-        # Filter 4: Time availability
-        # Tất cả time slots yêu cầu phải nằm trong availability của caregiver
-        if not has_time_overlap(req['time_slots'], schedule):
+        if not self._apply_hard_filters(req, cg, ctx, filter_names, stats):
             return None
         
-        # Filter 5: Gender preference (nếu có)
-        if req.get('gender_preference') and req['gender_preference'] != gender:
-            return None
-        
-        # Filter 6: Caregiver age range preference (optional)
-        # Request có thể yêu cầu độ tuổi của caregiver (ví dụ: 25-50 tuổi)
-        caregiver_age_range = req.get('caregiver_age_range', None)
-        caregiver_age = personal_info.get('age', cg.get('age', None))
-        
-        if caregiver_age_range and caregiver_age:
-            min_age, max_age = caregiver_age_range
-            if caregiver_age < min_age or caregiver_age > max_age:
-                return None
-        
-        # Filter 7: Health status preference
-        # Caregiver chỉ nhận nếu health_status của người già nằm trong preferred_health_status
-        preferences = cg.get('preferences', {})
-        preferred_health_status = preferences.get('preferred_health_status', [])
-        elderly_health_status = req.get('health_status', None)
-        
-        if preferred_health_status and elderly_health_status:
-            if elderly_health_status not in preferred_health_status:
-                return None
-        
-        # Filter 8: Elderly age preference
-        # Caregiver chỉ nhận nếu elderly_age của người già nằm trong elderly_age_preference
-        elderly_age_preference = preferences.get('elderly_age_preference', None)
-        elderly_age = req.get('elderly_age', None)
-        
-        if elderly_age_preference and elderly_age:
-            min_age, max_age = elderly_age_preference
-            if elderly_age < min_age or elderly_age > max_age:
-                return None
-        
-        # Filter 9: Required Years Experience (Hard Filter)
-        # Caregiver PHẢI có đủ số năm kinh nghiệm yêu cầu
-        required_years_experience = req.get('required_years_experience', None)
-        
-        if required_years_experience is not None:
-            if years_experience < required_years_experience:
-                return None  # Không đủ kinh nghiệm
-        
-        # Filter 10: Overall Rating Range (Hard Filter)
-        # Caregiver PHẢI có đánh giá nằm trong khoảng yêu cầu
-        required_rating_range = req.get('overall_rating_range', None)
-        
-        if required_rating_range is not None:
-            # Lấy overall_rating của caregiver
-            ratings_reviews = cg.get('ratings_reviews', cg)
-            caregiver_rating = ratings_reviews.get('overall_rating', cg.get('rating', 0.0))
-            
-            min_rating, max_rating = required_rating_range
-            if caregiver_rating < min_rating or caregiver_rating > max_rating:
-                return None  # Đánh giá không nằm trong khoảng yêu cầu
-        
-        # Filter 11: Required Skills (Hard Filter)
-        # Caregiver PHẢI có 100% required_skills
-        req_skills = req.get('skills', {})
-        required_skills = req_skills.get('required_skills', [])
-        
-        if required_skills:
-            # Get caregiver's skill names (extract from skill objects)
-            cg_skills = cg.get('skills', [])
-            cg_skill_names = set()
-            for skill in cg_skills:
-                if isinstance(skill, dict):
-                    cg_skill_names.add(skill.get('name', ''))
-                else:
-                    cg_skill_names.add(skill)
-            
-            # Check if ALL required skills are present using semantic matching (PhoBERT)
-            missing_skills = []
-            for req_skill in required_skills:
-                best_match_score = 0.0
-                for cg_skill in cg_skill_names:
-                    similarity = semantic_matcher.calculate_similarity(req_skill, cg_skill)
-                    best_match_score = max(best_match_score, similarity)
-                
-                # Threshold for PhoBERT v2 semantic matching (0.8 = 80% similarity for strict matching)
-                if best_match_score < 0.8:
-                    missing_skills.append(req_skill)
-            
-            if missing_skills:
-                return None  # Không đủ required skills
-        
-        # ========== SOFT SCORING (normalize về 0-1) ==========
-        
-        # 1. Credential score (bằng cấp + level)
-        credential_score = self._calculate_credential_score(req, cg)
-        
-        # 2. Skills score (priority skills matching)
-        skills_score = self._calculate_skills_score(req, cg)
-        
-        # 3. Distance score - Logic mượt: exponential decay
-        import math
-        # Công thức: score = e^(-distance/scale)
-        # Scale = 8: distance 8km → score ≈ 0.37, distance 16km → score ≈ 0.14
-        distance_score = math.exp(-distance / 8.0)
-        
-        # 4. Time score - Đã được xử lý ở hard filter
-        # Không cần tính điểm vì đã pass hard filter = có sẵn 100% time slots
-        
-        # 5. Rating score
-        rating_score = self._calculate_rating_score(cg)
-        
-        # 6. Experience score - Improved: min 0.1 cho caregiver mới
-        experience_score = min(1.0, max(0.1, years_experience / 10.0))
-        
-        # 7. Price score (gần budget = tốt)
-        price_score = self._calculate_price_score(req, cg, hourly_rate)
-        
-        # 8. Trust score (simplified: dựa trên rating + experience + reviews)
-        trust_score = self._calculate_trust_score(cg)
-        
-        # ========== WEIGHTED SUM ==========
-        
-        total_score = (
-            self.weights['credential'] * credential_score +
-            self.weights['skills'] * skills_score +
-            self.weights['distance'] * distance_score +
-            self.weights['rating'] * rating_score +
-            self.weights['experience'] * experience_score +
-            self.weights['price'] * price_score +
-            self.weights['trust'] * trust_score
-        )
-        
-        return {
-            'total_score': round(total_score, 3),
-            'distance_km': round(distance, 2),
-            'breakdown': {
-                'credential': round(credential_score, 3),
-                'skills': round(skills_score, 3),
-                'distance': round(distance_score, 3),
-                'rating': round(rating_score, 3),
-                'experience': round(experience_score, 3),
-                'price': round(price_score, 3),
-                'trust': round(trust_score, 3)
-            }
-        }
+        return self._soft_score(req, cg, ctx, stats, static, floor)
 
 
 # Vietnamese to English Skills Mapping
@@ -0,0 +1,89 @@
+"""
+On-demand profiling cho match requests.
+
+Chạy một callable dưới cProfile và tóm tắt các hot functions
+(theo cumulative time) để trả về cùng response.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# cProfile không cho chạy nhiều profiler cùng lúc trong một process
+_profiler_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Một request khác đang được profile"""
+
+
+def _function_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # built-in
+    # Rút gọn path: giữ phần từ package 'app' trở đi nếu có
+    marker = filename.replace('\\', '/').rfind('/app/')
+    short = filename[marker + 1:] if marker >= 0 else filename.replace('\\', '/').split('/')[-1]
+    return f"{short}:{lineno}({name})"
+
+
+def summarize_profile(profiler: cProfile.Profile, top: int = 25, sort_by: str = 'cumulative') -> List[Dict]:
+    """Top functions theo sort_by ('cumulative' hoặc 'tottime')"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats(sort_by)
+    
+    hot_functions = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, total_calls, tottime, cumtime, _ = stats.stats[func]
+        hot_functions.append({
+            'function': _function_label(func),
+            'ncalls': total_calls,
+            'primitive_calls': primitive_calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3),
+            'percall_cum_ms': round(cumtime * 1000 / total_calls, 4) if total_calls else 0.0,
+        })
+    return hot_functions
+
+
+def profile_call(
+    fn: Callable[..., Any],
+    *args,
+    top: int = 25,
+    sort_by: str = 'cumulative',
+    **kwargs
+) -> Tuple[Any, Dict]:
+    """
+    Chạy fn(*args, **kwargs) dưới cProfile.
+    
+    Returns:
+        (kết quả của fn, profile report dict)
+    
+    Raises:
+        ProfilerBusyError: nếu đang có request khác được profile
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Profiler is busy with another request")
+    
+    try:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+        wall_seconds = time.perf_counter() - start
+    finally:
+        _profiler_lock.release()
+    
+    report = {
+        'profiler': 'cProfile',
+        'sort_by': sort_by,
+        'wall_time_ms': round(wall_seconds * 1000, 3),
+        'hot_functions': summarize_profile(profiler, top=top, sort_by=sort_by),
+    }
+    return result, report
@@ -0,0 +1,111 @@
+"""
+Bounded LRU cache cho kết quả match.
+
+Key do caller tạo và phải chứa mọi thứ ảnh hưởng đến kết quả
+(request id/hash, version của caregiver store, weights version, top_n),
+nên entry cũ không bao giờ bị trả về sai; clear() chỉ để giải phóng memory
+khi dữ liệu reload.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import registry
+
+CACHE_REQUESTS = registry.counter(
+    'match_result_cache_requests_total',
+    'Result cache lookups by cache and result (hit/miss)',
+    ['cache', 'result'],
+)
+CACHE_EVICTIONS = registry.counter(
+    'match_result_cache_evictions_total',
+    'Entries evicted from the result cache (LRU or invalidation)',
+    ['cache', 'reason'],
+)
+CACHE_ENTRIES = registry.gauge(
+    'match_result_cache_entries',
+    'Current number of entries in the result cache',
+    ['cache'],
+)
+
+_MISSING = object()
+
+
+def content_hash(value: Any) -> str:
+    """Hash ổn định của một object JSON-serializable (thứ tự key không ảnh hưởng)"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache có giới hạn số entries, thread-safe.
+    
+    Args:
+        name: Tên cache (label trong metrics)
+        max_entries: Số entries tối đa (0 = tắt cache)
+    """
+    
+    def __init__(self, name: str, max_entries: int = 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        CACHE_ENTRIES.set(0, cache=name)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Lấy value theo key (None nếu miss)"""
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if value is _MISSING:
+            CACHE_REQUESTS.inc(cache=self.name, result='miss')
+            return None
+        CACHE_REQUESTS.inc(cache=self.name, result='hit')
+        return value
+    
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            size = len(self._entries)
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted, cache=self.name, reason='lru')
+        CACHE_ENTRIES.set(size, cache=self.name)
+    
+    def clear(self, *_):
+        """Xóa toàn bộ entries (dùng làm listener khi store reload)"""
+        with self._lock:
+            evicted = len(self._entries)
+            self._entries.clear()
+        if evicted:
+            CACHE_EVICTIONS.inc(evicted, cache=self.name, reason='invalidated')
+        CACHE_ENTRIES.set(0, cache=self.name)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def get_stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0,
+        }
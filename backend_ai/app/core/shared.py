@@ -0,0 +1,144 @@
+"""
+Caregiver table dùng chung giữa các uvicorn workers.
+
+Mỗi worker là một process riêng; nếu worker nào cũng tự parse caregivers.json
+thì fleet, indexes và embeddings bị nhân lên theo số workers. SharedSnapshotDirectory
+giữ các snapshot (app/core/snapshot.py) theo generation trong một thư mục dùng
+chung (nên đặt trong /dev/shm, tức tmpfs / named shared memory trên Linux):
+
+    <dir>/gen-00000001.snap
+    <dir>/gen-00000002.snap
+    <dir>/CURRENT            -> "2"
+
+Worker attach bằng cách mmap read-only generation hiện tại, nên các trang
+nhớ nằm trong page cache và được chia sẻ giữa các processes (RSS không nhân
+theo số workers). Khi file nguồn thay đổi, worker đầu tiên phát hiện (giữ file
+lock) build generation mới kèm embeddings, rồi đổi CURRENT bằng rename atomic;
+các workers khác thấy CURRENT đổi thì remap sang generation mới. Mapping cũ
+vẫn hợp lệ đến khi được giải phóng, kể cả khi file đã bị xóa.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from app.core.snapshot import SnapshotError, check_source, load_snapshot, read_header, write_snapshot
+from app.core.table import CaregiverTable
+
+try:
+    import fcntl
+except ImportError:  # Windows: không có file lock, có thể build trùng nhưng vẫn đúng nhờ rename atomic
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = '.lock'
+KEEP_GENERATIONS = 2
+
+
+class _FileLock:
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class SharedSnapshotDirectory:
+    """
+    Thư mục chứa các generations snapshot của một file caregivers.
+
+    Args:
+        path: Thư mục dùng chung (tạo nếu chưa có)
+        verify: Kiểm tra CRC32 khi attach
+    """
+
+    def __init__(self, path: Path, verify: bool = True):
+        self.path = Path(path)
+        self.verify = verify
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def generation_path(self, generation: int) -> Path:
+        return self.path / f'gen-{generation:08d}.snap'
+
+    def current_generation(self) -> int:
+        """Generation hiện tại (0 nếu chưa publish lần nào)"""
+        try:
+            return int((self.path / CURRENT_FILE).read_text().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def marker(self) -> Optional[Tuple[int, int]]:
+        """(inode, mtime_ns) của CURRENT: đổi mỗi khi có generation mới, chỉ tốn một stat()"""
+        try:
+            stat = os.stat(self.path / CURRENT_FILE)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _is_current(self, generation: int, source: Path) -> bool:
+        path = self.generation_path(generation)
+        if not generation or not path.exists():
+            return False
+        try:
+            with open(path, 'rb') as f:
+                header, _ = read_header(f.read(1 << 20))
+            check_source(header, source)
+        except (OSError, SnapshotError):
+            return False
+        return True
+
+    def _publish(self, table: CaregiverTable, source: Path, embeddings) -> int:
+        generation = self.current_generation() + 1
+        write_snapshot(table, self.generation_path(generation), source=source, embeddings=embeddings)
+
+        tmp_path = self.path / (CURRENT_FILE + '.tmp')
+        tmp_path.write_text(str(generation))
+        os.replace(tmp_path, self.path / CURRENT_FILE)
+
+        for old in self.path.glob('gen-*.snap'):
+            try:
+                if int(old.stem.split('-')[1]) <= generation - KEEP_GENERATIONS:
+                    old.unlink()
+            except (OSError, ValueError):
+                pass
+        logger.info("Published caregiver generation %d (%d rows) to %s", generation, table.n, self.path)
+        return generation
+
+    def attach(self, source: Path, build: Callable[[], CaregiverTable],
+               embed: Optional[Callable[[CaregiverTable], object]] = None) -> Tuple[CaregiverTable, Dict]:
+        """
+        Map generation hiện tại của source; build + publish generation mới nếu stale
+
+        Args:
+            source: File caregivers nguồn
+            build: Load table từ source (chỉ gọi khi cần publish)
+            embed: Tính embeddings (texts, matrix) cho table để ghi kèm, có thể trả về None
+
+        Returns:
+            (table read-only map từ shared snapshot, info có thêm 'generation')
+        """
+        source = Path(source)
+        with _FileLock(self.path / LOCK_FILE):
+            generation = self.current_generation()
+            published = False
+            if not self._is_current(generation, source):
+                table = build()
+                generation = self._publish(table, source, embed(table) if embed else None)
+                published = True
+            table, info = load_snapshot(self.generation_path(generation), verify=self.verify)
+        info['generation'] = generation
+        info['published'] = published
+        return table, info
@@ -0,0 +1,87 @@
+"""
+Single-flight cho các lời gọi match giống nhau chạy đồng thời.
+
+Khi nhiều requests có cùng key (cùng care request đã normalize, top_n, dữ liệu)
+đến trong lúc một lần tính đang chạy, chúng await kết quả của lần tính đó thay
+vì tính lại. Khác với ResultCache, kết quả không được giữ lại sau khi lần tính
+xong: chỉ gộp các lời gọi chồng lấn về thời gian.
+
+Hàm được chạy trong threadpool (không block event loop) dưới dạng task riêng,
+nên request khởi tạo bị hủy (client ngắt kết nối) không làm hỏng các requests
+đang chờ cùng key. Exception của lần tính được trả cho tất cả các callers.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import registry
+
+FLIGHT_CALLS = registry.counter(
+    'match_singleflight_calls_total',
+    'Calls through the single-flight layer by role (leader = computed, coalesced = awaited an in-flight call)',
+    ['flight', 'role'],
+)
+FLIGHT_INFLIGHT = registry.gauge(
+    'match_singleflight_inflight',
+    'Computations currently in flight',
+    ['flight'],
+)
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời cùng key thành một lần tính.
+
+    Chỉ dùng từ một event loop (các async endpoints của một worker).
+
+    Args:
+        name: Tên (label trong metrics)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        FLIGHT_INFLIGHT.set(0, flight=name)
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Trả về fn(*args, **kwargs), dùng chung với lời gọi cùng key đang chạy (nếu có)
+
+        Kết quả có thể được trả cho nhiều callers: caller không được sửa nó.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            FLIGHT_CALLS.inc(flight=self.name, role='coalesced')
+        else:
+            self.leaders += 1
+            FLIGHT_CALLS.inc(flight=self.name, role='leader')
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._inflight[key] = task
+            FLIGHT_INFLIGHT.set(len(self._inflight), flight=self.name)
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        FLIGHT_INFLIGHT.set(len(self._inflight), flight=self.name)
+        # Đánh dấu exception đã được xử lý nếu mọi callers đã bị hủy
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict:
+        total = self.leaders + self.coalesced
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": self.coalesced / total if total > 0 else 0,
+        }
@@ -0,0 +1,321 @@
+"""
+Binary snapshot của CaregiverTable.
+
+Parse JSON + compile toàn bộ fleet tốn thời gian ở mỗi lần worker khởi động.
+Snapshot lưu sẵn table đã compile (columns, ragged pools, string table, ids,
+documents dạng JSON bytes) vào một file có thể mmap: load chỉ đọc header rồi
+tạo numpy views trên mmap, documents được decode lazy khi truy cập.
+
+Format (little-endian):
+    MAGIC (8 bytes) | header_len (u32) | header JSON | padding | payload
+Header chứa format version, số rows, thông tin file nguồn (size, mtime_ns,
+sha256), CRC32 của payload và vị trí (offset, dtype, count) từng array.
+Mỗi array được align 64 bytes trong payload. Snapshot có thể kèm embeddings
+của skill names (ma trận float32) để các workers dùng chung thay vì tự tính.
+
+Snapshot stale (file nguồn đã đổi) hoặc hỏng -> SnapshotError, caller fallback
+về load JSON.
+
+CLI:
+    python -m app.core.snapshot build caregivers.json -o caregivers.snap
+    python -m app.core.snapshot info caregivers.snap
+    python -m app.core.snapshot verify caregivers.snap --source caregivers.json
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.ingest import load_caregiver_table
+from app.core.table import (
+    RAGGED_COLUMNS, SCALAR_COLUMNS, CaregiverTable, RaggedColumns, StringTable
+)
+
+MAGIC = b'CGSNAP\x00\x00'
+FORMAT_VERSION = 4
+ALIGNMENT = 64
+SNAPSHOT_SUFFIX = '.snap'
+
+
+class SnapshotError(Exception):
+    """Snapshot không dùng được (stale, sai version, checksum sai, ...)"""
+
+
+def default_snapshot_path(source: Path) -> Path:
+    """caregivers.json -> caregivers.snap"""
+    source = Path(source)
+    return source.with_suffix(SNAPSHOT_SUFFIX)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_info(path: Path) -> Dict:
+    stat = os.stat(path)
+    return {
+        'name': Path(path).name,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_sha256(path),
+    }
+
+
+def _table_arrays(table: CaregiverTable, embeddings=None) -> Dict[str, np.ndarray]:
+    """Tất cả arrays cần ghi, ragged pools được gather theo thứ tự row"""
+    n = table.n
+    arrays: Dict[str, np.ndarray] = {}
+    for name in SCALAR_COLUMNS:
+        arrays[f'scalar/{name}'] = table.columns[name][:n]
+    for group, ragged in table.ragged.items():
+        offsets, index = ragged.gather_index(n)
+        arrays[f'ragged/{group}/starts'] = offsets[:-1]
+        arrays[f'ragged/{group}/lengths'] = ragged.lengths[:n]
+        for field, values in ragged.values.items():
+            arrays[f'ragged/{group}/values/{field}'] = values[index]
+
+    docs = [table.document_bytes(row) for row in range(n)]
+    doc_lengths = np.fromiter((len(doc) for doc in docs), np.int64, count=n)
+    doc_starts = np.zeros(n, np.int64)
+    if n:
+        np.cumsum(doc_lengths[:-1], out=doc_starts[1:])
+    arrays['docs/pool'] = np.frombuffer(b''.join(docs), np.uint8)
+    arrays['docs/starts'] = doc_starts
+    arrays['docs/lengths'] = doc_lengths
+    arrays['strings'] = np.frombuffer(table.strings.to_blob(), np.uint8)
+    arrays['ids'] = np.frombuffer(StringTable.join_blob(table.ids), np.uint8)
+    if embeddings is not None:
+        texts, matrix = embeddings
+        arrays['embeddings/texts'] = np.frombuffer(StringTable.join_blob(texts), np.uint8)
+        arrays['embeddings/vectors'] = np.ascontiguousarray(matrix, np.float32).reshape(-1)
+    return arrays
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_snapshot(table: CaregiverTable, path: Path, source: Optional[Path] = None,
+                   embeddings: Optional[Tuple[List[str], np.ndarray]] = None) -> Dict:
+    """
+    Ghi table ra snapshot file (ghi file tạm rồi rename để atomic)
+
+    Args:
+        table: Table cần ghi
+        path: Snapshot file
+        source: File nguồn (lưu size/mtime/sha256 để phát hiện stale)
+        embeddings: (texts, matrix [len(texts), dim]) embeddings kèm theo
+
+    Returns:
+        Header đã ghi
+    """
+    path = Path(path)
+    arrays = _table_arrays(table, embeddings)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'count': int(array.size)}
+        offset += array.nbytes
+    payload_size = offset
+
+    payload = bytearray(payload_size)
+    for name, array in arrays.items():
+        start = layout[name]['offset']
+        payload[start:start + array.nbytes] = np.ascontiguousarray(array).tobytes()
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'rows': table.n,
+        'source': source_info(source) if source is not None else None,
+        'payload_size': payload_size,
+        'payload_crc32': zlib.crc32(payload),
+        'embedding_dim': int(embeddings[1].shape[1]) if embeddings is not None else None,
+        'arrays': layout,
+    }
+    header_bytes = json.dumps(header, sort_keys=True).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes
+    padding = _align(len(prefix)) - len(prefix)
+
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(b'\x00' * padding)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(mm) -> Tuple[Dict, int]:
+    """(header, offset bắt đầu payload)"""
+    if len(mm) < len(MAGIC) + 4 or mm[:len(MAGIC)] != MAGIC:
+        raise SnapshotError("Không phải caregiver snapshot (sai magic)")
+    (header_len,) = struct.unpack('<I', mm[len(MAGIC):len(MAGIC) + 4])
+    start = len(MAGIC) + 4
+    try:
+        header = json.loads(bytes(mm[start:start + header_len]).decode('utf-8'))
+    except ValueError as e:
+        raise SnapshotError(f"Header hỏng: {e}") from e
+    if header.get('format_version') != FORMAT_VERSION:
+        raise SnapshotError(
+            f"Format version {header.get('format_version')} không được hỗ trợ (cần {FORMAT_VERSION})"
+        )
+    return header, _align(start + header_len)
+
+
+def check_source(header: Dict, source: Path):
+    """Raise SnapshotError nếu file nguồn đã thay đổi so với lúc build snapshot"""
+    info = header.get('source')
+    if not info:
+        raise SnapshotError("Snapshot không ghi thông tin file nguồn")
+    stat = os.stat(source)
+    if stat.st_size != info['size']:
+        raise SnapshotError(f"Snapshot stale: {Path(source).name} đã thay đổi (size)")
+    if stat.st_mtime_ns != info['mtime_ns'] and file_sha256(source) != info['sha256']:
+        raise SnapshotError(f"Snapshot stale: {Path(source).name} đã thay đổi (sha256)")
+
+
+def load_snapshot(path: Path, source: Optional[Path] = None, verify: bool = True) -> Tuple[CaregiverTable, Dict]:
+    """
+    Map snapshot file thành CaregiverTable (read-only, copy-on-write khi sửa)
+
+    Args:
+        path: Snapshot file
+        source: File nguồn để kiểm tra stale (None = không kiểm tra)
+        verify: Kiểm tra CRC32 của payload
+
+    Raises:
+        SnapshotError: Snapshot không dùng được
+    """
+    start_time = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Không mở được snapshot {path}: {e}") from e
+
+    header, payload_start = read_header(mm)
+    if source is not None:
+        check_source(header, source)
+    if len(mm) < payload_start + header['payload_size']:
+        raise SnapshotError("Snapshot bị cắt cụt")
+    if verify:
+        payload = memoryview(mm)[payload_start:payload_start + header['payload_size']]
+        try:
+            if zlib.crc32(payload) != header['payload_crc32']:
+                raise SnapshotError("Checksum payload không khớp")
+        finally:
+            payload.release()
+
+    def array(name: str) -> np.ndarray:
+        spec = header['arrays'][name]
+        if spec['count'] == 0:
+            return np.empty(0, np.dtype(spec['dtype']))
+        return np.frombuffer(mm, dtype=np.dtype(spec['dtype']), count=spec['count'],
+                             offset=payload_start + spec['offset'])
+
+    n = header['rows']
+    table = CaregiverTable.__new__(CaregiverTable)
+    table.n = n
+    table.capacity = n
+    table.strings = StringTable.from_blob(array('strings'))
+    table.ids = StringTable.split_blob(array('ids'))
+    table.columns = {name: array(f'scalar/{name}') for name in SCALAR_COLUMNS}
+    table.ragged = {
+        group: RaggedColumns.from_arrays(
+            fields,
+            {field: array(f'ragged/{group}/values/{field}') for field in fields},
+            array(f'ragged/{group}/starts'),
+            array(f'ragged/{group}/lengths'),
+        )
+        for group, fields in RAGGED_COLUMNS.items()
+    }
+    table._docs = [None] * n
+    table._match_docs = [None] * n
+    table.doc_pool = array('docs/pool')
+    table.doc_starts = array('docs/starts')
+    table.doc_lengths = array('docs/lengths')
+    table.writable = False
+    table.generation = 0
+    table.embeddings = None
+    if header.get('embedding_dim'):
+        table.embeddings = (
+            StringTable.split_blob(array('embeddings/texts')),
+            array('embeddings/vectors').reshape(-1, header['embedding_dim']),
+        )
+
+    info = {
+        'path': str(path),
+        'rows': n,
+        'bytes': len(mm),
+        'created_at': header['created_at'],
+        'verified': verify,
+        'seconds': round(time.perf_counter() - start_time, 6),
+    }
+    return table, info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caregiver binary snapshot")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help="Build snapshot từ caregivers JSON/NDJSON")
+    build.add_argument('source')
+    build.add_argument('-o', '--output', help="Mặc định: <source>.snap")
+
+    info = sub.add_parser('info', help="In header của snapshot")
+    info.add_argument('snapshot')
+
+    verify = sub.add_parser('verify', help="Kiểm tra checksum (và stale nếu có --source)")
+    verify.add_argument('snapshot')
+    verify.add_argument('--source')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        source = Path(args.source)
+        output = Path(args.output) if args.output else default_snapshot_path(source)
+        table, report = load_caregiver_table(source)
+        start = time.perf_counter()
+        header = write_snapshot(table, output, source=source)
+        print(f"Ingest: {report.records} caregivers in {report.seconds:.2f}s"
+              + (f" ({report.skipped} malformed records skipped)" if report.skipped else ""))
+        print(f"Wrote {output} ({os.path.getsize(output) / 1e6:.1f} MB, {header['rows']} rows) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    try:
+        if args.command == 'info':
+            with open(args.snapshot, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header, _ = read_header(mm)
+            print(json.dumps({k: v for k, v in header.items() if k != 'arrays'}, indent=2))
+            return 0
+
+        _, loaded = load_snapshot(Path(args.snapshot), Path(args.source) if args.source else None)
+        print(f"OK: {loaded['rows']} rows, loaded in {loaded['seconds'] * 1000:.1f}ms")
+        return 0
+    except SnapshotError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Static feature scores: các soft scores chỉ phụ thuộc vào caregiver.
+
+Rating (Bayesian average), experience và trust không phụ thuộc care request nên
+được tính một lần khi compile caregiver vào CaregiverTable (ingest / upsert) và
+lưu thành scalar columns. Matcher chỉ còn tính các features phụ thuộc request
+(credential theo care level, skills, distance, price) lúc query.
+
+Giá trị không tính sẵn được (dữ liệu sai kiểu làm công thức raise) lưu NaN:
+matcher tính lại lúc query để giữ nguyên hành vi (kể cả lỗi) như trước.
+"""
+
+import math
+from typing import Any, Dict, Tuple
+
+# Feature -> scalar column trong CaregiverTable (thứ tự của static_scores())
+STATIC_FEATURES = ('rating', 'experience', 'trust')
+STATIC_SCORE_COLUMNS = tuple(f'{feature}_score' for feature in STATIC_FEATURES)
+
+
+def rating_score(cg: Dict) -> float:
+    """
+    Tính điểm rating sử dụng Bayesian Average.
+
+    Logic:
+        - Bayesian Average: (total_rating + C * m) / (total_reviews + C)
+        - C: Confidence constant (25)
+        - m: Mean rating của platform (3.5)
+        - Công bằng giữa rating và số lượng reviews
+    """
+    ratings_reviews = cg.get('ratings_reviews', cg)
+    total_reviews = ratings_reviews.get('total_reviews', cg.get('total_reviews', 0))
+
+    # Nếu không có reviews, trả về điểm mặc định
+    if total_reviews == 0:
+        return 0.5
+
+    # Tính total_rating từ rating_breakdown nếu có
+    rating_breakdown = ratings_reviews.get('rating_breakdown', {})
+    if rating_breakdown:
+        # Tính tổng điểm từ breakdown
+        total_rating = (
+            rating_breakdown.get('5_star', 0) * 5 +
+            rating_breakdown.get('4_star', 0) * 4 +
+            rating_breakdown.get('3_star', 0) * 3 +
+            rating_breakdown.get('2_star', 0) * 2 +
+            rating_breakdown.get('1_star', 0) * 1
+        )
+    else:
+        # Fallback: dùng overall_rating * total_reviews
+        overall_rating = ratings_reviews.get('overall_rating', cg.get('rating', 4.0))
+        total_rating = overall_rating * total_reviews
+
+    # Bayesian constants
+    C = 25  # Confidence constant
+    m = 3.5  # Mean rating của platform
+
+    # Bayesian average calculation
+    bayesian_rating = (total_rating + C * m) / (total_reviews + C)
+
+    # Normalize về 0-1
+    return min(1.0, bayesian_rating / 5.0)
+
+
+def experience_score(years_experience: Any) -> float:
+    """Điểm kinh nghiệm: years / 10, min 0.1 cho caregiver mới, max 1.0"""
+    return min(1.0, max(0.1, years_experience / 10.0))
+
+
+def caregiver_years_experience(cg: Dict) -> Any:
+    """years_experience của caregiver (nested professional_info hoặc flat format)"""
+    professional_info = cg.get('professional_info', cg)
+    return professional_info.get('years_experience', cg.get('years_experience'))
+
+
+def trust_score(cg: Dict) -> float:
+    """
+    Tính trust score dựa trên booking history và verification
+
+    Factors:
+        - Completion rate (40%): Tỷ lệ hoàn thành booking
+        - Seeker cancel rate (30%): Tỷ lệ hủy bởi seeker (càng thấp càng tốt)
+        - Total bookings (20%): Số lượng booking (kinh nghiệm thực tế)
+        - Verification (10%): Xác minh danh tính
+    """
+    booking_history = cg.get('booking_history', {})
+    verification = cg.get('verification', {})
+
+    # 1. Completion rate component (40%)
+    completion_rate = booking_history.get('completion_rate', 0.0)
+    completion_component = completion_rate
+
+    # 2. Seeker cancel rate component (30%) - càng thấp càng tốt
+    seeker_cancel_rate = booking_history.get('seeker_cancel_rate', 0.0)
+    # Invert: 0% cancel = 1.0, 15% cancel = 0.0
+    cancel_component = max(0.0, 1.0 - (seeker_cancel_rate * 6.67))
+
+    # 3. Total bookings component (20%)
+    total_bookings = booking_history.get('total_bookings', 0)
+    if total_bookings >= 100:
+        bookings_component = 1.0
+    elif total_bookings >= 50:
+        bookings_component = 0.8
+    elif total_bookings >= 20:
+        bookings_component = 0.6
+    elif total_bookings >= 10:
+        bookings_component = 0.4
+    else:
+        bookings_component = 0.2
+
+    # 4. Verification component (10%)
+    identity_verified = verification.get('identity_verified', False)
+    verification_component = 1.0 if identity_verified else 0.5
+
+    # Weighted combination
+    trust = (
+        0.4 * completion_component +
+        0.3 * cancel_component +
+        0.2 * bookings_component +
+        0.1 * verification_component
+    )
+
+    return min(1.0, trust)
+
+
+def _precompute(fn, *args) -> float:
+    try:
+        value = fn(*args)
+    except Exception:
+        return math.nan
+    # Chỉ lưu float: kiểu khác (int, numpy, ...) để matcher tính lại y như cũ
+    return value if type(value) is float else math.nan
+
+
+def static_scores(cg: Dict) -> Tuple[float, float, float]:
+    """
+    (rating, experience, trust) của caregiver, NaN cho score không tính sẵn được
+
+    Dùng đúng các công thức của RuleBasedMatcher nên giá trị giống hệt (từng bit)
+    với khi tính lúc query.
+    """
+    return (
+        _precompute(rating_score, cg),
+        _precompute(experience_score, caregiver_years_experience(cg)),
+        _precompute(trust_score, cg),
+    )
@@ -0,0 +1,372 @@
+"""
+In-memory data stores cho caregivers / care requests.
+
+JsonFileStore giữ nội dung file JSON trong memory và chỉ đọc lại khi file
+thay đổi (mtime/size). Mỗi lần reload tăng `version`, và các listeners
+(ví dụ result cache) được báo để invalidate.
+
+CaregiverStore giữ caregivers dạng CaregiverTable (app/core/table.py), load
+từ binary snapshot nếu có (app/core/snapshot.py), và hỗ trợ upsert/delete từng
+caregiver với index maintenance incremental (xem app/core/indexes.py).
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.candidates import CandidateRows, generate_candidates
+from app.core.ingest import IngestReport, load_caregiver_table
+from app.core.shared import SharedSnapshotDirectory
+from app.core.snapshot import SnapshotError, default_snapshot_path, load_snapshot
+from app.core.table import CaregiverTable
+
+logger = logging.getLogger(__name__)
+
+
+class JsonFileStore:
+    """
+    Cache nội dung một file JSON, reload tự động khi file thay đổi.
+    
+    Args:
+        path: Đường dẫn file JSON
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.version = 0
+        self._data: Any = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._listeners: List[Callable[['JsonFileStore'], None]] = []
+        self._lock = threading.RLock()
+    
+    def _file_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read(self) -> Any:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def get(self) -> Any:
+        """Trả về dữ liệu hiện tại (reload nếu file đã thay đổi)"""
+        signature = self._file_signature()
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._set_data(self._read(), signature)
+        return self._data
+    
+    def reload(self) -> Any:
+        """Buộc đọc lại file"""
+        with self._lock:
+            self._set_data(self._read(), self._file_signature())
+        return self._data
+    
+    def _set_data(self, data: Any, signature: Optional[Tuple[int, int]]):
+        self._data = data
+        self._signature = signature
+        self.version += 1
+        self._notify()
+    
+    def add_listener(self, listener: Callable[['JsonFileStore'], None]):
+        """Đăng ký callback được gọi mỗi khi dữ liệu đổi version"""
+        self._listeners.append(listener)
+    
+    def _notify(self):
+        for listener in list(self._listeners):
+            listener(self)
+
+
+class CaregiverStore(JsonFileStore):
+    """
+    Store caregivers hỗ trợ upsert/delete từng profile.
+
+    Profiles nằm trong một CaregiverTable (slot = row), id -> slot map cho
+    lookup O(1). get() trả về view dạng sequence các caregiver dicts của table.
+    Delete dùng swap-remove (chuyển profile cuối vào slot bị xóa) để rows luôn
+    dense. Mỗi thay đổi cập nhật các indexes (spatial, skills, availability, ...)
+    qua add/remove của đúng slot đó thay vì rebuild. Index chỉ được build lần
+    đầu khi được dùng (index(name)).
+
+    Khi load, nếu có snapshot (mặc định <file>.snap cạnh file caregivers) còn
+    khớp với file nguồn thì map snapshot thay vì parse JSON; snapshot stale
+    hoặc hỏng thì fallback về load JSON theo stream (xem app/core/ingest.py).
+
+    Với shared directory (nhiều uvicorn workers), table được map từ generation
+    hiện tại trong thư mục dùng chung (xem app/core/shared.py) thay vì mỗi
+    worker tự load; khi generation đổi, store reload như khi file thay đổi.
+
+    Thay đổi qua upsert/delete chỉ nằm trong memory của process: nếu file JSON
+    trên đĩa thay đổi, store reload từ file và các thay đổi trước đó bị bỏ.
+
+    Args:
+        path: Đường dẫn file caregivers (JSON array hoặc NDJSON)
+        indexes: Các CaregiverIndex được maintain cùng store
+        snapshot_path: Binary snapshot của file (None = <path>.snap)
+        verify_snapshot: Kiểm tra checksum snapshot khi load
+        shared_dir: Thư mục snapshot dùng chung giữa workers (None = không dùng)
+    """
+
+    def __init__(self, path: Path, indexes: Optional[List[Any]] = None,
+                 snapshot_path: Optional[Path] = None, verify_snapshot: bool = True,
+                 shared_dir: Optional[Path] = None):
+        super().__init__(path)
+        self.indexes = list(indexes or [])
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else default_snapshot_path(self.path)
+        self.verify_snapshot = verify_snapshot
+        self.shared = SharedSnapshotDirectory(shared_dir, verify=verify_snapshot) if shared_dir else None
+        self.table: Optional[CaregiverTable] = None
+        self._built: set = set()
+        self._slot_by_id: Dict[str, int] = {}
+        self.last_ingest: Optional[IngestReport] = None
+        self.last_snapshot: Optional[Dict] = None
+
+    def _file_signature(self) -> Tuple:
+        signature = super()._file_signature()
+        if self.shared is not None:
+            signature += (self.shared.marker(),)
+        return signature
+
+    def _read(self) -> CaregiverTable:
+        if self.shared is None:
+            return self._load_local()
+        table, self.last_snapshot = self.shared.attach(self.path, self._load_local, self._export_embeddings)
+        if not self.last_snapshot['published']:
+            self.last_ingest = None
+        return table
+
+    def _export_embeddings(self, table: CaregiverTable):
+        for index in self.indexes:
+            if hasattr(index, 'export'):
+                return index.export(table)
+        return None
+
+    def _load_local(self) -> CaregiverTable:
+        if self.snapshot_path.exists():
+            try:
+                table, self.last_snapshot = load_snapshot(
+                    self.snapshot_path, source=self.path, verify=self.verify_snapshot
+                )
+                self.last_ingest = None
+                logger.info(
+                    "Loaded %d caregivers from snapshot %s in %.1fms",
+                    table.n, self.snapshot_path.name, self.last_snapshot['seconds'] * 1000
+                )
+                return table
+            except SnapshotError as e:
+                logger.warning("Bỏ qua snapshot %s: %s (load từ %s)", self.snapshot_path.name, e, self.path.name)
+
+        # Streaming loader (JSON array hoặc NDJSON), compile từng record vào table
+        self.last_snapshot = None
+        table, self.last_ingest = load_caregiver_table(self.path)
+        return table
+
+    def _set_data(self, table: CaregiverTable, signature: Optional[Tuple]):
+        if self.shared is not None:
+            # Generation có thể vừa được publish trong _read: lấy marker mới nhất
+            signature = self._file_signature()
+        self.table = table
+        self._slot_by_id = dict(zip(table.ids, range(table.n)))
+        self._built = set()
+        super()._set_data(table.documents(), signature)
+
+    def _bump(self):
+        self.version += 1
+        self._notify()
+
+    def __len__(self) -> int:
+        return len(self.get())
+
+    def get_by_id(self, caregiver_id: str) -> Optional[Dict]:
+        data = self.get()
+        slot = self._slot_by_id.get(caregiver_id)
+        return data[slot] if slot is not None else None
+
+    def candidates(self) -> Tuple[List[Dict], List[List[float]]]:
+        """
+        Snapshot toàn bộ caregivers cho matcher
+
+        Returns:
+            (list caregiver dicts - match documents, skills đã normalize, dùng
+            chung giữa requests -, static scores (rating, experience, trust) cùng thứ tự)
+        """
+        self.get()
+        return self.table.match_documents(), self.table.static_scores()
+
+    def candidates_for(self, care_request: Dict) -> Tuple[List[Dict], List[List[float]], Optional[CandidateRows]]:
+        """
+        candidates() kèm CandidateRows từ indexes cho care request
+
+        Tính dưới lock của store: bitmaps khớp đúng với list caregivers trả về
+        (upsert/delete không chen vào giữa).
+
+        Returns:
+            (caregivers, static scores, CandidateRows hoặc None - xem
+            app/core/candidates.py)
+        """
+        with self._lock:
+            caregivers, static_scores = self.candidates()
+            return caregivers, static_scores, generate_candidates(self.index, care_request, len(caregivers))
+
+    def resolve(self, refs: Iterable[Tuple[str, Optional[str]]]) -> Tuple[List[Dict], List[str], List[List[float]]]:
+        """
+        Lấy caregivers theo (id, updated_at)
+
+        Args:
+            refs: (id, updated_at); updated_at None = không kiểm tra version
+
+        Returns:
+            (caregivers tìm thấy theo thứ tự refs (match documents, xem
+            candidates()), ids không có trong store hoặc
+            có updated_at khác với bản trong store, static scores của caregivers
+            tìm thấy)
+        """
+        data = self.get()
+        found: List[Dict] = []
+        slots: List[int] = []
+        unresolved: List[str] = []
+        for caregiver_id, updated_at in refs:
+            slot = self._slot_by_id.get(caregiver_id)
+            cg = data[slot] if slot is not None else None
+            if cg is None or (updated_at is not None and cg.get('updated_at') != updated_at):
+                unresolved.append(caregiver_id)
+            else:
+                found.append(self.table.match_document(slot))
+                slots.append(slot)
+        return found, unresolved, self.table.static_scores(slots)
+
+    def slot_of(self, caregiver_id: str) -> Optional[int]:
+        self.get()
+        return self._slot_by_id.get(caregiver_id)
+
+    def index(self, name: str) -> Any:
+        """Index theo tên (ví dụ 'spatial', 'skills', 'availability'), build nếu chưa có"""
+        self.get()
+        for index in self.indexes:
+            if index.name == name:
+                if name not in self._built:
+                    with self._lock:
+                        if name not in self._built:
+                            index.build(self.table)
+                            self._built.add(name)
+                return index
+        raise KeyError(name)
+
+    def _built_indexes(self) -> List[Any]:
+        return [index for index in self.indexes if index.name in self._built]
+
+    def _upsert(self, cg: Dict) -> bool:
+        caregiver_id = cg.get('id') if isinstance(cg, dict) else None
+        if not caregiver_id or not isinstance(caregiver_id, str):
+            raise ValueError("Caregiver phải là object có field 'id' (string)")
+
+        indexes = self._built_indexes()
+        slot = self._slot_by_id.get(caregiver_id)
+        if slot is None:
+            slot = self.table.append(cg)
+            self._slot_by_id[caregiver_id] = slot
+            for index in indexes:
+                index.add(self.table, slot)
+            return True
+
+        for index in indexes:
+            index.remove(self.table, slot)
+        try:
+            self.table.set_row(slot, cg)
+        finally:
+            # set_row lỗi thì row giữ nguyên: add lại bản cũ vào indexes
+            for index in indexes:
+                index.add(self.table, slot)
+        return False
+
+    def upsert(self, cg: Dict) -> bool:
+        """
+        Thêm mới hoặc thay thế một caregiver (theo id)
+
+        Returns:
+            True nếu caregiver mới được tạo, False nếu là update
+
+        Raises:
+            ValueError: Caregiver sai format (store giữ nguyên)
+        """
+        with self._lock:
+            self.get()
+            created = self._upsert(cg)
+            self._bump()
+        return created
+
+    def upsert_many(self, caregivers: Iterable[Dict]) -> Dict[str, Any]:
+        """
+        Upsert nhiều caregivers, chỉ tăng version một lần
+
+        Caregiver sai format (ValueError của upsert) được bỏ qua, các caregivers
+        khác vẫn được áp dụng. Version tăng khi có ít nhất một thay đổi, kể cả
+        khi batch dừng giữa chừng vì lỗi khác.
+
+        Returns:
+            {'created': ..., 'updated': ..., 'failed': [(vị trí trong caregivers,
+            thông báo lỗi)]}
+        """
+        counts = {'created': 0, 'updated': 0}
+        failed: List[Tuple[int, str]] = []
+        with self._lock:
+            self.get()
+            try:
+                for position, cg in enumerate(caregivers):
+                    try:
+                        created = self._upsert(cg)
+                    except ValueError as e:
+                        failed.append((position, str(e)))
+                        continue
+                    counts['created' if created else 'updated'] += 1
+            finally:
+                if counts['created'] or counts['updated']:
+                    self._bump()
+        return {**counts, 'failed': failed}
+
+    def delete(self, caregiver_id: str) -> bool:
+        """
+        Xóa một caregiver (swap-remove)
+
+        Returns:
+            False nếu không tìm thấy caregiver
+        """
+        with self._lock:
+            self.get()
+            slot = self._slot_by_id.pop(caregiver_id, None)
+            if slot is None:
+                return False
+
+            indexes = self._built_indexes()
+            last_slot = self.table.n - 1
+            for index in indexes:
+                index.remove(self.table, slot)
+            if slot != last_slot:
+                for index in indexes:
+                    index.remove(self.table, last_slot)
+
+            self.table.swap_remove(slot)
+            if slot != last_slot:
+                self._slot_by_id[self.table.ids[slot]] = slot
+                for index in indexes:
+                    index.add(self.table, slot)
+            self._bump()
+        return True
+
+    def stats(self) -> Dict:
+        data = self.get()
+        return {
+            'total': len(data),
+            'version': self.version,
+            'source': 'shared' if self.shared else 'snapshot' if self.last_snapshot else 'json',
+            'generation': self.last_snapshot.get('generation') if self.last_snapshot else None,
+            'last_ingest': self.last_ingest.to_dict() if self.last_ingest else None,
+            'last_snapshot': self.last_snapshot,
+            'indexes': {
+                index.name: index.stats() if index.name in self._built else None
+                for index in self.indexes
+            },
+        }
@@ -0,0 +1,628 @@
+"""
+Columnar caregiver table.
+
+Mỗi caregiver được compile một lần (lúc ingest / upsert) thành:
+- scalar columns (numpy arrays, một phần tử mỗi row): location, age, rating, ...
+- ragged columns (nhiều giá trị mỗi row: skills, credentials, schedule, ...),
+  lưu dạng pool + (start, length) của từng row
+- string table dùng chung (skill names, gender, credential type/status, ...)
+- document gốc (dict) để trả về API, decode lazy nếu table được map từ binary
+  snapshot
+- match document cho matcher: document gốc với skills đã normalize (chính
+  document gốc nếu không cần normalize), tính một lần lúc ingest / upsert
+
+Row = slot trong CaregiverStore. Xóa row dùng swap-remove (row cuối chuyển vào
+chỗ trống) nên các row luôn dense 0..n-1.
+
+Giá trị thiếu: NaN cho float columns, -1 cho string ids.
+"""
+
+import json
+import math
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.algorithms.semantic_matcher import normalize_skill_name, normalized_caregiver
+from app.core.static_scores import STATIC_SCORE_COLUMNS, static_scores
+from app.utils.time_utils import time_to_minutes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MISSING = -1
+INITIAL_CAPACITY = 16
+
+# name -> dtype
+SCALAR_COLUMNS = {
+    'lat': np.float64,
+    'lon': np.float64,
+    'service_radius_km': np.float64,
+    'age': np.float64,
+    'gender': np.int32,
+    'years_experience': np.float64,
+    'hourly_rate': np.float64,
+    'overall_rating': np.float64,
+    'total_reviews': np.float64,
+    'has_rating_breakdown': np.bool_,
+    'rating_5_star': np.float64,
+    'rating_4_star': np.float64,
+    'rating_3_star': np.float64,
+    'rating_2_star': np.float64,
+    'rating_1_star': np.float64,
+    'completion_rate': np.float64,
+    'seeker_cancel_rate': np.float64,
+    'total_bookings': np.float64,
+    'identity_verified': np.bool_,
+    'elderly_age_min': np.float64,
+    'elderly_age_max': np.float64,
+    # preferred_health_status là string: Filter 7 so substring, không theo từng giá trị
+    'health_status_text': np.bool_,
+    # Bit theo NON_NUMERIC_FIELDS: giá trị gốc không phải số (filters so sánh khác column / raise)
+    'non_numeric': np.int32,
+    # Static feature scores (app/core/static_scores.py), NaN = matcher tính lúc query
+    'rating_score': np.float64,
+    'experience_score': np.float64,
+    'trust_score': np.float64,
+}
+
+# Fields số có giá trị gốc được kiểm tra kiểu (bit i của column non_numeric)
+NON_NUMERIC_FIELDS = ('age', 'years_experience', 'overall_rating', 'hourly_rate', 'elderly_age_preference')
+
+# group -> {field -> dtype}; các fields trong một group dùng chung (start, length)
+RAGGED_COLUMNS = {
+    'skills': {'name': np.int32, 'has_credential': np.bool_},
+    'credentials': {
+        'type': np.int32,
+        'status': np.int32,
+        'expiry': np.float64,       # epoch seconds, NaN = không có, -inf = sai format
+        'levels_mask': np.int32,    # bit L = applicable level L
+        'levels_count': np.int32,   # len(applicable_levels)
+    },
+    'schedule': {'day': np.int32, 'start': np.int32, 'end': np.int32},
+    'health_status': {'value': np.int32},
+}
+
+
+def _float(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return math.nan if value is None else float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _minutes(value: Any) -> int:
+    try:
+        return time_to_minutes(value)
+    except (AttributeError, TypeError, ValueError):
+        return MISSING
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def non_numeric_flags(raw: Dict[str, Any]) -> int:
+    """Bitmask NON_NUMERIC_FIELDS của các giá trị gốc (None = không có) không phải số"""
+    flags = 0
+    for bit, name in enumerate(NON_NUMERIC_FIELDS):
+        value = raw[name]
+        if name == 'elderly_age_preference':
+            # Filter 8 unpack (min, max) khi preference truthy
+            numeric = not value or (isinstance(value, (list, tuple)) and len(value) == 2
+                                    and all(_is_number(v) for v in value))
+        else:
+            numeric = value is None or _is_number(value)
+        if not numeric:
+            flags |= 1 << bit
+    return flags
+
+
+def expiry_timestamp(value: Any) -> float:
+    """expiry_date -> epoch seconds (NaN nếu không có, -inf nếu sai format)"""
+    if not value:
+        return math.nan
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return -math.inf
+
+
+def _dumps(doc: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(doc)
+    return json.dumps(doc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw) -> Dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(bytes(raw))
+
+
+class StringTable:
+    """
+    Append-only string table: string <-> int id.
+
+    Serialize thành một blob UTF-8, mỗi string kết thúc bằng NUL; dict string -> id chỉ
+    được build khi cần lookup (load từ snapshot không tốn thời gian build).
+    """
+
+    SEPARATOR = '\x00'
+
+    def __init__(self, strings: Optional[List[str]] = None):
+        self._strings: List[str] = list(strings or [])
+        self._ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def split_blob(cls, blob) -> List[str]:
+        """Blob (mỗi string kết thúc bằng NUL) -> list strings"""
+        return bytes(blob).decode('utf-8').split(cls.SEPARATOR)[:-1]
+
+    @classmethod
+    def join_blob(cls, strings: List[str]) -> bytes:
+        return ''.join(s + cls.SEPARATOR for s in strings).encode('utf-8')
+
+    @classmethod
+    def from_blob(cls, blob) -> 'StringTable':
+        return cls(cls.split_blob(blob))
+
+    def to_blob(self) -> bytes:
+        return self.join_blob(self._strings)
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def get(self, string_id: int) -> Optional[str]:
+        return self._strings[string_id] if string_id >= 0 else None
+
+    def _index(self) -> Dict[str, int]:
+        if self._ids is None:
+            self._ids = {s: i for i, s in enumerate(self._strings)}
+        return self._ids
+
+    def lookup(self, value: Optional[str]) -> int:
+        """ID của string, MISSING nếu chưa có"""
+        if value is None:
+            return MISSING
+        return self._index().get(value, MISSING)
+
+    def intern(self, value: Any) -> int:
+        """ID của string, thêm mới nếu chưa có (None -> MISSING)"""
+        if value is None:
+            return MISSING
+        value = str(value)
+        ids = self._index()
+        string_id = ids.get(value)
+        if string_id is None:
+            if self.SEPARATOR in value:
+                raise ValueError("String table không hỗ trợ ký tự NUL")
+            string_id = len(self._strings)
+            self._strings.append(value)
+            ids[value] = string_id
+        return string_id
+
+
+class RaggedColumns:
+    """
+    Một nhóm ragged fields dùng chung (start, length) theo row.
+
+    Giá trị nằm trong pool arrays; set_row ghi giá trị mới vào cuối pool, phần
+    cũ thành garbage và được compact khi garbage chiếm quá nửa pool.
+    """
+
+    def __init__(self, fields: Dict[str, Any], capacity: int):
+        self.fields = dict(fields)
+        self.values = {name: np.empty(INITIAL_CAPACITY, dtype) for name, dtype in self.fields.items()}
+        self.size = 0
+        self.garbage = 0
+        self.starts = np.zeros(capacity, np.int64)
+        self.lengths = np.zeros(capacity, np.int32)
+
+    @classmethod
+    def from_arrays(cls, fields: Dict[str, Any], values: Dict[str, np.ndarray],
+                    starts: np.ndarray, lengths: np.ndarray) -> 'RaggedColumns':
+        ragged = cls.__new__(cls)
+        ragged.fields = dict(fields)
+        ragged.values = values
+        ragged.size = len(next(iter(values.values()))) if values else 0
+        ragged.garbage = 0
+        ragged.starts = starts
+        ragged.lengths = lengths
+        return ragged
+
+    def resize_rows(self, capacity: int):
+        self.starts = _resized(self.starts, capacity)
+        self.lengths = _resized(self.lengths, capacity)
+
+    def make_writable(self, capacity: int):
+        self.starts = _resized(self.starts, capacity)
+        self.lengths = _resized(self.lengths, capacity)
+        self.values = {name: _resized(array, max(INITIAL_CAPACITY, len(array))) for name, array in self.values.items()}
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = len(next(iter(self.values.values())))
+        if needed > capacity:
+            capacity = max(needed, capacity * 2)
+            self.values = {name: _resized(array, capacity) for name, array in self.values.items()}
+
+    def set_row(self, row: int, columns: Dict[str, List]):
+        count = len(next(iter(columns.values()))) if columns else 0
+        self.garbage += int(self.lengths[row])
+        self._reserve(count)
+        for name, items in columns.items():
+            self.values[name][self.size:self.size + count] = items
+        self.starts[row] = self.size
+        self.lengths[row] = count
+        self.size += count
+
+    def clear_row(self, row: int):
+        self.garbage += int(self.lengths[row])
+        self.starts[row] = 0
+        self.lengths[row] = 0
+
+    def move_row(self, src: int, dst: int):
+        self.starts[dst] = self.starts[src]
+        self.lengths[dst] = self.lengths[src]
+        self.starts[src] = 0
+        self.lengths[src] = 0
+
+    def row(self, row: int, name: str) -> np.ndarray:
+        start = int(self.starts[row])
+        return self.values[name][start:start + int(self.lengths[row])]
+
+    def gather_index(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(offsets CSR, index vào pool) cho rows 0..n-1 theo thứ tự row"""
+        lengths = self.lengths[:n].astype(np.int64)
+        offsets = np.zeros(n + 1, np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        index = np.repeat(self.starts[:n] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        return offsets, index
+
+    def compact(self, n: int):
+        """Ghi lại pool theo thứ tự row, bỏ garbage"""
+        offsets, index = self.gather_index(n)
+        self.values = {name: array[index] for name, array in self.values.items()}
+        self.starts[:n] = offsets[:-1]
+        self.size = int(offsets[-1])
+        self.garbage = 0
+
+    def maybe_compact(self, n: int):
+        if self.garbage > INITIAL_CAPACITY and self.garbage * 2 > self.size:
+            self.compact(n)
+
+
+def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+    result = np.zeros(capacity, array.dtype)
+    count = min(len(array), capacity)
+    result[:count] = array[:count]
+    return result
+
+
+class CaregiverTable:
+    """
+    Bảng caregivers dạng columnar (xem module docstring).
+
+    Args:
+        capacity: Số rows cấp phát ban đầu (tự tăng khi append)
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        capacity = max(capacity, INITIAL_CAPACITY)
+        self.n = 0
+        self.capacity = capacity
+        self.strings = StringTable()
+        self.ids: List[str] = []
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros(capacity, dtype) for name, dtype in SCALAR_COLUMNS.items()
+        }
+        self.ragged: Dict[str, RaggedColumns] = {
+            group: RaggedColumns(fields, capacity) for group, fields in RAGGED_COLUMNS.items()
+        }
+        # Document gốc: dict đã decode (hoặc None nếu còn nằm trong doc_pool)
+        self._docs: List[Optional[Dict]] = []
+        self.doc_pool: Optional[np.ndarray] = None
+        self.doc_starts: Optional[np.ndarray] = None
+        self.doc_lengths: Optional[np.ndarray] = None
+        # Match document của từng row (None = chưa tính, ví dụ row chưa decode từ snapshot)
+        self._match_docs: List[Optional[Dict]] = []
+        self.writable = True
+        # Tăng mỗi khi có row thay đổi (dùng cho cache của các consumers)
+        self.generation = 0
+        # (texts, matrix float32) embeddings của skill names, có khi load từ snapshot
+        self.embeddings: Optional[Tuple[List[str], np.ndarray]] = None
+
+    # ========== READ ==========
+
+    def __len__(self) -> int:
+        return self.n
+
+    def column(self, name: str) -> np.ndarray:
+        """View của scalar column cho rows 0..n-1"""
+        return self.columns[name][:self.n]
+
+    def string(self, string_id: int) -> Optional[str]:
+        return self.strings.get(int(string_id))
+
+    def document(self, row: int) -> Dict:
+        """Caregiver dict gốc của row (decode từ snapshot lần đầu truy cập)"""
+        doc = self._docs[row]
+        if doc is None:
+            start = int(self.doc_starts[row])
+            doc = _loads(self.doc_pool[start:start + int(self.doc_lengths[row])].tobytes())
+            self._docs[row] = doc
+        return doc
+
+    def document_bytes(self, row: int) -> bytes:
+        doc = self._docs[row]
+        if doc is None:
+            start = int(self.doc_starts[row])
+            return self.doc_pool[start:start + int(self.doc_lengths[row])].tobytes()
+        return _dumps(doc)
+
+    def documents(self) -> 'DocumentList':
+        return DocumentList(self)
+
+    def match_document(self, row: int) -> Dict:
+        """
+        Document của row cho matcher: skills đã normalize
+
+        Dùng chung giữa các requests, matcher không được sửa.
+        """
+        doc = self._match_docs[row]
+        if doc is None:
+            doc = normalized_caregiver(self.document(row))
+            self._match_docs[row] = doc
+        return doc
+
+    def match_documents(self) -> List[Dict]:
+        """match_document() của rows 0..n-1"""
+        match_document = self.match_document
+        return [match_document(row) for row in range(self.n)]
+
+    def static_scores(self, rows: Optional[List[int]] = None) -> List[List[float]]:
+        """
+        (rating, experience, trust) tính sẵn của rows (mặc định 0..n-1) cho matcher
+
+        Trả về Python floats (copy, không phụ thuộc table sau khi trả về).
+        """
+        matrix = np.column_stack([self.column(name) for name in STATIC_SCORE_COLUMNS])
+        if rows is not None:
+            matrix = matrix[np.asarray(rows, dtype=np.int64)]
+        return matrix.tolist()
+
+    def skill_names(self, row: int) -> List[str]:
+        return [self.strings.get(int(i)) for i in self.ragged['skills'].row(row, 'name')]
+
+    # ========== WRITE ==========
+
+    def _ensure_capacity(self, rows: int):
+        if not self.writable:
+            self._make_writable(rows)
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, self.capacity * 2)
+        self.columns = {name: _resized(array, capacity) for name, array in self.columns.items()}
+        for ragged in self.ragged.values():
+            ragged.resize_rows(capacity)
+        self.capacity = capacity
+
+    def _make_writable(self, rows: int):
+        """Copy các arrays read-only (map từ snapshot) sang memory riêng trước khi sửa"""
+        capacity = max(rows, self.n + self.n // 4, INITIAL_CAPACITY)
+        self.columns = {name: _resized(array, capacity) for name, array in self.columns.items()}
+        for ragged in self.ragged.values():
+            ragged.make_writable(capacity)
+        if self.doc_starts is not None:
+            self.doc_starts = _resized(self.doc_starts, capacity)
+            self.doc_lengths = _resized(self.doc_lengths, capacity)
+        self.capacity = capacity
+        self.writable = True
+
+    def _compile_row(self, cg: Dict) -> Tuple:
+        """
+        compile_caregiver + match document của cg, chưa ghi gì vào table
+
+        Raises:
+            ValueError: Document sai format (compile_caregiver /
+                normalized_caregiver lỗi), table giữ nguyên
+        """
+        try:
+            scalars, ragged, caregiver_id = compile_caregiver(cg, self.strings)
+            return scalars, ragged, caregiver_id, normalized_caregiver(cg)
+        except (AttributeError, IndexError, KeyError, TypeError) as e:
+            raise ValueError(f"Caregiver sai format: {type(e).__name__}: {e}") from e
+
+    def _write_row(self, row: int, cg: Dict, compiled: Tuple):
+        scalars, ragged, caregiver_id, match_doc = compiled
+        for name, value in scalars.items():
+            self.columns[name][row] = value
+        for group, columns in ragged.items():
+            self.ragged[group].set_row(row, columns)
+            self.ragged[group].maybe_compact(self.n)
+        self.ids[row] = caregiver_id
+        self._docs[row] = cg
+        self._match_docs[row] = match_doc
+        if self.doc_lengths is not None:
+            self.doc_lengths[row] = 0
+        self.generation += 1
+
+    def append(self, cg: Dict) -> int:
+        """Thêm một caregiver, trả về row (document sai format: raise, table giữ nguyên)"""
+        compiled = self._compile_row(cg)
+        self._ensure_capacity(self.n + 1)
+        row = self.n
+        self.n += 1
+        self.ids.append('')
+        self._docs.append(None)
+        self._match_docs.append(None)
+        self._write_row(row, cg, compiled)
+        return row
+
+    def set_row(self, row: int, cg: Dict):
+        """Thay thế caregiver ở row (document sai format: raise, row giữ nguyên)"""
+        compiled = self._compile_row(cg)
+        self._ensure_capacity(self.n)
+        self._write_row(row, cg, compiled)
+
+    def swap_remove(self, row: int):
+        """Xóa row; row cuối (nếu khác) được chuyển vào row này"""
+        self._ensure_capacity(self.n)
+        last = self.n - 1
+        for ragged in self.ragged.values():
+            ragged.clear_row(row)
+        if row != last:
+            for array in self.columns.values():
+                array[row] = array[last]
+            for ragged in self.ragged.values():
+                ragged.move_row(last, row)
+            self.ids[row] = self.ids[last]
+            self._docs[row] = self._docs[last]
+            self._match_docs[row] = self._match_docs[last]
+            if self.doc_starts is not None:
+                self.doc_starts[row] = self.doc_starts[last]
+                self.doc_lengths[row] = self.doc_lengths[last]
+        self.ids.pop()
+        self._docs.pop()
+        self._match_docs.pop()
+        self.n = last
+        for ragged in self.ragged.values():
+            ragged.maybe_compact(self.n)
+        self.generation += 1
+
+
+class DocumentList(Sequence):
+    """Sequence các caregiver dicts của table (view, decode lazy)"""
+
+    def __init__(self, table: CaregiverTable):
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.n
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.table.document(i) for i in range(*row.indices(self.table.n))]
+        if row < 0:
+            row += self.table.n
+        if not 0 <= row < self.table.n:
+            raise IndexError(row)
+        return self.table.document(row)
+
+    def __iter__(self) -> Iterator[Dict]:
+        document = self.table.document
+        for row in range(self.table.n):
+            yield document(row)
+
+
+def compile_caregiver(cg: Dict, strings: StringTable) -> Tuple[Dict[str, Any], Dict[str, Dict[str, List]], str]:
+    """
+    Compile caregiver dict thành giá trị các columns.
+
+    Field extraction giống RuleBasedMatcher (hỗ trợ cả nested lẫn flat format).
+
+    Returns:
+        (scalars, ragged, caregiver_id)
+    """
+    if not isinstance(cg, dict):
+        raise ValueError("Caregiver phải là JSON object")
+    caregiver_id = cg.get('id')
+    caregiver_id = '' if caregiver_id is None else str(caregiver_id)
+    if StringTable.SEPARATOR in caregiver_id:
+        raise ValueError("Caregiver id không được chứa ký tự NUL")
+
+    professional_info = cg.get('professional_info', cg)
+    personal_info = cg.get('personal_info', cg)
+    location_info = cg.get('location', cg)
+    ratings_reviews = cg.get('ratings_reviews', cg)
+    rating_breakdown = ratings_reviews.get('rating_breakdown', {}) or {}
+    booking_history = cg.get('booking_history', {})
+    verification = cg.get('verification', {})
+    preferences = cg.get('preferences', {})
+    elderly_age_preference = preferences.get('elderly_age_preference') or (None, None)
+    gender = personal_info.get('gender', cg.get('gender'))
+    raw = {
+        'age': personal_info.get('age', cg.get('age')),
+        'years_experience': professional_info.get('years_experience', cg.get('years_experience')),
+        'overall_rating': ratings_reviews.get('overall_rating', cg.get('rating')),
+        'hourly_rate': professional_info.get('price_per_hour', professional_info.get(
+            'hourly_rate', cg.get('hourly_rate', cg.get('price_per_hour')))),
+        'elderly_age_preference': preferences.get('elderly_age_preference'),
+    }
+
+    scalars = {
+        'lat': _float(location_info.get('lat', cg.get('lat'))),
+        'lon': _float(location_info.get('lon', cg.get('lon'))),
+        'service_radius_km': _float(location_info.get('service_radius_km', cg.get('service_radius_km', 0))),
+        'age': _float(raw['age']),
+        'gender': strings.intern(gender),
+        'years_experience': _float(raw['years_experience']),
+        'hourly_rate': _float(raw['hourly_rate']),
+        'overall_rating': _float(raw['overall_rating']),
+        'total_reviews': _float(ratings_reviews.get('total_reviews', cg.get('total_reviews', 0))),
+        'has_rating_breakdown': bool(rating_breakdown),
+        'completion_rate': _float(booking_history.get('completion_rate', 0.0)),
+        'seeker_cancel_rate': _float(booking_history.get('seeker_cancel_rate', 0.0)),
+        'total_bookings': _float(booking_history.get('total_bookings', 0)),
+        'identity_verified': bool(verification.get('identity_verified', False)),
+        'elderly_age_min': _float(elderly_age_preference[0]),
+        'elderly_age_max': _float(elderly_age_preference[1]),
+        'health_status_text': isinstance(preferences.get('preferred_health_status', []), str),
+        'non_numeric': non_numeric_flags(raw),
+    }
+    for stars in range(1, 6):
+        scalars[f'rating_{stars}_star'] = _float(rating_breakdown.get(f'{stars}_star', 0))
+    scalars.update(zip(STATIC_SCORE_COLUMNS, static_scores(cg)))
+
+    skills = {'name': [], 'has_credential': []}
+    for skill in cg.get('skills', []):
+        if isinstance(skill, dict):
+            skills['name'].append(strings.intern(normalize_skill_name(skill.get('name', ''))))
+            skills['has_credential'].append(bool(skill.get('credential_id')))
+        else:
+            skills['name'].append(strings.intern(normalize_skill_name(skill)))
+            skills['has_credential'].append(False)
+
+    credentials = {'type': [], 'status': [], 'expiry': [], 'levels_mask': [], 'levels_count': []}
+    for cred in cg.get('credentials', []):
+        levels = cred.get('applicable_levels', []) or []
+        mask = 0
+        for level in levels:
+            if isinstance(level, int) and 0 <= level < 31:
+                mask |= 1 << level
+        credentials['type'].append(strings.intern(cred.get('type')))
+        credentials['status'].append(strings.intern(cred.get('status')))
+        credentials['expiry'].append(expiry_timestamp(cred.get('expiry_date')))
+        credentials['levels_mask'].append(mask)
+        credentials['levels_count'].append(len(levels))
+
+    availability_info = cg.get('availability', {})
+    schedule = availability_info.get('schedule', cg.get('availability', {})) if isinstance(availability_info, dict) else availability_info
+    if isinstance(schedule, list):
+        schedule = {entry.get('day'): entry.get('slots', []) for entry in schedule}
+    slots = {'day': [], 'start': [], 'end': []}
+    for day, day_slots in (schedule or {}).items():
+        for slot in day_slots or []:
+            slots['day'].append(strings.intern(day))
+            slots['start'].append(_minutes(slot.get('start')))
+            slots['end'].append(_minutes(slot.get('end')))
+
+    health_status = {'value': [strings.intern(s) for s in preferences.get('preferred_health_status', []) or []]}
+
+    ragged = {'skills': skills, 'credentials': credentials, 'schedule': slots, 'health_status': health_status}
+    return scalars, ragged, caregiver_id
+
+
+def build_table(caregivers) -> CaregiverTable:
+    """Compile một iterable caregiver dicts thành CaregiverTable"""
+    table = CaregiverTable()
+    for cg in caregivers:
+        table.append(cg)
+    return table
@@ -0,0 +1,333 @@
+"""
+Vectorized scoring engine.
+
+VectorizedMatcher giữ nguyên hard filters và fallback strategy của
+RuleBasedMatcher, nhưng soft scoring không tính từng caregiver một: sau khi
+lọc, 7 features của cả tập candidates còn lại được gom thành ma trận
+(n_candidates x 7) và total = ma trận x weight vector.
+
+Kết quả (thứ tự, total_score, breakdown) giống hệt RuleBasedMatcher:
+- các phép toán elementwise của numpy (+, -, *, /, so sánh) cho cùng kết quả
+  IEEE 754 như Python float; hàm siêu việt (exp) vẫn gọi math.exp
+- tích ma trận - vector được cộng theo đúng thứ tự features như weighted sum
+  của RuleBasedMatcher (BLAS gemv đổi thứ tự phép cộng, sai khác bit cuối có
+  thể đổi kết quả round 3 chữ số)
+- giá trị không vectorize được chính xác (giá không phải số, budget = 0, ...)
+  tính lại bằng đúng method của RuleBasedMatcher
+
+Kiểm tra: python debug/vectorized_equivalence.py
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.candidates import CandidateRows
+from app.core.instrumentation import MatchStats
+from app.core.matcher import SKILLS_SCORE_RANGE, RuleBasedMatcher, ScoreFloor, top_by_score
+from app.core.static_scores import STATIC_FEATURES, experience_score
+from app.core.weight_profiles import check_weights
+
+# Thứ tự cột của ma trận features (= thứ tự cộng trong weighted sum)
+FEATURES = ('credential', 'skills', 'distance', 'rating', 'experience', 'price', 'trust')
+STATIC_COLUMNS = [FEATURES.index(name) for name in STATIC_FEATURES]
+
+# Số nguyên mà cả giá trị lẫn hiệu của hai số (hourly_rate - budget) biểu diễn chính xác bằng float64
+MAX_EXACT_INT = 2 ** 52
+
+
+def weighted_sum(features: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    features (n x k) @ weights (k, hoặc k x p cho p profiles), cộng từng cột theo thứ tự 0..k-1
+
+    Mỗi cột kết quả cho cùng giá trị (từng bit) với biểu thức Python
+    w0*f0 + w1*f1 + ... + wk*fk của profile đó.
+    """
+    columns = features if weights.ndim == 1 else features[:, :, np.newaxis]
+    total = columns[:, 0] * weights[0]
+    for column in range(1, features.shape[1]):
+        total = total + columns[:, column] * weights[column]
+    return total
+
+
+def weight_matrix(profiles) -> np.ndarray:
+    """Iterable các weights dicts -> ma trận (7 features x p profiles) theo FEATURES"""
+    profiles = list(profiles)
+    matrix = [[weights[name] for weights in profiles] for name in FEATURES]
+    return np.array(matrix, dtype=np.float64).reshape(len(FEATURES), len(profiles))
+
+
+def _is_exact_number(value) -> bool:
+    if type(value) is float:
+        return math.isfinite(value)
+    return type(value) is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT
+
+
+def price_scores(budget, hourly_rates: np.ndarray) -> np.ndarray:
+    """
+    _calculate_price_score vectorized cho budget (số hữu hạn, khác 0) và hourly rates hữu hạn
+    """
+    ratio = hourly_rates / budget
+    within_budget = np.where(hourly_rates < budget * 0.5, 1.0, 1.0 - (ratio - 0.5) * 0.2)
+    over_budget = np.maximum(0.0, 1.0 - (hourly_rates - budget) / budget)
+    return np.where(hourly_rates <= budget, within_budget, over_budget)
+
+
+class VectorizedMatcher(RuleBasedMatcher):
+    """
+    RuleBasedMatcher với soft scoring theo batch (xem module docstring).
+
+    Cùng API (match, set_weights, weights_version, filter_order) nên dùng thay
+    thế trực tiếp được cho RuleBasedMatcher. Thêm match_profiles: xếp hạng theo
+    nhiều bộ weights trong một lần match.
+    """
+
+    def match_profiles(
+        self,
+        care_request: Dict,
+        caregivers: List[Dict],
+        weight_profiles: Dict[str, Dict[str, float]],
+        top_n: int = 10,
+        stats: Optional[MatchStats] = None,
+        static_scores: Optional[Sequence[Optional[Sequence[float]]]] = None,
+        candidate_rows: Optional[CandidateRows] = None
+    ) -> Tuple[List[Dict], Dict[str, List[Dict]]]:
+        """
+        Match một lần, xếp hạng theo self.weights và từng weight profile.
+
+        Hard filters, fallback và ma trận features chỉ tính một lần; mỗi profile
+        thêm một cột vào tích ma trận x weights và một lần sort. Ranking của mỗi
+        profile giống hệt match() với set_weights(profile). Pruning (ScoreFloor)
+        dùng một floor cho mỗi ranking: candidate chỉ bị bỏ qua skills scoring
+        khi không thể vào top N của ranking nào.
+
+        Args:
+            weight_profiles: Tên -> weights (xem app/core/weight_profiles.py)
+            (các args khác như match())
+
+        Returns:
+            (results theo self.weights như match(), {tên profile: results})
+        """
+        names = list(weight_profiles)
+        matrix = weight_matrix(check_weights(weight_profiles[name]) for name in names)
+        profile_floors = [ScoreFloor(top_n) for _ in names]
+
+        def score_batch(req, batch, batch_stats, filter_names, fallback=False, floor=None):
+            return self._score_batch(
+                req, batch, batch_stats, filter_names, fallback, floor,
+                profile_weights=matrix, profile_floors=profile_floors
+            )
+
+        def rank(scored, top_n, stats):
+            with stats.stage('rank'):
+                profile_totals = [result.pop('profile_scores') for result in scored]
+                positions = list(range(len(scored)))
+                top = top_by_score(positions, top_n, key=lambda i: scored[i]['total_score'])
+                profile_tops = {
+                    name: top_by_score(positions, top_n, key=lambda i, column=column: profile_totals[i][column])
+                    for column, name in enumerate(names)
+                }
+                # Breakdown chỉ cho các candidates nằm trong top N của ít nhất một ranking
+                winners = set(top).union(*profile_tops.values())
+                self._materialize([scored[i] for i in sorted(winners)])
+                rankings = {
+                    name: [{**scored[i], 'total_score': profile_totals[i][column]} for i in profile_tops[name]]
+                    for column, name in enumerate(names)
+                }
+            return [scored[i] for i in top], rankings
+
+        return self._match_pipeline(
+            care_request, caregivers, top_n, stats, static_scores, candidate_rows, rank, score_batch
+        )
+
+    def _score_batch(
+        self,
+        req: Dict,
+        batch: List[Tuple[Dict, Optional[Sequence[float]]]],
+        stats: MatchStats,
+        filter_names: Tuple[str, ...],
+        fallback: bool = False,
+        floor: Optional[ScoreFloor] = None,
+        profile_weights: Optional[np.ndarray] = None,
+        profile_floors: Optional[List[ScoreFloor]] = None
+    ) -> List[Optional[Dict]]:
+        """
+        Hard filters từng candidate, rồi soft scoring một lần cho cả tập còn lại.
+
+        Kết quả chỉ có total_score và tham chiếu tới hàng của ma trận features
+        ('score_row'); distance_km và breakdown được tạo trong _materialize cho
+        các candidates được trả về.
+
+        floor: Ngưỡng top N; skills score tính theo thứ tự upper bound giảm dần,
+        dừng ở survivor đầu tiên có upper bound dưới floor (xem _skills_column).
+
+        profile_weights (7 x p, optional): thêm 'profile_scores' (total theo từng
+        profile) vào kết quả; profile_floors: ngưỡng top N của từng profile (cùng
+        thứ tự cột, dùng cùng floor).
+        """
+        survivors = []
+        for position, (cg, static) in enumerate(batch):
+            ctx = self._candidate_context(cg)
+            if self._apply_hard_filters(req, cg, ctx, filter_names, stats):
+                survivors.append((position, cg, ctx, static))
+
+        results: List[Optional[Dict]] = [None] * len(batch)
+        if survivors:
+            scores = self._score_matrix(req, survivors, stats, floor, profile_weights, profile_floors)
+            for (position, _, _, _), result in zip(survivors, scores):
+                results[position] = result
+        return results
+
+    def _feature_matrix(self, req: Dict, survivors: List[Tuple], stats: MatchStats,
+                        floor: Optional[ScoreFloor] = None,
+                        profile_weights: Optional[np.ndarray] = None,
+                        profile_floors: Optional[List[ScoreFloor]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (features n x 7 theo FEATURES, distances km, mask các rows bị prune)
+
+        Rows bị prune có cột skills = skills score của upper bound.
+        """
+        n = len(survivors)
+        features = np.empty((n, len(FEATURES)), dtype=np.float64)
+
+        # Credential (theo care level) phụ thuộc request + cấu trúc lồng của caregiver
+        features[:, 0] = [self._calculate_credential_score(req, cg) for _, cg, _, _ in survivors]
+
+        # Distance: e^(-distance/8), distance đã tính ở bước lọc
+        distances = np.array([self._candidate_distance(req, ctx) for _, _, ctx, _ in survivors], dtype=np.float64)
+        features[:, 2] = np.fromiter(map(math.exp, (-distances / 8.0).tolist()), dtype=np.float64, count=n)
+
+        # Rating / experience / trust: tính sẵn lúc ingest, NaN = tính lại
+        features[:, STATIC_COLUMNS] = [
+            static if static is not None else (math.nan, math.nan, math.nan)
+            for _, _, _, static in survivors
+        ]
+        for row in np.flatnonzero(np.isnan(features[:, STATIC_COLUMNS]).any(axis=1)).tolist():
+            _, cg, ctx, _ = survivors[row]
+            rating, experience, trust = features[row, STATIC_COLUMNS].tolist()
+            features[row, STATIC_COLUMNS] = (
+                self._calculate_rating_score(cg) if math.isnan(rating) else rating,
+                experience_score(ctx['years_experience']) if math.isnan(experience) else experience,
+                self._calculate_trust_score(cg) if math.isnan(trust) else trust,
+            )
+
+        features[:, 5] = self._price_column(req, survivors)
+
+        # Skills (semantic, đắt nhất) tính sau cùng, chỉ cho rows còn có thể vào top N
+        skills_start = time.perf_counter()
+        pruned = self._skills_column(req, survivors, features, floor, profile_weights, profile_floors)
+        stats.add_stage('skills_score', time.perf_counter() - skills_start)
+        return features, distances, pruned
+
+    def _skills_column(self, req: Dict, survivors: List[Tuple], features: np.ndarray,
+                       floor: Optional[ScoreFloor],
+                       profile_weights: Optional[np.ndarray] = None,
+                       profile_floors: Optional[List[ScoreFloor]] = None) -> np.ndarray:
+        """
+        Điền cột skills, trả về mask các rows bị prune (cột skills = skills score của upper bound).
+
+        Với floor: duyệt rows theo upper bound (rounded) giảm dần, total thật của
+        mỗi row đã score được đẩy vào floor; row có upper bound dưới floor không
+        thể vào top N. Có profiles: mỗi ranking có upper bound và floor riêng, row
+        chỉ bị prune khi dưới floor của mọi ranking.
+        """
+        pruned = np.zeros(len(survivors), dtype=bool)
+        if floor is None or not self._has_priority_skills(req):
+            features[:, 1] = [self._calculate_skills_score(req, cg) for _, cg, _, _ in survivors]
+            return pruned
+
+        weights = weight_matrix([self.weights])
+        floors = [floor]
+        if profile_weights is not None:
+            weights = np.hstack([weights, profile_weights])
+            floors += profile_floors
+        # Upper bound của mỗi ranking theo dấu của skills weight (xem _skills_bounds)
+        bounds = []
+        for skills_score in SKILLS_SCORE_RANGE:
+            features[:, 1] = skills_score
+            bounds.append(weighted_sum(features, weights))
+        upper = [
+            [round(total, 3) for total in row]
+            for row in np.where(weights[1] >= 0, bounds[1], bounds[0]).tolist()
+        ]
+        # Rows bị prune giữ total = upper bound theo self.weights
+        features[:, 1] = self._skills_bounds()[1]
+
+        order = sorted(range(len(survivors)), key=lambda row: upper[row][0], reverse=True)
+        for row in order:
+            if all(bound < column_floor.value for bound, column_floor in zip(upper[row], floors)):
+                pruned[row] = True
+                continue
+            features[row, 1] = self._calculate_skills_score(req, survivors[row][1])
+            # Cùng thứ tự cộng như weighted_sum nên giống hệt total của _score_matrix
+            floor.push(round(self._weighted_total(*features[row].tolist()), 3))
+            if profile_weights is not None:
+                for column_floor, total in zip(profile_floors, weighted_sum(features[row:row + 1], profile_weights)[0].tolist()):
+                    column_floor.push(round(total, 3))
+        return pruned
+
+    def _price_column(self, req: Dict, survivors: List[Tuple]) -> np.ndarray:
+        budget = req.get('budget_per_hour')
+        if budget is None:
+            return np.ones(len(survivors))
+
+        rates = [ctx['hourly_rate'] for _, _, ctx, _ in survivors]
+        if not _is_exact_number(budget) or budget == 0:
+            exact = [False] * len(rates)
+        else:
+            exact = [_is_exact_number(rate) for rate in rates]
+
+        column = np.empty(len(rates), dtype=np.float64)
+        exact_rows = np.flatnonzero(exact)
+        if len(exact_rows):
+            column[exact_rows] = price_scores(budget, np.array([rates[i] for i in exact_rows.tolist()], dtype=np.float64))
+        for row, is_exact in enumerate(exact):
+            if not is_exact:
+                _, cg, _, _ = survivors[row]
+                column[row] = self._calculate_price_score(req, cg, rates[row])
+        return column
+
+    def _materialize(self, results: List[Dict]) -> List[Dict]:
+        """Tạo distance_km và breakdown (rounded) từ ma trận features cho các results được trả về"""
+        for result in results:
+            score_row = result.pop('score_row', None)
+            if score_row is not None:
+                features, distances, row = score_row
+                result['distance_km'] = round(float(distances[row]), 2)
+                result['breakdown'] = {name: round(value, 3) for name, value in zip(FEATURES, features[row].tolist())}
+        return results
+
+    def _score_matrix(self, req: Dict, survivors: List[Tuple], stats: MatchStats,
+                      floor: Optional[ScoreFloor] = None,
+                      profile_weights: Optional[np.ndarray] = None,
+                      profile_floors: Optional[List[ScoreFloor]] = None) -> List[Dict]:
+        """Kết quả (lazy, xem _score_batch) cho từng survivor (+ 'profile_scores' nếu có profile_weights)"""
+        scoring_start = time.perf_counter()
+        skills_before = stats.stage_seconds.get('skills_score', 0.0)
+
+        features, distances, pruned = self._feature_matrix(req, survivors, stats, floor, profile_weights, profile_floors)
+        weights = weight_matrix([self.weights])
+        if profile_weights is not None:
+            weights = np.hstack([weights, profile_weights])
+        # Cột 0: self.weights, cột 1..p: profiles
+        totals = weighted_sum(features, weights)
+
+        # Chỉ round total (cần cho ranking), breakdown tạo lazy trong _materialize
+        results = []
+        for row, (total, is_pruned) in enumerate(zip(totals[:, 0].tolist(), pruned.tolist())):
+            if is_pruned:
+                # total = upper bound (cột skills của row bị prune)
+                results.append({'total_score': round(total, 3), 'pruned': True})
+                continue
+            results.append({'total_score': round(total, 3), 'score_row': (features, distances, row)})
+        if pruned.any():
+            stats.add_candidates('pruned', int(pruned.sum()))
+        if profile_weights is not None:
+            for result, profile_totals in zip(results, totals[:, 1:].tolist()):
+                result['profile_scores'] = [round(total, 3) for total in profile_totals]
+
+        skills_seconds = stats.stage_seconds.get('skills_score', 0.0) - skills_before
+        stats.add_stage('soft_scoring', time.perf_counter() - scoring_start - skills_seconds)
+        return results
@@ -0,0 +1,88 @@
+"""
+Weight profiles cho soft scoring.
+
+Một profile là bộ weights của 7 features (credential, skills, distance, rating,
+experience, price, trust). Ngoài weights mặc định của matcher, các profiles có
+tên dùng cho A/B tests (mỗi nhánh một profile) hoặc ưu tiên của seeker ("giá
+trước", "gần nhất trước"). VectorizedMatcher.match_profiles xếp hạng theo nhiều
+profiles trong một lần match (dùng chung hard filters và ma trận features).
+
+Profiles thêm (hoặc ghi đè) từ file JSON {tên: {feature: weight}} qua
+load_profiles().
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Mapping
+
+# Weights for scoring features (sum = 1.0)
+DEFAULT_WEIGHTS = {
+    'credential': 0.30,   # Bằng cấp, care level (+5%)
+    'skills': 0.25,       # Priority skills matching (+5%)
+    'distance': 0.15,     # Gần = thuận tiện (+3%)
+    'rating': 0.12,       # Chất lượng đã được verify (+2%)
+    'experience': 0.08,   # Kinh nghiệm (giữ nguyên)
+    'price': 0.08,        # Gần budget (giữ nguyên)
+    'trust': 0.02         # Độ tin cậy (-3%)
+}
+
+WEIGHT_PROFILES: Dict[str, Dict[str, float]] = {
+    'default': DEFAULT_WEIGHTS,
+    # Seeker ưu tiên giá gần budget
+    'price_first': {
+        'credential': 0.20, 'skills': 0.20, 'distance': 0.10, 'rating': 0.10,
+        'experience': 0.05, 'price': 0.33, 'trust': 0.02,
+    },
+    # Seeker ưu tiên người ở gần
+    'nearest_first': {
+        'credential': 0.20, 'skills': 0.20, 'distance': 0.35, 'rating': 0.10,
+        'experience': 0.05, 'price': 0.08, 'trust': 0.02,
+    },
+    # Ưu tiên chất lượng: đánh giá, kinh nghiệm, độ tin cậy
+    'quality_first': {
+        'credential': 0.25, 'skills': 0.20, 'distance': 0.08, 'rating': 0.22,
+        'experience': 0.15, 'price': 0.03, 'trust': 0.07,
+    },
+}
+
+
+def check_weights(weights: Mapping[str, float]) -> Dict[str, float]:
+    """
+    Validate một bộ weights, trả về dict float theo thứ tự features mặc định
+
+    Keys không phải feature bị bỏ qua.
+
+    Raises:
+        ValueError: Thiếu feature hoặc weight không phải số
+    """
+    missing = set(DEFAULT_WEIGHTS) - set(weights)
+    if missing:
+        raise ValueError(f"Missing weights for features: {sorted(missing)}")
+    try:
+        return {name: float(weights[name]) for name in DEFAULT_WEIGHTS}
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Weight phải là số: {e}") from e
+
+
+def load_profiles(path: Path) -> Dict[str, Dict[str, float]]:
+    """Đọc profiles từ file JSON {tên: {feature: weight}} và thêm vào WEIGHT_PROFILES"""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict):
+        raise ValueError("File weight profiles phải là JSON object {tên: weights}")
+    profiles = {str(name): check_weights(weights) for name, weights in raw.items()}
+    WEIGHT_PROFILES.update(profiles)
+    return profiles
+
+
+def get_profiles(names) -> Dict[str, Dict[str, float]]:
+    """
+    Profiles theo tên (giữ thứ tự, bỏ tên trùng)
+
+    Raises:
+        KeyError: Tên profile không tồn tại
+    """
+    unknown = [name for name in names if name not in WEIGHT_PROFILES]
+    if unknown:
+        raise KeyError(f"Weight profile không tồn tại: {unknown} (có: {sorted(WEIGHT_PROFILES)})")
+    return {name: WEIGHT_PROFILES[name] for name in names}
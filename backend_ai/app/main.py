@@ -5,8 +5,11 @@ FastAPI Application - Phase 1: Rule-based Matching
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import match
+from fastapi.responses import PlainTextResponse
+from app.api import admin, match
 from app.models.schemas import HealthResponse
+from app.core.metrics import registry
+from app.algorithms.semantic_matcher import semantic_matcher, skill_similarity
 
 # Create FastAPI app
 app = FastAPI(
@@ -53,6 +56,7 @@ app.add_middleware(
 
 # Include API routers
 app.include_router(match.router, prefix="/api", tags=["Matching"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 # Root endpoint
@@ -68,7 +72,8 @@ async def root():
             "health": "/health",
             "requests": "/api/requests",
             "caregivers": "/api/caregivers",
-            "match": "/api/match"
+            "match": "/api/match",
+            "metrics": "/metrics"
         }
     }
 
@@ -87,6 +92,39 @@ async def health_check():
     )
 
 
+def semantic_cache_collector():
+    """Expose semantic_matcher.get_cache_stats() và skill similarity matrix lúc scrape /metrics"""
+    stats = semantic_matcher.get_cache_stats()
+    matrix = skill_similarity.stats()
+    return [
+        ("semantic_cache_hits_total", "counter", "Semantic similarity cache hits", {(): stats["cache_hits"]}),
+        ("semantic_cache_misses_total", "counter", "Semantic similarity cache misses", {(): stats["cache_misses"]}),
+        ("semantic_cache_hit_rate", "gauge", "Semantic similarity cache hit rate", {(): stats["hit_rate"]}),
+        ("semantic_cache_entries", "gauge", "Cached similarity pairs", {(): stats["total_cached_similarities"]}),
+        ("skill_similarity_vocabulary_size", "gauge", "Caregiver skills in the similarity matrix", {(): matrix["vocabulary_size"]}),
+        ("skill_similarity_rows", "gauge", "Request skills with a precomputed similarity row", {(): matrix["rows"]}),
+        ("skill_similarity_entries", "gauge", "Skill pairs at or above the match threshold", {(): matrix["entries"]}),
+    ]
+
+
+registry.register_collector(semantic_cache_collector)
+
+
+# Prometheus metrics
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoring"])
+async def metrics():
+    """
+    Prometheus metrics endpoint
+    
+    Matcher latency histograms (end-to-end + per stage), hard filter
+    pass/reject counters, fallback usage và semantic cache stats.
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from pydantic import BaseModel, Field
 
 
@@ -14,11 +14,25 @@ class MatchRequest(BaseModel):
     top_n: Optional[int] = Field(10, description="Số lượng caregivers trả về", ge=1, le=50)
 
 
+class CandidateRef(BaseModel):
+    """Tham chiếu tới caregiver có sẵn trong store của AI service"""
+    id: str = Field(..., description="ID của caregiver")
+    updated_at: Optional[str] = Field(None, description="Version phía Spring Boot, khác với store thì coi là stale")
+
+
 class MatchPayload(BaseModel):
-    """Request từ Spring Boot với care_request + candidates"""
+    """Request từ Spring Boot với care_request + candidates (full documents và/hoặc IDs)"""
     care_request: Dict[str, Any] = Field(..., description="Care request object")
-    candidates: List[Dict[str, Any]] = Field(..., description="List of caregiver candidates")
+    candidates: List[Dict[str, Any]] = Field(default_factory=list, description="List of caregiver candidates (full documents)")
+    candidate_ids: List[Union[str, CandidateRef]] = Field(
+        default_factory=list,
+        description="Candidates dạng ID (hoặc {id, updated_at}), resolve từ caregiver store"
+    )
     top_n: Optional[int] = Field(10, description="Số lượng recommendations", ge=1, le=50)
+    weight_profiles: List[str] = Field(
+        default_factory=list,
+        description="Xếp hạng thêm theo các weight profiles này (ví dụ price_first, nearest_first) trong cùng lần match"
+    )
 
 
 class MobileMatchRequest(BaseModel):
@@ -82,12 +96,22 @@ class MatchResponse(BaseModel):
     location: Dict
     total_matches: int
     recommendations: List[CaregiverRecommendation]
+    profile: Optional[Dict[str, Any]] = Field(None, description="Profiling report (chỉ khi profile=true)")
 
 
 class SimpleMatchResponse(BaseModel):
     """Response đơn giản cho Spring Boot (chỉ cần scores)"""
     total_matches: int
     recommendations: List[Dict[str, Any]]
+    unresolved_ids: List[str] = Field(
+        default_factory=list,
+        description="candidate_ids không có trong store hoặc stale (không được xếp hạng, cần gửi lại full document)"
+    )
+    profile_rankings: Dict[str, List[Dict[str, Any]]] = Field(
+        default_factory=dict,
+        description="Recommendations theo từng weight profile trong request (cùng format với recommendations)"
+    )
+    profile: Optional[Dict[str, Any]] = Field(None, description="Profiling report (chỉ khi profile=true)")
 
 
 class HealthResponse(BaseModel):
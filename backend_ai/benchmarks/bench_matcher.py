@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark matcher.match trên synthetic fleets.
+
+Replay các request shapes từ requests.json trên fleet 1k/10k/100k/1M caregivers
+và báo cáo p50/p95/p99 latency, throughput và peak memory theo từng stage.
+Kết quả ghi ra JSON (sort keys) để diff giữa các version.
+
+Shapes được nới hard filters (relax_request) để có kết quả thật trên fleet:
+shapes gốc gần như không khớp caregiver nào nên chỉ đo được hard filters.
+Số matches / candidates của từng request nằm trong report để so sánh giữa
+các lần chạy; --exact-requests replay shapes gốc.
+
+Hai chế độ:
+- list (mặc định): matcher (--engine) chạy trên list caregiver dicts
+- --store: đúng đường chạy của /api/match - fleet được ghi NDJSON theo stream
+  (iter_fleet, không giữ cả fleet trong memory), load vào CaregiverStore với
+  default indexes, mỗi request lấy caregivers + static scores + CandidateRows
+  qua store.candidates_for rồi mới match
+
+Usage:
+    python benchmarks/bench_matcher.py --sizes 1k 10k --repeats 5 --output bench.json
+    python benchmarks/bench_matcher.py --sizes 10k --baseline bench_old.json
+    python benchmarks/bench_matcher.py --sizes 100k 1m --engine vectorized --store
+"""
+
+import argparse
+import codecs
+import copy
+import json
+import math
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the backend directory to the Python path
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# Fix for UnicodeEncodeError on Windows
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+
+import app
+from app.core.matcher import RuleBasedMatcher
+from app.core.vectorized_matcher import VectorizedMatcher
+from app.core.instrumentation import MatchStats
+from app.core.indexes import default_indexes
+from app.core.store import CaregiverStore
+from app.algorithms.semantic_matcher import semantic_matcher, skill_similarity, normalized_request, normalized_caregiver
+from benchmarks.synthetic_fleet import generate_fleet, iter_fleet, relax_request
+
+SIZE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+# Như MATCHER_ENGINES của app/api/match.py
+MATCHER_ENGINES = {'rule': RuleBasedMatcher, 'vectorized': VectorizedMatcher}
+
+
+def parse_size(value: str) -> int:
+    """Parse '1k', '10k', '1m' hoặc số nguyên."""
+    value = value.strip().lower()
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile trên list đã sort: phần tử thứ ceil(pct / 100 * N)."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(samples_s: List[float], peak_bytes: int = None) -> Dict:
+    """Tóm tắt latency samples (giây) thành ms + throughput."""
+    ordered = sorted(samples_s)
+    total = sum(ordered)
+    summary = {
+        'count': len(ordered),
+        'mean_ms': round(1000 * total / len(ordered), 3) if ordered else 0.0,
+        'p50_ms': round(1000 * percentile(ordered, 50), 3),
+        'p95_ms': round(1000 * percentile(ordered, 95), 3),
+        'p99_ms': round(1000 * percentile(ordered, 99), 3),
+        'max_ms': round(1000 * ordered[-1], 3) if ordered else 0.0,
+        'throughput_per_s': round(len(ordered) / total, 3) if total > 0 else 0.0,
+    }
+    if peak_bytes is not None:
+        summary['peak_memory_mb'] = round(peak_bytes / (1024 * 1024), 3)
+    return summary
+
+
+def measure_peak_memory(fn: Callable[[], object]) -> int:
+    """Chạy fn một lần dưới tracemalloc, trả về peak bytes."""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_stages(
+    stages: Dict[str, Callable[[], object]],
+    repeats: int,
+    memory: bool,
+    cold: bool,
+    outputs: Dict[str, List] = None
+) -> Dict:
+    """
+    Đo từng stage: repeats lần lấy latency, thêm một lần riêng lấy peak memory.
+    
+    outputs: nếu có key trùng tên stage, giá trị trả về của các lần đo được append vào đó.
+    """
+    results = {}
+    outputs = outputs if outputs is not None else {}
+    for name, fn in stages.items():
+        if not cold:
+            fn()  # Warmup (semantic similarity cache)
+        samples = []
+        for _ in range(repeats):
+            if cold:
+                semantic_matcher.clear_cache()
+                skill_similarity.clear()
+            start = time.perf_counter()
+            value = fn()
+            samples.append(time.perf_counter() - start)
+            if name in outputs:
+                outputs[name].append(value)
+        peak = measure_peak_memory(fn) if memory else None
+        results[name] = summarize(samples, peak)
+    return results
+
+
+def merge_stage_samples(per_request: List[Dict]) -> Dict:
+    """Gộp stats của các request (weighted mean, max của percentiles)."""
+    overall = {}
+    for entry in per_request:
+        for stage, stats in entry['stages'].items():
+            agg = overall.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0,
+                                             'p99_ms': 0.0, 'max_ms': 0.0, 'peak_memory_mb': None})
+            agg['count'] += stats['count']
+            agg['total_ms'] += stats['mean_ms'] * stats['count']
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'):
+                agg[key] = max(agg[key], stats[key])
+            if 'peak_memory_mb' in stats:
+                agg['peak_memory_mb'] = max(agg['peak_memory_mb'] or 0.0, stats['peak_memory_mb'])
+    
+    for stage, agg in overall.items():
+        total_ms = agg.pop('total_ms')
+        agg['mean_ms'] = round(total_ms / agg['count'], 3) if agg['count'] else 0.0
+        agg['throughput_per_s'] = round(1000 * agg['count'] / total_ms, 3) if total_ms > 0 else 0.0
+        if agg['peak_memory_mb'] is None:
+            agg.pop('peak_memory_mb')
+    return overall
+
+
+def write_fleet(path: Path, size: int, seed: int) -> int:
+    """Ghi fleet ra NDJSON theo stream (iter_fleet), trả về số bytes"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for cg in iter_fleet(size, seed=seed):
+            f.write(json.dumps(cg, ensure_ascii=False))
+            f.write('\n')
+        return f.tell()
+
+
+def load_store(size: int, args, workdir: Path) -> Dict:
+    """
+    Fleet trong CaregiverStore như /api/match: ghi NDJSON, load (streaming ingest)
+    và build default indexes
+
+    Returns:
+        {'store', 'generate', 'load', 'index'} (stats của từng bước)
+    """
+    path = workdir / 'fleet.ndjson'
+    generate_start = time.perf_counter()
+    size_bytes = write_fleet(path, size, args.seed)
+    generate_stats = summarize([time.perf_counter() - generate_start])
+    generate_stats['bytes'] = size_bytes
+    if args.memory:
+        # Ghi theo stream: peak memory không phụ thuộc size
+        sample_path = workdir / 'sample.ndjson'
+        generate_stats['peak_memory_mb'] = round(
+            measure_peak_memory(lambda: write_fleet(sample_path, min(size, 10_000), args.seed)) / (1024 * 1024), 3
+        )
+        sample_path.unlink()
+    print(f"  generate: {generate_stats['mean_ms']:.1f} ms ({size_bytes / 1e6:.1f} MB NDJSON)")
+
+    store = CaregiverStore(path, indexes=default_indexes())
+    load_start = time.perf_counter()
+    store.get()
+    load_stats = summarize([time.perf_counter() - load_start])
+    print(f"  load: {load_stats['mean_ms']:.1f} ms")
+
+    index_start = time.perf_counter()
+    for index in store.indexes:
+        store.index(index.name)
+    index_stats = summarize([time.perf_counter() - index_start])
+    print(f"  index: {index_stats['mean_ms']:.1f} ms")
+    return {'store': store, 'generate': generate_stats, 'load': load_stats, 'index': index_stats}
+
+
+def benchmark_fleet(size: int, request_shapes: List[Dict], args) -> Dict:
+    """Benchmark tất cả request shapes trên một fleet."""
+    print(f"\n▶ Fleet {size:,} caregivers")
+    report = {'size': size}
+    matcher = MATCHER_ENGINES[args.engine]()
+    workdir = Path(tempfile.mkdtemp()) if args.store else None
+    try:
+        if args.store:
+            loaded = load_store(size, args, workdir)
+            store = loaded.pop('store')
+            report.update(loaded)
+        else:
+            generate_start = time.perf_counter()
+            fleet = generate_fleet(size, seed=args.seed)
+            generate_s = time.perf_counter() - generate_start
+            generate_peak = measure_peak_memory(lambda: generate_fleet(min(size, 10_000), seed=args.seed)) if args.memory else None
+            generate_stats = summarize([generate_s])
+            if generate_peak is not None:
+                # Peak memory đo trên tối đa 10k caregivers rồi scale tuyến tính
+                generate_stats['peak_memory_mb'] = round(generate_peak * size / min(size, 10_000) / (1024 * 1024), 3)
+            print(f"  generate: {generate_s * 1000:.1f} ms")
+            report['generate'] = generate_stats
+
+        per_request = []
+        for shape in request_shapes:
+            if args.store:
+                def candidates_stage():
+                    return store.candidates_for(shape)
+
+                def match_stage():
+                    # Như /api/match: candidates từ store rồi match
+                    stats = MatchStats()
+                    caregivers, static_scores, candidate_rows = store.candidates_for(shape)
+                    results = matcher.match(
+                        copy.deepcopy(shape), caregivers, top_n=args.top_n, stats=stats,
+                        static_scores=static_scores, candidate_rows=candidate_rows
+                    )
+                    return results, stats
+
+                stage_fns = {'candidates': candidates_stage, 'match': match_stage}
+            else:
+                def normalize_stage():
+                    normalized_request(shape)
+                    return [normalized_caregiver(cg) for cg in fleet]
+
+                def match_stage():
+                    stats = MatchStats()
+                    results = matcher.match(copy.deepcopy(shape), fleet, top_n=args.top_n, stats=stats)
+                    return results, stats
+
+                stage_fns = {'normalize': normalize_stage, 'match': match_stage}
+
+            outputs = {'match': []}
+            stages = run_stages(
+                stage_fns, repeats=args.repeats, memory=args.memory, cold=args.cold, outputs=outputs
+            )
+
+            # Per-stage breakdown bên trong match (từ MatchStats instrumentation)
+            stage_samples = {}
+            for _, stats in outputs['match']:
+                for stage, seconds in stats.stage_seconds.items():
+                    stage_samples.setdefault(stage, []).append(seconds)
+                for name, seconds in stats.filter_seconds.items():
+                    stage_samples.setdefault(f'filter.{name}', []).append(seconds)
+            for stage, samples in sorted(stage_samples.items()):
+                stages[f'match.{stage}'] = summarize(samples)
+
+            results, stats = outputs['match'][-1]
+            entry = {
+                'request_id': shape.get('id'),
+                'matches': len(results),
+                # Số candidates theo vòng (input / indexed / primary / fallback / pruned)
+                'candidates': dict(stats.candidates),
+                'stages': stages,
+            }
+            if args.store:
+                entry['plan'] = stats.plan
+            per_request.append(entry)
+            print(f"  {shape.get('id')}: match p50={stages['match']['p50_ms']:.1f} ms "
+                  f"p95={stages['match']['p95_ms']:.1f} ms ({len(results)} matches)")
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir)
+
+    report['requests'] = per_request
+    report['matches'] = sum(entry['matches'] for entry in per_request)
+    report['overall'] = merge_stage_samples(per_request)
+    return report
+
+
+def compare_with_baseline(report: Dict, baseline: Dict):
+    """In tỉ lệ p50/p95 so với baseline report."""
+    baseline_fleets = {fleet['size']: fleet for fleet in baseline.get('fleets', [])}
+    print("\n📊 So sánh với baseline (new / old):")
+    # Reports cũ không có các keys này: list mode với RuleBasedMatcher, shapes gốc
+    defaults = {'engine': 'rule', 'store': False, 'relaxed_requests': False}
+    for key, default in defaults.items():
+        old_value = baseline.get('config', {}).get(key, default)
+        if old_value != report['config'][key]:
+            print(f"  ⚠️  {key} khác baseline: {report['config'][key]} / {old_value}")
+    for fleet in report['fleets']:
+        old = baseline_fleets.get(fleet['size'])
+        if not old:
+            continue
+        old_matches = {entry['request_id']: entry['matches'] for entry in old.get('requests', [])}
+        changed = [entry['request_id'] for entry in fleet['requests']
+                   if entry['request_id'] in old_matches and entry['matches'] != old_matches[entry['request_id']]]
+        if changed:
+            print(f"  ⚠️  {fleet['size']:,}: số matches khác baseline ({', '.join(changed)})")
+        for stage, stats in fleet['overall'].items():
+            old_stats = old.get('overall', {}).get(stage)
+            if not old_stats:
+                continue
+            ratios = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                ratio = stats[key] / old_stats[key] if old_stats[key] else float('inf')
+                ratios.append(f"{key[:-3]} x{ratio:.2f}")
+            print(f"  {fleet['size']:>9,} {stage:<12} " + "  ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark matcher trên synthetic fleets")
+    parser.add_argument('--sizes', nargs='+', default=['1k', '10k'],
+                        help="Kích thước fleet (vd: 1k 10k 100k 1m)")
+    parser.add_argument('--requests', default=str(BASE_DIR / 'requests.json'),
+                        help="File request shapes để replay")
+    parser.add_argument('--repeats', type=int, default=5, help="Số lần đo mỗi request")
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--exact-requests', action='store_true',
+                        help="Replay request shapes gốc (không nới hard filters)")
+    parser.add_argument('--engine', choices=sorted(MATCHER_ENGINES), default='rule',
+                        help="Matcher engine (như MATCHER_ENGINE của API)")
+    parser.add_argument('--store', action='store_true',
+                        help="Chạy qua CaregiverStore + indexes + static scores như /api/match")
+    parser.add_argument('--cold', action='store_true', help="Clear semantic cache trước mỗi lần đo")
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="Bỏ qua đo peak memory")
+    parser.add_argument('--output', help="Ghi kết quả JSON ra file")
+    parser.add_argument('--baseline', help="So sánh với JSON của lần chạy trước")
+    args = parser.parse_args()
+    
+    with open(args.requests, 'r', encoding='utf-8') as f:
+        request_shapes = json.load(f)
+    if not args.exact_requests:
+        request_shapes = [relax_request(shape) for shape in request_shapes]
+    
+    print("🏁 MATCHER BENCHMARK")
+    print("=" * 50)
+    print(f"PhoBERT available: {semantic_matcher.is_available()}")
+    
+    report = {
+        'app_version': app.__version__,
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'phobert_available': semantic_matcher.is_available(),
+        'config': {
+            'seed': args.seed,
+            'repeats': args.repeats,
+            'top_n': args.top_n,
+            'cold_cache': args.cold,
+            'engine': args.engine,
+            'store': args.store,
+            'relaxed_requests': not args.exact_requests,
+            'requests_file': Path(args.requests).name,
+        },
+        'fleets': [benchmark_fleet(parse_size(size), request_shapes, args) for size in args.sizes],
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Saved: {args.output}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            compare_with_baseline(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark chi phí build + serialize một MatchResponse.
+
+So sánh các cách trả response cho cùng một kết quả match (top_n=50 mặc định):
+- validated: build model qua constructor + FastAPI serialize_response
+  (validate lại + jsonable_encoder) + json.dumps như JSONResponse mặc định
+- model_construct: model_construct (không validate) + pydantic-core to_json
+- schema_dict_pydantic: schema_dict + pydantic-core to_json
+- schema_dict_orjson: schema_dict + orjson (nếu có cài, đường dùng trong API)
+
+Usage:
+    python benchmarks/bench_serialization.py --size 3000 --top-n 50 --repeats 200
+"""
+
+import argparse
+import asyncio
+import codecs
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add the backend directory to the Python path
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# Fix for UnicodeEncodeError on Windows
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic_core import to_json
+
+from app.api.responses import ORJSON_AVAILABLE, schema_dict
+from app.core.matcher import RuleBasedMatcher
+from app.models.schemas import CaregiverRecommendation, MatchResponse, ScoreBreakdown
+from benchmarks.bench_matcher import summarize
+from benchmarks.synthetic_fleet import generate_fleet, relax_request
+
+if ORJSON_AVAILABLE:
+    import orjson
+
+
+def recommendation_fields(results: List[Dict]) -> List[Dict]:
+    """Các fields của CaregiverRecommendation (giống /api/match) cho từng kết quả"""
+    fields = []
+    for i, result in enumerate(results, 1):
+        cg = result['caregiver']
+        personal_info = cg['personal_info']
+        professional_info = cg['professional_info']
+        ratings_reviews = cg['ratings_reviews']
+        distance_km = result['distance_km']
+        fields.append({
+            'rank': i,
+            'caregiver_id': cg['id'],
+            'name': personal_info['full_name'],
+            'age': personal_info['age'],
+            'gender': personal_info['gender'],
+            'rating': ratings_reviews['overall_rating'],
+            'total_reviews': ratings_reviews['total_reviews'],
+            'years_experience': professional_info['years_experience'],
+            'price_per_hour': professional_info['price_per_hour'],
+            'distance_km': distance_km,
+            'distance': f"{distance_km:.1f} km",
+            'avatar': "https://ui-avatars.com/api/?name=CG&background=4ECDC4&color=fff&size=120",
+            'experience': f"{professional_info['years_experience']} năm kinh nghiệm",
+            'isVerified': False,
+            'match_score': result['total_score'],
+            'match_percentage': f"{int(result['total_score'] * 100)}%",
+            'breakdown': result['breakdown'],
+        })
+    return fields
+
+
+def response_fields(care_request: Dict, recommendations: List) -> Dict:
+    return {
+        'request_id': care_request['id'],
+        'care_level': care_request['care_level'],
+        'seeker_name': care_request['seeker_name'],
+        'location': care_request['location'],
+        'total_matches': len(recommendations),
+        'recommendations': recommendations,
+        'profile': None,
+    }
+
+
+def make_variants(care_request: Dict, fields: List[Dict]) -> Dict[str, Callable[[], bytes]]:
+    response_field = create_response_field(name='Response_match', type_=MatchResponse)
+    loop = asyncio.new_event_loop()
+
+    def validated():
+        recommendations = [
+            CaregiverRecommendation(
+                **{k: v for k, v in f.items() if k != 'breakdown'},
+                score_breakdown=ScoreBreakdown(**f['breakdown'])
+            )
+            for f in fields
+        ]
+        response = MatchResponse(**response_fields(care_request, recommendations))
+        content = loop.run_until_complete(
+            serialize_response(field=response_field, response_content=response)
+        )
+        return JSONResponse(content).body
+
+    def model_construct():
+        recommendations = [
+            CaregiverRecommendation.model_construct(
+                **{k: v for k, v in f.items() if k != 'breakdown'},
+                score_breakdown=ScoreBreakdown.model_construct(**{k: float(v) for k, v in f['breakdown'].items()})
+            )
+            for f in fields
+        ]
+        return to_json(MatchResponse.model_construct(**response_fields(care_request, recommendations)))
+
+    def with_schema_dict(dumps):
+        def run():
+            recommendations = [
+                schema_dict(
+                    CaregiverRecommendation,
+                    **{k: v for k, v in f.items() if k != 'breakdown'},
+                    score_breakdown=schema_dict(ScoreBreakdown, **f['breakdown'])
+                )
+                for f in fields
+            ]
+            return dumps(schema_dict(MatchResponse, **response_fields(care_request, recommendations)))
+        return run
+
+    variants = {
+        'validated': validated,
+        'model_construct': model_construct,
+        'schema_dict_pydantic': with_schema_dict(to_json),
+    }
+    if ORJSON_AVAILABLE:
+        variants['schema_dict_orjson'] = with_schema_dict(orjson.dumps)
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serialize MatchResponse")
+    parser.add_argument('--size', type=int, default=3000, help="Kích thước synthetic fleet")
+    parser.add_argument('--requests', default=str(BASE_DIR / 'requests.json'))
+    parser.add_argument('--top-n', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Ghi kết quả JSON ra file")
+    args = parser.parse_args()
+
+    with open(args.requests, 'r', encoding='utf-8') as f:
+        request_shapes = json.load(f)
+
+    print("🏁 SERIALIZATION BENCHMARK")
+    print("=" * 50)
+    print(f"orjson available: {ORJSON_AVAILABLE}")
+
+    matcher = RuleBasedMatcher()
+    fleet = generate_fleet(args.size, seed=args.seed)
+    samples: Dict[str, List[float]] = {}
+    sizes: Dict[str, List[int]] = {}
+
+    for shape in request_shapes:
+        results = matcher.match(relax_request(shape), fleet, top_n=args.top_n)
+        if not results:
+            continue
+        fields = recommendation_fields(results)
+        variants = make_variants(shape, fields)
+
+        # Tất cả variants phải ra cùng một JSON
+        expected = json.loads(variants['validated']())
+        for name, fn in variants.items():
+            body = fn()
+            if json.loads(body) != expected:
+                raise AssertionError(f"{name}: output khác validated cho {shape['id']}")
+            sizes.setdefault(name, []).append(len(body))
+
+        for name, fn in variants.items():
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                fn()
+                samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    report = {'config': vars(args), 'variants': {}}
+    baseline = None
+    for name, values in samples.items():
+        summary = summarize(values)
+        summary['mean_body_bytes'] = sum(sizes[name]) // len(sizes[name])
+        report['variants'][name] = summary
+        baseline = baseline or summary['mean_ms']
+        print(f"{name:20s} mean {summary['mean_ms']:.3f}ms  p95 {summary['p95_ms']:.3f}ms  "
+              f"speedup x{baseline / summary['mean_ms']:.2f}  ({summary['mean_body_bytes']} bytes)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
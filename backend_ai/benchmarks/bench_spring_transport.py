@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark end-to-end /api/match-from-spring theo format / nén của body.
+
+Mỗi variant gửi cùng một payload (care request + N candidates full documents)
+và nhận response cùng format:
+- json: JSON không nén (hiện trạng)
+- json_gzip / json_zstd: JSON + Content-Encoding / Accept-Encoding
+- msgpack / msgpack_gzip / msgpack_zstd: MessagePack (+ nén)
+
+Latency đo phía client qua ASGI in-process (encode + nén request, server decode +
+match + encode response, client giải nén + decode), cộng thời gian truyền ước
+tính theo --bandwidth-mbps cho số bytes thực gửi/nhận. Bytes báo cáo là trung
+bình qua các requests.
+
+Usage:
+    python benchmarks/bench_spring_transport.py --candidates 500 --repeats 30
+"""
+
+import argparse
+import codecs
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the backend directory to the Python path
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# Fix for UnicodeEncodeError on Windows
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+
+from fastapi.testclient import TestClient
+
+from app.api.negotiation import MSGPACK_AVAILABLE, ZSTD_AVAILABLE, GZIP_LEVEL, ZSTD_LEVEL
+from app.main import app
+from benchmarks.bench_matcher import summarize
+from benchmarks.bench_serialization import relax_request
+from benchmarks.synthetic_fleet import generate_fleet
+
+if MSGPACK_AVAILABLE:
+    import msgpack
+if ZSTD_AVAILABLE:
+    import zstandard
+
+ENDPOINT = '/api/match-from-spring'
+
+
+def make_codecs() -> Dict[str, Tuple[Callable, Callable]]:
+    """format -> (encode(obj) -> bytes, decode(bytes) -> obj)"""
+    codecs_ = {'json': (lambda obj: json.dumps(obj).encode('utf-8'), json.loads)}
+    if MSGPACK_AVAILABLE:
+        codecs_['msgpack'] = (msgpack.packb, lambda raw: msgpack.unpackb(raw, raw=False))
+    return codecs_
+
+
+def make_compressors() -> Dict[Optional[str], Tuple[Callable, Callable]]:
+    """encoding -> (compress, decompress)"""
+    compressors = {
+        None: (lambda raw: raw, lambda raw: raw),
+        'gzip': (lambda raw: gzip.compress(raw, compresslevel=GZIP_LEVEL), gzip.decompress),
+    }
+    if ZSTD_AVAILABLE:
+        compressors['zstd'] = (
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress,
+            lambda raw: zstandard.ZstdDecompressor().stream_reader(raw).read(),
+        )
+    return compressors
+
+
+def run_variant(client: TestClient, payload: Dict, fmt: str, encoding: Optional[str],
+                codecs_: Dict, compressors: Dict) -> Tuple[float, int, int, Dict]:
+    """Một round trip, trả về (seconds, request bytes, response bytes, response dict)"""
+    encode, decode = codecs_[fmt]
+    compress = compressors[encoding][0]
+    media_type = 'application/json' if fmt == 'json' else 'application/msgpack'
+    headers = {'content-type': media_type, 'accept': media_type, 'accept-encoding': encoding or 'identity'}
+    if encoding:
+        headers['content-encoding'] = encoding
+
+    start = time.perf_counter()
+    body = compress(encode(payload))
+    # stream để lấy body đúng như trên dây (httpx tự giải nén nếu dùng .content)
+    with client.stream('POST', ENDPOINT, content=body, headers=headers) as response:
+        raw = b''.join(response.iter_raw())
+        if response.status_code != 200:
+            raise RuntimeError(f"{fmt}/{encoding}: HTTP {response.status_code}")
+        response_encoding = response.headers.get('content-encoding')
+    result = decode(compressors[response_encoding][1](raw) if response_encoding else raw)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(body), len(raw), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transport /api/match-from-spring")
+    parser.add_argument('--candidates', type=int, default=500, help="Số candidates mỗi request")
+    parser.add_argument('--requests', default=str(BASE_DIR / 'requests.json'))
+    parser.add_argument('--top-n', type=int, default=50)
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--bandwidth-mbps', type=float, default=1000.0,
+                        help="Băng thông mạng nội bộ để ước tính thời gian truyền")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Ghi kết quả JSON ra file")
+    args = parser.parse_args()
+
+    with open(args.requests, 'r', encoding='utf-8') as f:
+        request_shapes = json.load(f)
+
+    print("🏁 SPRING TRANSPORT BENCHMARK")
+    print("=" * 50)
+    print(f"msgpack available: {MSGPACK_AVAILABLE}, zstd available: {ZSTD_AVAILABLE}")
+
+    client = TestClient(app)
+    codecs_ = make_codecs()
+    compressors = make_compressors()
+    variants = [(fmt, encoding) for fmt in codecs_ for encoding in compressors]
+    candidates = generate_fleet(args.candidates, seed=args.seed)
+    payloads = [
+        {'care_request': relax_request(shape), 'candidates': candidates, 'top_n': args.top_n}
+        for shape in request_shapes
+    ]
+
+    samples: Dict[str, List[float]] = {}
+    transfer: Dict[str, List[List[int]]] = {}
+    for payload in payloads:
+        expected = None
+        for fmt, encoding in variants:
+            name = fmt + (f'_{encoding}' if encoding else '')
+            _, request_bytes, response_bytes, result = run_variant(
+                client, payload, fmt, encoding, codecs_, compressors
+            )
+            # Tất cả variants phải ra cùng một kết quả
+            expected = expected if expected is not None else result
+            if result != expected:
+                raise AssertionError(f"{name}: response khác json cho {payload['care_request']['id']}")
+            transfer.setdefault(name, []).append([request_bytes, response_bytes])
+
+            wire_seconds = (request_bytes + response_bytes) * 8 / (args.bandwidth_mbps * 1e6)
+            for _ in range(args.repeats):
+                elapsed, _, _, _ = run_variant(client, payload, fmt, encoding, codecs_, compressors)
+                samples.setdefault(name, []).append(elapsed + wire_seconds)
+
+    report = {'config': vars(args), 'variants': {}}
+    baseline = None
+    for name, values in samples.items():
+        summary = summarize(values)
+        summary['request_bytes'] = sum(t[0] for t in transfer[name]) // len(transfer[name])
+        summary['response_bytes'] = sum(t[1] for t in transfer[name]) // len(transfer[name])
+        report['variants'][name] = summary
+        baseline = baseline or summary['mean_ms']
+        print(f"{name:14s} mean {summary['mean_ms']:.2f}ms  p95 {summary['p95_ms']:.2f}ms  "
+              f"speedup x{baseline / summary['mean_ms']:.2f}  "
+              f"(request {summary['request_bytes'] / 1024:.0f} KB, response {summary['response_bytes'] / 1024:.1f} KB)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\n💾 Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic synthetic caregiver fleets cho benchmark.
+
+Mỗi caregiver có cùng schema với caregivers.json (personal_info, location,
+credentials, skills, availability, ratings_reviews, booking_history, ...)
+và được sinh từ seed riêng của nó, nên caregiver thứ i luôn giống nhau
+bất kể kích thước fleet.
+"""
+
+import json
+import random
+from typing import Dict, Iterator, List
+
+# Trung tâm TP.HCM (Quận 1) và độ phân tán ~ 0.12 độ (~13km)
+HCMC_CENTER = (10.7769, 106.7009)
+HCMC_SPREAD_DEG = 0.12
+
+DISTRICTS = [
+    "Quận 1", "Quận 3", "Quận 4", "Quận 5", "Quận 6", "Quận 7", "Quận 8",
+    "Quận 10", "Quận 11", "Quận 12", "Bình Thạnh", "Phú Nhuận", "Gò Vấp",
+    "Tân Bình", "Tân Phú", "Bình Tân", "Thủ Đức", "Nhà Bè", "Bình Chánh",
+]
+STREETS = [
+    "Nguyễn Văn Linh", "Lê Lợi", "Nguyễn Huệ", "Cách Mạng Tháng 8",
+    "Điện Biên Phủ", "Võ Văn Tần", "Nguyễn Thị Minh Khai", "Phan Xích Long",
+    "Hoàng Văn Thụ", "Lý Thường Kiệt", "Trần Hưng Đạo", "Huỳnh Tấn Phát",
+]
+FAMILY_NAMES = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]
+MIDDLE_NAMES = {"female": ["Thị", "Ngọc", "Thu", "Thanh", "Minh"], "male": ["Văn", "Minh", "Quốc", "Đức", "Hữu"]}
+GIVEN_NAMES = {
+    "female": ["Mai", "Lan", "Hoa", "Hương", "Trang", "Linh", "Hạnh", "Thảo", "Yến", "Nhung"],
+    "male": ["Nam", "Hùng", "Dũng", "Tuấn", "Phúc", "Long", "Khang", "Bình", "Tâm", "Sơn"],
+}
+
+# Skill vocabulary lấy theo dữ liệu thật (caregivers.json + VIETNAMESE_TO_ENGLISH_SKILLS)
+BASIC_SKILLS = [
+    "hỗ trợ vệ sinh", "hỗ trợ đi lại", "nấu ăn", "Chuẩn bị bữa ăn", "Đi chợ",
+    "đồng hành", "trò chuyện", "Đồng hành đi bộ", "Hỗ trợ sinh hoạt", "tắm rửa",
+    "thay quần áo", "hỗ trợ ăn uống", "vận động nhẹ nhàng", "giám sát an toàn",
+    "nhắc nhở uống thuốc", "Kích thích trí óc", "Chăm sóc cơ bản",
+]
+MEDICAL_SKILLS = [
+    "quản lý thuốc", "tiêm insulin", "đo đường huyết", "đo huyết áp",
+    "chăm sóc vết thương", "đo dấu hiệu sinh tồn", "vật lý trị liệu",
+    "Hỗ trợ phục hồi chức năng", "Hỗ trợ dùng thuốc", "Khám sức khỏe",
+    "Tư vấn dinh dưỡng", "Lập kế hoạch chăm sóc", "Xử lý cấp cứu",
+    "Chăm sóc sau phẫu thuật", "chăm sóc catheter", "cho ăn qua ống",
+    "phòng ngừa loét", "theo dõi sức khỏe", "hỗ trợ tâm lý",
+]
+CONDITION_SKILLS = [
+    "đái tháo đường", "cao huyết áp", "đột quỵ phục hồi", "parkinson",
+    "alzheimer", "sa sút trí tuệ", "ung thư", "Suy tim", "Bệnh tim mạch",
+    "Chăm sóc người mất trí nhớ", "Bệnh thần kinh",
+]
+
+DEGREES = [
+    ("Trung cấp Điều dưỡng", [1, 2, 3]),
+    ("Cao đẳng Điều dưỡng", [2, 3, 4]),
+    ("Cử nhân Y tế công cộng", [2, 3]),
+    ("Bác sĩ Đa khoa", [3, 4]),
+    ("Bác sĩ Y khoa - Chuyên khoa Lão khoa", [3, 4]),
+]
+CERTIFICATES = [
+    ("Sơ cấp cứu & CPR", [1, 2, 3, 4], "first_aid"),
+    ("Chăm sóc người cao tuổi cơ bản", [1, 2], "basic_care"),
+    ("Chăm sóc bệnh nhân đái tháo đường", [2, 3], "diabetes"),
+    ("Chăm sóc bệnh nhân Parkinson", [2, 3, 4], "parkinson"),
+    ("Chăm sóc giảm nhẹ", [3, 4], "palliative"),
+    ("Chăm sóc người bệnh sau đột quỵ", [2, 3, 4], "stroke"),
+    ("Vật lý trị liệu", [2, 3], "physical_therapy"),
+    ("Dinh dưỡng cho người cao tuổi", [1, 2], "nutrition"),
+    ("Chăm sóc người cao tuổi mất trí nhớ", [2, 3], "dementia"),
+    ("Chăm sóc bệnh nhân tim mạch", [2, 3, 4], "cardiac"),
+]
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+SLOT_PATTERNS = [
+    [("08:00", "12:00")],
+    [("08:00", "17:00")],
+    [("06:00", "12:00"), ("14:00", "18:00")],
+    [("08:00", "12:00"), ("14:00", "18:00")],
+    [("12:00", "18:00")],
+    [("14:00", "22:00")],
+    [("07:00", "19:00")],
+    [("09:00", "15:00")],
+]
+HEALTH_STATUSES = ["good", "moderate", "weak"]
+
+
+def _credentials(rng: random.Random, index: int) -> List[Dict]:
+    credentials = []
+    if rng.random() < 0.6:
+        name, levels = rng.choice(DEGREES)
+        year = rng.randint(2000, 2020)
+        credentials.append({
+            "type": "degree",
+            "name": name,
+            "issue_date": f"{year}-06-15",
+            "applicable_levels": list(levels),
+            "status": "verified" if rng.random() < 0.9 else "pending",
+            "credential_id": f"degr_{index}_{rng.getrandbits(32):08x}",
+        })
+    for name, levels, tag in rng.sample(CERTIFICATES, rng.randint(0, 4)):
+        year = rng.randint(2018, 2025)
+        credentials.append({
+            "type": "certificate",
+            "name": name,
+            "issue_date": f"{year}-01-10",
+            "expiry_date": f"{year + rng.randint(2, 6)}-01-10",
+            "applicable_levels": list(levels),
+            "tags": [tag],
+            "status": "verified" if rng.random() < 0.85 else "pending",
+            "credential_id": f"cert_{index}_{rng.getrandbits(32):08x}",
+        })
+    return credentials
+
+
+def _skills(rng: random.Random, credentials: List[Dict]) -> List[Dict]:
+    names = rng.sample(BASIC_SKILLS, rng.randint(2, 6))
+    names += rng.sample(MEDICAL_SKILLS, rng.randint(0, 6))
+    names += rng.sample(CONDITION_SKILLS, rng.randint(0, 3))
+    verified_ids = [c["credential_id"] for c in credentials if c["status"] == "verified"]
+    
+    skills = []
+    for name in names:
+        skill = {"name": name}
+        if name not in BASIC_SKILLS and verified_ids and rng.random() < 0.7:
+            skill["required_credentials"] = True
+            skill["credential_id"] = rng.choice(verified_ids)
+        skills.append(skill)
+    return skills
+
+
+def _schedule(rng: random.Random) -> List[Dict]:
+    working_days = set(rng.sample(DAYS, rng.randint(3, 7)))
+    schedule = []
+    for day in DAYS:
+        slots = []
+        if day in working_days:
+            slots = [{"start": start, "end": end} for start, end in rng.choice(SLOT_PATTERNS)]
+        schedule.append({"day": day, "slots": slots})
+    return schedule
+
+
+def generate_caregiver(index: int, seed: int = 42) -> Dict:
+    """Sinh caregiver thứ index (deterministic theo seed + index)."""
+    rng = random.Random(seed * 1_000_003 + index)
+    
+    gender = "female" if rng.random() < 0.75 else "male"
+    name = f"{rng.choice(FAMILY_NAMES)} {rng.choice(MIDDLE_NAMES[gender])} {rng.choice(GIVEN_NAMES[gender])}"
+    age = rng.randint(22, 60)
+    lat = HCMC_CENTER[0] + rng.gauss(0, HCMC_SPREAD_DEG / 2)
+    lon = HCMC_CENTER[1] + rng.gauss(0, HCMC_SPREAD_DEG / 2)
+    years_experience = min(age - 20, rng.randint(0, 15))
+    
+    credentials = _credentials(rng, index)
+    
+    total_reviews = rng.randint(0, 150)
+    stars = [rng.random() ** 3 for _ in range(5)]
+    star_total = sum(stars) or 1.0
+    breakdown = {f"{5 - i}_star": int(total_reviews * s / star_total) for i, s in enumerate(stars)}
+    breakdown["5_star"] += total_reviews - sum(breakdown.values())
+    overall_rating = round(
+        sum(int(k[0]) * v for k, v in breakdown.items()) / total_reviews, 1
+    ) if total_reviews else 0.0
+    
+    total_bookings = rng.randint(0, 200)
+    seeker_cancel_rate = round(rng.uniform(0, 0.15), 3)
+    completion_rate = round(rng.uniform(0.8, 1.0), 2)
+    
+    elderly_age_preference = None
+    if rng.random() < 0.3:
+        low = rng.randint(60, 75)
+        elderly_age_preference = [low, low + rng.randint(10, 30)]
+    
+    return {
+        "id": f"cg_syn_{index:07d}",
+        "personal_info": {
+            "full_name": name,
+            "age": age,
+            "gender": gender,
+            "phone": f"+849{rng.randint(10000000, 99999999)}",
+            "email": f"caregiver{index}@example.com",
+        },
+        "location": {
+            "address": f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(DISTRICTS)}, TP.HCM",
+            "lat": round(lat, 6),
+            "lon": round(lon, 6),
+            "service_radius_km": rng.choice([5, 8, 10, 15, 20]),
+        },
+        "professional_info": {
+            "years_experience": years_experience,
+            "total_hours_worked": years_experience * rng.randint(200, 600),
+            "completed_bookings": int(total_bookings * completion_rate),
+            "price_per_hour": rng.randrange(60000, 200001, 5000),
+        },
+        "credentials": credentials,
+        "skills": _skills(rng, credentials),
+        "availability": {
+            "schedule": _schedule(rng),
+            "max_hours_per_week": 40,
+        },
+        "ratings_reviews": {
+            "overall_rating": overall_rating,
+            "total_reviews": total_reviews,
+            "rating_breakdown": breakdown,
+        },
+        "booking_history": {
+            "total_bookings": total_bookings,
+            "completion_rate": completion_rate,
+            "seeker_cancel_rate": seeker_cancel_rate,
+        },
+        "verification": {
+            "identity_verified": rng.random() < 0.85,
+            "background_check": rng.random() < 0.7,
+        },
+        "preferences": {
+            "preferred_health_status": sorted(rng.sample(HEALTH_STATUSES, rng.randint(1, 3))),
+            "elderly_age_preference": elderly_age_preference,
+        },
+    }
+
+
+def iter_fleet(size: int, seed: int = 42) -> Iterator[Dict]:
+    """Sinh lần lượt size caregivers (không giữ cả fleet trong memory)."""
+    for index in range(size):
+        yield generate_caregiver(index, seed)
+
+
+def generate_fleet(size: int, seed: int = 42) -> List[Dict]:
+    """Sinh fleet gồm size caregivers."""
+    return list(iter_fleet(size, seed))
+
+
+def relax_request(shape: Dict) -> Dict:
+    """
+    Request shape (requests.json) nới hard filters để có đủ kết quả trên synthetic fleets
+
+    Các shapes gốc gần như không khớp caregiver nào của fleet (care level,
+    required skills, 100% overlap của 3 time slots cả ngày...), benchmark khi
+    đó chỉ đo hard filters loại candidates. Bản nới giữ các filters còn lại
+    (gender, health status, kinh nghiệm, ...) và priority skills; care level
+    về 1, bỏ required skills / khoảng rating, tuổi, chỉ giữ time slot đầu.
+    """
+    request = json.loads(json.dumps(shape))
+    request['care_level'] = 1
+    request['skills'] = {**request.get('skills', {}), 'required_skills': []}
+    request['overall_rating_range'] = None
+    request['caregiver_age_range'] = None
+    request['time_slots'] = (request.get('time_slots') or [])[:1]
+    return request
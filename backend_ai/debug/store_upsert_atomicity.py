@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Kiểm tra upsert caregiver sai format không làm hỏng store.
+
+Với mỗi document hợp lệ về JSON nhưng compile lỗi (credentials / location /
+personal_info sai kiểu), cả khi tạo mới lẫn khi thay một caregiver đã có:
+- CaregiverTable.append / set_row raise và table giữ nguyên (n, ids,
+  documents, columns)
+- CaregiverStore.upsert raise ValueError, total / version không đổi, indexes
+  giống bản build lại từ table, match vẫn chạy và cho kết quả như trước
+- CaregiverStore.upsert_many bỏ qua (và báo trong 'failed') các caregivers
+  sai format, vẫn áp dụng các caregivers còn lại và tăng version
+- File caregivers (JSON array / NDJSON) có records sai format: store vẫn
+  load, bỏ qua đúng các records đó (IngestReport.skipped), match cho kết
+  quả như file không có chúng; snapshot build cũng vậy
+
+Usage:
+    python debug/store_upsert_atomicity.py
+"""
+
+import codecs
+import copy
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to the Python path
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# Fix for UnicodeEncodeError on Windows
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+
+import numpy as np
+
+from app.core.candidates import generate_candidates
+from app.core import snapshot
+from app.core.indexes import AvailabilityIndex, CategoricalIndex, RangeIndex, SpatialGridIndex, default_indexes
+from app.core.store import CaregiverStore
+from app.core.table import build_table
+from app.core.vectorized_matcher import VectorizedMatcher
+
+# Fields ghi đè lên một caregiver hợp lệ; mỗi bộ làm compile_caregiver raise
+MALFORMED = [
+    {'credentials': [1]},
+    {'credentials': 5},
+    {'location': {'lat': 'x'}, 'personal_info': 5},
+    {'skills': [1]},
+    {'availability': 7},
+    {'preferences': 5},
+]
+
+
+def malformed_docs(base, caregiver_id):
+    for fields in MALFORMED:
+        yield {**copy.deepcopy(base), 'id': caregiver_id, **fields}
+
+
+def malformed_records(base):
+    """Records lỗi trong file caregivers: MALFORMED + các field lồng nhau sai kiểu"""
+    docs = list(malformed_docs(base, None))
+    doc = copy.deepcopy(base)
+    doc['preferences']['elderly_age_preference'] = [70]
+    docs.append(doc)
+    doc = copy.deepcopy(base)
+    doc['credentials'] = ['chung chi']
+    docs.append(doc)
+    doc = copy.deepcopy(base)
+    doc['availability']['schedule'][0]['slots'] = [None]
+    docs.append(doc)
+    doc = copy.deepcopy(base)
+    doc['skills'] = [5]
+    docs.append(doc)
+    for i, doc in enumerate(docs):
+        doc['id'] = f'bad_ingest_{i}'
+    return docs
+
+
+def write_records(path: Path, records, ndjson: bool):
+    with open(path, 'w', encoding='utf-8') as f:
+        if ndjson:
+            f.writelines(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        else:
+            json.dump(records, f, ensure_ascii=False)
+
+
+def table_state(table) -> str:
+    columns = {name: table.column(name).tolist() for name in sorted(table.columns)}
+    return repr((table.n, list(table.ids), [table.document(row) for row in range(table.n)], columns))
+
+
+def store_results(store, matcher, request) -> str:
+    caregivers, static_scores, candidate_rows = store.candidates_for(request)
+    results = matcher.match(copy.deepcopy(request), caregivers, top_n=10,
+                            static_scores=static_scores, candidate_rows=candidate_rows)
+    return repr([(r['caregiver'].get('id'), r['total_score']) for r in results])
+
+
+def main():
+    with open(BASE_DIR / 'caregivers.json', 'r', encoding='utf-8') as f:
+        caregivers = json.load(f)
+    with open(BASE_DIR / 'requests.json', 'r', encoding='utf-8') as f:
+        requests = json.load(f)
+
+    print("🔍 STORE UPSERT ATOMICITY")
+    print("=" * 50)
+    failures = 0
+
+    # CaregiverTable
+    table = build_table(caregivers)
+    before = table_state(table)
+    for row, caregiver_id in ((None, 'bad_new'), (0, caregivers[0]['id'])):
+        for doc in malformed_docs(caregivers[1], caregiver_id):
+            try:
+                if row is None:
+                    table.append(doc)
+                else:
+                    table.set_row(row, doc)
+            except Exception:
+                pass
+            else:
+                failures += 1
+                print(f"❌ table không raise với document sai format: {doc}")
+                table = build_table(caregivers)
+            if table_state(table) != before:
+                failures += 1
+                print(f"❌ table thay đổi sau upsert lỗi: {doc}")
+
+    # CaregiverStore (indexes đã build, update đi qua remove -> set_row -> add)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        path = workdir / 'caregivers.json'
+        shutil.copy(BASE_DIR / 'caregivers.json', path)
+        store = CaregiverStore(path, indexes=default_indexes(), snapshot_path=workdir / 'caregivers.snapshot')
+        matcher = VectorizedMatcher()
+        for name in ('availability', 'categorical', 'range', 'spatial'):
+            store.index(name)
+        expected = [store_results(store, matcher, request) for request in requests]
+        total, version = len(store.get()), store.version
+        for caregiver_id in ('bad_new', caregivers[0]['id']):
+            for doc in malformed_docs(caregivers[1], caregiver_id):
+                try:
+                    store.upsert(doc)
+                except ValueError:
+                    pass
+                else:
+                    failures += 1
+                    print(f"❌ store không raise với document sai format: {doc}")
+                    continue
+                if (len(store.get()), store.version) != (total, version):
+                    failures += 1
+                    print(f"❌ store thay đổi sau upsert lỗi: {doc}")
+                actual = [store_results(store, matcher, request) for request in requests]
+                if actual != expected:
+                    failures += 1
+                    print(f"❌ kết quả match thay đổi sau upsert lỗi: {doc}")
+
+        good = [{**copy.deepcopy(caregivers[2]), 'id': f'bulk_{i}'} for i in range(2)]
+        batch = [good[0], *malformed_docs(caregivers[1], 'bulk_bad'), good[1]]
+        result = store.upsert_many(batch)
+        if ([position for position, _ in result['failed']] != list(range(1, len(MALFORMED) + 1))
+                or result['created'] != 2 or len(store.get()) != total + 2 or store.version == version):
+            failures += 1
+            print(f"❌ upsert_many: {result}, total {len(store.get())}, version {store.version}")
+
+        rebuilt = {index.name: index for index in (AvailabilityIndex(), CategoricalIndex(), RangeIndex(), SpatialGridIndex())}
+        for index in rebuilt.values():
+            index.build(store.table)
+        for request in requests:
+            actual = generate_candidates(store.index, request, store.table.n)
+            reference = generate_candidates(rebuilt.__getitem__, request, store.table.n)
+            if (actual is None) != (reference is None) or actual is not None and not np.array_equal(
+                actual.positions(store.table.n, primary=True), reference.positions(store.table.n, primary=True)
+            ):
+                failures += 1
+                print(f"❌ indexes khác với bản build lại từ table: {request['id']}")
+
+        # Records sai format trong file: xen giữa các caregivers hợp lệ
+        bad = malformed_records(caregivers[1])
+        records = list(caregivers)
+        for i, doc in enumerate(bad):
+            records.insert(1 + 2 * i, doc)
+        for name in ('mixed.json', 'mixed.ndjson'):
+            path = workdir / name
+            write_records(path, records, ndjson=name.endswith('.ndjson'))
+            try:
+                mixed = CaregiverStore(path, indexes=default_indexes(), snapshot_path=workdir / f'{name}.snap')
+                actual = [store_results(mixed, matcher, request) for request in requests]
+            except Exception as e:
+                failures += 1
+                print(f"❌ load {name} lỗi: {type(e).__name__}: {e}")
+                continue
+            if (len(mixed.get()), mixed.last_ingest.skipped) != (len(caregivers), len(bad)):
+                failures += 1
+                print(f"❌ load {name}: {len(mixed.get())} caregivers, skipped {mixed.last_ingest.skipped}")
+            if actual != expected:
+                failures += 1
+                print(f"❌ kết quả match của {name} khác file không có records lỗi")
+            if snapshot.main(['build', str(path), '-o', str(workdir / f'{name}.snap')]) != 0:
+                failures += 1
+                print(f"❌ snapshot build {name} lỗi")
+    finally:
+        shutil.rmtree(workdir)
+
+    if failures:
+        print(f"\n{failures} failures")
+        sys.exit(1)
+    print("✅ Upsert sai format không làm thay đổi table / store, bulk upsert và ingest bỏ qua đúng các records lỗi")
+
+
+if __name__ == "__main__":
+    main()
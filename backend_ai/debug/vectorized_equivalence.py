@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Kiểm tra VectorizedMatcher (và pruning top N) cho kết quả giống hệt RuleBasedMatcher.
+
+So sánh thứ tự caregivers, total_score, distance_km, breakdown và
+radius_multiplier (repr, nên phân biệt cả 0.0 / -0.0) trên:
+- caregivers.json và một synthetic fleet
+- requests.json, bản nới hard filters và các biến thể budget (None, 0, int, float)
+- weights mặc định và vài bộ weights ngẫu nhiên
+- có / không có static scores tính sẵn (CaregiverTable), có / không có
+  candidate rows theo plan của query planner trên AvailabilityIndex,
+  CategoricalIndex, RangeIndex, SpatialGridIndex (app/core/candidates.py)
+- tham chiếu là RuleBasedMatcher không pruning (prune_candidates = False); so
+  với VectorizedMatcher và RuleBasedMatcher có pruning
+- match_profiles (có pruning): ranking của từng weight profile giống
+  RuleBasedMatcher với weights của profile đó
+
+Usage:
+    python debug/vectorized_equivalence.py --fleet-size 1000
+"""
+
+import argparse
+import codecs
+import copy
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add the backend directory to the Python path
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+# Fix for UnicodeEncodeError on Windows
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.detach())
+
+from app.core.candidates import generate_candidates
+from app.core.indexes import AvailabilityIndex, CategoricalIndex, RangeIndex, SpatialGridIndex
+from app.core.matcher import RuleBasedMatcher
+from app.core.table import build_table
+from app.core.vectorized_matcher import VectorizedMatcher
+from app.core.weight_profiles import WEIGHT_PROFILES
+from benchmarks.bench_serialization import relax_request
+from benchmarks.synthetic_fleet import generate_fleet
+
+
+def request_variants(requests):
+    for request in requests:
+        yield request
+        relaxed = relax_request(request)
+        yield relaxed
+        for budget in (None, 0, 150000, 99999.5):
+            variant = copy.deepcopy(relaxed)
+            variant['id'] = f"{relaxed['id']}_budget_{budget}"
+            variant['budget_per_hour'] = budget
+            yield variant
+
+
+def summarize(results) -> str:
+    return repr([
+        (r['caregiver'].get('id'), r['total_score'], r['distance_km'], r['breakdown'], r.get('radius_multiplier'))
+        for r in results
+    ])
+
+
+def run(matcher, request, fleet, top_n, static_scores=None, candidate_rows=None) -> str:
+    """Kết quả match dạng repr (hoặc loại exception: hai engine phải lỗi giống nhau)"""
+    try:
+        results = matcher.match(
+            copy.deepcopy(request), fleet, top_n=top_n, static_scores=static_scores, candidate_rows=candidate_rows
+        )
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+    return summarize(results)
+
+
+def run_profiles(matcher, request, fleet, top_n, static_scores=None) -> Dict[Optional[str], str]:
+    """match_profiles với tất cả WEIGHT_PROFILES: {None: ranking theo matcher.weights, tên: ranking}"""
+    try:
+        results, rankings = matcher.match_profiles(
+            copy.deepcopy(request), fleet, WEIGHT_PROFILES, top_n=top_n, static_scores=static_scores
+        )
+    except Exception as e:
+        return {None: f"error: {type(e).__name__}"}
+    return {None: summarize(results), **{name: summarize(ranking) for name, ranking in rankings.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VectorizedMatcher vs RuleBasedMatcher")
+    parser.add_argument('--fleet-size', type=int, default=1000)
+    parser.add_argument('--weight-sets', type=int, default=2, help="Số bộ weights ngẫu nhiên thêm vào")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    with open(BASE_DIR / 'requests.json', 'r', encoding='utf-8') as f:
+        requests = json.load(f)
+    with open(BASE_DIR / 'caregivers.json', 'r', encoding='utf-8') as f:
+        real_fleet = json.load(f)
+    fleets = {'caregivers.json': real_fleet, 'synthetic': generate_fleet(args.fleet_size, seed=args.seed)}
+
+    rule = RuleBasedMatcher()
+    rule.prune_candidates = False
+    pruned_rule = RuleBasedMatcher()
+    vectorized = VectorizedMatcher()
+    rng = random.Random(args.seed)
+    weight_sets = [dict(rule.weights)]
+    for _ in range(args.weight_sets):
+        raw = {name: rng.random() for name in rule.weights}
+        weight_sets.append({name: value / sum(raw.values()) for name, value in raw.items()})
+
+    print("🔍 VECTORIZED MATCHER EQUIVALENCE")
+    print("=" * 50)
+    checked = 0
+    mismatches = 0
+    for fleet_name, fleet in fleets.items():
+        table = build_table(fleet)
+        static_scores = table.static_scores()
+        indexes = {
+            index.name: index
+            for index in (AvailabilityIndex(), CategoricalIndex(), RangeIndex(), SpatialGridIndex())
+        }
+        for index in indexes.values():
+            index.build(table)
+        for weights in weight_sets:
+            for matcher in (rule, pruned_rule, vectorized):
+                matcher.set_weights(weights)
+            for request in request_variants(requests):
+                for top_n in (5, 50):
+                    expected = run(rule, request, fleet, top_n)
+                    candidate_rows = generate_candidates(indexes.__getitem__, request, table.n)
+                    for matcher in (pruned_rule, vectorized):
+                        for scores, candidates in ((None, None), (static_scores, None), (static_scores, candidate_rows)):
+                            actual = run(matcher, request, fleet, top_n, scores, candidates)
+                            checked += 1
+                            if actual != expected:
+                                mismatches += 1
+                                print(f"❌ {type(matcher).__name__} / {fleet_name} / {request['id']} / "
+                                      f"top_n={top_n} / static={'yes' if scores else 'no'} / "
+                                      f"indexed={'yes' if candidates else 'no'} / weights={weights}")
+
+    # Nhiều profiles trong một lần match
+    rule.set_weights(weight_sets[0])
+    vectorized.set_weights(weight_sets[0])
+    profile_matchers = {}
+    for name, weights in WEIGHT_PROFILES.items():
+        profile_matchers[name] = RuleBasedMatcher()
+        profile_matchers[name].prune_candidates = False
+        profile_matchers[name].set_weights(weights)
+    for fleet_name, fleet in fleets.items():
+        static_scores = build_table(fleet).static_scores()
+        for request in request_variants(requests):
+            for top_n in (5, 50):
+                expected = {None: run(rule, request, fleet, top_n)}
+                if not expected[None].startswith('error'):
+                    for name, matcher in profile_matchers.items():
+                        expected[name] = run(matcher, request, fleet, top_n)
+                actual = run_profiles(vectorized, request, fleet, top_n, static_scores)
+                checked += 1
+                if actual != expected:
+                    mismatches += 1
+                    print(f"❌ profiles: {fleet_name} / {request['id']} / top_n={top_n}")
+
+    print(f"\n{checked} comparisons, {mismatches} mismatches")
+    if mismatches:
+        sys.exit(1)
+    print("✅ VectorizedMatcher == RuleBasedMatcher")
+
+
+if __name__ == "__main__":
+    main()